@@ -13,6 +13,13 @@ from typing import TYPE_CHECKING, Any, cast
 from sqlalchemy.orm import Session
 
 from services.context import get_user_daily_context
+from services.prompt_budget import (
+    PromptSection,
+    assemble_prompt,
+    message_text,
+    tool_schema_tokens,
+)
+from utils.timing import timed
 
 if TYPE_CHECKING:
     from langchain_core.runnables import RunnableConfig
@@ -79,6 +86,9 @@ CORE_SYSTEM_PROMPT = (
     "Use the provided [TODAY'S STATE] to proactively guide the user."
 )
 
+# Tokens the provider spends on the bound tools' schemas (set at build time)
+_tool_tokens = 0
+
 
 def build_agent_runnable_config(user_id: str, db: Session) -> RunnableConfig:
     """Build a config object that carries tenant and transaction context to tools."""
@@ -123,16 +133,36 @@ def _is_system_message(msg: Any) -> bool:
 def _inject_contextual_system_prompt(
     payload: Any, config: RunnableConfig | None
 ) -> dict[str, Any]:
-    today_state = _daily_state_from_runtime(config)
-    system_text = f"{CORE_SYSTEM_PROMPT}\n{today_state}"
+    with timed("daily_context"):
+        today_state = _daily_state_from_runtime(config)
+    # Caller-supplied system context (e.g. the conversation summary) is
+    # folded into the single system prompt.
+    caller_context: list[str] = []
 
     if isinstance(payload, dict) and isinstance(payload.get("messages"), list):
         user_messages = [m for m in payload["messages"] if not _is_system_message(m)]
+        caller_context = [
+            message_text(m) for m in payload["messages"] if _is_system_message(m)
+        ]
     elif isinstance(payload, dict) and isinstance(payload.get("input"), str):
         user_messages = [{"role": "user", "content": payload["input"]}]
     else:
         user_messages = [{"role": "user", "content": str(payload)}]
 
+    # Stable instructions first so the request prefix is cacheable; the
+    # volatile sections are trimmed first when over budget.
+    assembly = assemble_prompt(
+        [
+            PromptSection("core", CORE_SYSTEM_PROMPT, stable=True, trimmable=False),
+            PromptSection("daily_state", today_state, priority=20, min_tokens=8),
+            PromptSection("context", "\n".join(filter(None, caller_context))),
+        ],
+        user_messages,
+        tool_tokens=_tool_tokens,
+    )
+    system_text = assembly.system_text
+    user_messages = assembly.messages
+
     if (
         _SystemMessage is not None
         and _HumanMessage is not None
@@ -240,6 +270,7 @@ def _build_agent_app():
         start_focus_tool = None
 
     def lazy_agent():
+        global _tool_tokens
         chat_model = cast(Any, ChatGroq)(
             name="chat", model="llama-3.1-70b-versatile", temperature=0.2
         )
@@ -261,6 +292,7 @@ def _build_agent_app():
             )
             if t
         ]
+        _tool_tokens = tool_schema_tokens(tools)
         compiled = create_agent(chat_model, tools)
         return ContextInjectedAgentApp(compiled)
 
@@ -0,0 +1,161 @@
+"""Ordering and concurrency for the tool calls of one agent turn.
+
+When the model emits several tool calls in one step, LangGraph starts them
+all at once. Each call passes through its turn's ``ToolGate`` first. The gate
+is a FIFO readers/writer gate:
+
+- consecutive read-only calls (``agent.tools.READ_ONLY_TOOLS``) run together,
+  at most ``AGENT_TOOL_CONCURRENCY`` at a time. Each runs its queries in a
+  worker thread on a session of its own, so a step of reads takes about as
+  long as its slowest tool. On a single-connection engine (SQLite's
+  ``StaticPool``) reads share the turn's session and still run one by one;
+- a mutating call waits for every earlier call to finish and holds back every
+  later one, so writes run one at a time in the order they were issued and
+  reads never observe a half-applied step.
+
+Calls are admitted in arrival order, so a read issued after a write still
+sees that write. ``shared_session_lock`` is held by calls that use the turn's
+own sync Session, which must not run in two worker threads at once.
+
+Gates are per turn, keyed by the turn's DB session. Wait times and the peak
+number of reads admitted together are reported under ``agent_tools`` on
+``GET /metrics``; ``shared_session_reads`` counts the reads that then had to
+take turns on the shared session.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from utils.metrics import Histogram, register_collector
+
+AGENT_TOOL_CONCURRENCY = int(os.getenv("AGENT_TOOL_CONCURRENCY", "4"))
+
+
+class ToolGate:
+    def __init__(self, max_concurrency: int | None = None):
+        limit = AGENT_TOOL_CONCURRENCY if max_concurrency is None else max_concurrency
+        self.max_concurrency = max(1, limit)
+        self._cond = asyncio.Condition()
+        self._queue: deque[tuple[object, bool]] = deque()
+        self._readers = 0
+        self._writing = False
+        self.shared_session_lock = asyncio.Lock()
+
+    def _admissible(self, ticket: object, read_only: bool) -> bool:
+        if not self._queue or self._queue[0][0] is not ticket or self._writing:
+            return False
+        if read_only:
+            return self._readers < self.max_concurrency
+        return self._readers == 0
+
+    @asynccontextmanager
+    async def slot(self, read_only: bool) -> AsyncIterator[None]:
+        ticket = object()
+        started = time.perf_counter()
+        async with self._cond:
+            self._queue.append((ticket, read_only))
+            try:
+                await self._cond.wait_for(lambda: self._admissible(ticket, read_only))
+            except BaseException:
+                self._queue.remove((ticket, read_only))
+                self._cond.notify_all()
+                raise
+            self._queue.popleft()
+            if read_only:
+                self._readers += 1
+            else:
+                self._writing = True
+            readers = self._readers
+            # The next queued reader may be admissible now as well
+            self._cond.notify_all()
+        get_tool_gate_stats().record(
+            read_only, (time.perf_counter() - started) * 1000, readers
+        )
+        try:
+            yield
+        finally:
+            async with self._cond:
+                if read_only:
+                    self._readers -= 1
+                else:
+                    self._writing = False
+                self._cond.notify_all()
+
+
+_GateMap = weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ToolGate]
+_gates: weakref.WeakKeyDictionary[Any, _GateMap] = weakref.WeakKeyDictionary()
+_gates_lock = threading.Lock()
+
+
+def get_tool_gate(turn_key: Any) -> ToolGate:
+    """The gate for the turn identified by ``turn_key`` (its DB session).
+
+    Gates are also per event loop, since asyncio primitives are bound to one.
+    """
+    loop = asyncio.get_running_loop()
+    with _gates_lock:
+        by_loop = _gates.get(turn_key)
+        if by_loop is None:
+            by_loop = _gates[turn_key] = weakref.WeakKeyDictionary()
+        gate = by_loop.get(loop)
+        if gate is None:
+            gate = by_loop[loop] = ToolGate()
+        return gate
+
+
+class ToolGateStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.read_calls = 0
+        self.write_calls = 0
+        self.peak_concurrent_reads = 0
+        self.shared_session_reads = 0
+        self.wait_ms = Histogram()
+
+    def record(self, read_only: bool, waited_ms: float, readers: int) -> None:
+        self.wait_ms.observe(waited_ms)
+        with self._lock:
+            if read_only:
+                self.read_calls += 1
+                self.peak_concurrent_reads = max(self.peak_concurrent_reads, readers)
+            else:
+                self.write_calls += 1
+
+    def record_shared_session_read(self) -> None:
+        with self._lock:
+            self.shared_session_reads += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrency": AGENT_TOOL_CONCURRENCY,
+                "read_calls": self.read_calls,
+                "write_calls": self.write_calls,
+                "peak_concurrent_reads": self.peak_concurrent_reads,
+                "shared_session_reads": self.shared_session_reads,
+                "wait_ms": self.wait_ms.snapshot(),
+            }
+
+
+# Global instance
+_stats: ToolGateStats | None = None
+_stats_lock = threading.Lock()
+
+
+def get_tool_gate_stats() -> ToolGateStats:
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = ToolGateStats()
+                register_collector("agent_tools", _stats.stats)
+    return _stats
@@ -1,11 +1,42 @@
+"""LangChain tools the agent calls on the user's behalf.
+
+Tools are ``async def``. DB work goes through the ``*_service_async``
+variants (``storage.database.run_in_session``): an AsyncSession awaits the
+async driver, a sync Session runs the service in a worker thread. Either way
+the event loop stays free. Each call gets its session from ``_tool_session``:
+
+- ``ASYNC_DB=1``: a fresh AsyncSession per call. It is a unit of work of its
+  own: the services commit their writes, and a failed call is rolled back
+  when its session closes. Calls never share a connection, so several can
+  run at once. Sync entrypoints (below) are the exception: they use the
+  turn's sync Session, since the async engine's pool belongs to the main
+  loop and cannot be used from a worker thread's loop.
+- Otherwise, tools in ``READ_ONLY_TOOLS`` open their own sync Session on
+  the turn's engine, so several can run in worker threads at once. Other
+  tools use the turn's sync Session (from RunnableConfig or
+  ``set_agent_runtime_context``), one call at a time. Reads share it too
+  when the engine has a single connection (SQLite's ``StaticPool``).
+
+Before that, every call passes the turn's ``agent.tool_gate.ToolGate``:
+tools in ``READ_ONLY_TOOLS`` (they never write) run concurrently, up to
+``AGENT_TOOL_CONCURRENCY``; any other tool runs alone, in issue order.
+"""
+
 from __future__ import annotations
 
-from contextlib import contextmanager
+import asyncio
+import functools
+import inspect
+import threading
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, contextmanager
 from contextvars import ContextVar
 from typing import TYPE_CHECKING, Any
 
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
 if TYPE_CHECKING:
     from langchain_core.runnables import RunnableConfig
@@ -22,20 +53,40 @@ try:
 except Exception:  # pragma: no cover - runtime may not have langchain during CI
     _lc_tool_impl = None
 
-from services.ai_clients import get_embedding
+from agent.tool_gate import get_tool_gate, get_tool_gate_stats
 from services.analytics import analyze_weekly_productivity_service
+from services.embeddings import get_embedding_provider
 from services.habits import (
-    create_habit_service,
-    list_habits_service,
-    update_habit_count_service,
+    create_habit_service_async,
+    list_habits_service_async,
+    update_habit_count_service_async,
 )
-from services.journal import create_entry_service
+from services.journal import create_entry_service_async
 from services.memory_service import search_memories
-from services.pomodoro import create_session_service
-from services.tasks import create_task_service, get_task_service, list_tasks_service
+from services.pomodoro import create_session_service_async
+from services.tasks import (
+    create_task_service_async,
+    get_task_service_async,
+    list_tasks_service_async,
+)
+from storage.database import ASYNC_DB_ENABLED, AsyncSessionLocal, run_in_session
 
 _AGENT_USER_ID: ContextVar[str | None] = ContextVar("_AGENT_USER_ID", default=None)
 _AGENT_DB: ContextVar[Session | None] = ContextVar("_AGENT_DB", default=None)
+_IN_SYNC_ENTRYPOINT: ContextVar[bool] = ContextVar("_IN_SYNC_ENTRYPOINT", default=False)
+
+READ_ONLY_TOOLS = frozenset(
+    {
+        "list_tasks",
+        "get_task_details",
+        "recall_memory",
+        "analyze_productivity",
+    }
+)
+
+# Sync entrypoints each run their own loop in a LangChain worker thread; the
+# turn's session must not be used from two of those threads at once.
+_sync_call_lock = threading.Lock()
 
 
 def _fallback_noop_decorator(*_args, **_kwargs):
@@ -45,14 +96,43 @@ def _fallback_noop_decorator(*_args, **_kwargs):
     return _inner
 
 
+def _sync_entrypoint(coroutine: Callable[..., Awaitable[Any]]) -> Callable[..., Any]:
+    @functools.wraps(coroutine)
+    def run(*args, **kwargs):
+        with _sync_call_lock:
+            token = _IN_SYNC_ENTRYPOINT.set(True)
+            try:
+                return asyncio.run(coroutine(*args, **kwargs))
+            finally:
+                _IN_SYNC_ENTRYPOINT.reset(token)
+
+    return run
+
+
 def safe_tool(**dec_kwargs):
     """Return a decorator compatible with different langchain.tool signatures.
 
     Usage:
         @safe_tool(name="foo", args_schema=MySchema)
-        def foo_tool(...):
+        async def foo_tool(...):
             ...
+
+    Async tools also get a sync ``func`` for sync callers (``invoke``,
+    scripts). LangChain runs that in a worker thread with its own loop; the
+    agent's async paths (``ainvoke``, ``astream_events``) await the coroutine.
     """
+    decorator = _tool_decorator(**dec_kwargs)
+
+    def _apply(fn):
+        tool_obj = decorator(fn)
+        if inspect.iscoroutinefunction(fn) and getattr(tool_obj, "func", 0) is None:
+            tool_obj.func = _sync_entrypoint(fn)
+        return tool_obj
+
+    return _apply
+
+
+def _tool_decorator(**dec_kwargs):
     if _lc_tool_impl is None:
         return _fallback_noop_decorator(**dec_kwargs)
 
@@ -106,6 +186,36 @@ def _resolve_runtime(
     return str(user_id), db
 
 
+@asynccontextmanager
+async def _tool_session(
+    config: RunnableConfig | None, tool_name: str
+) -> AsyncIterator[tuple[str, Session | AsyncSession]]:
+    """Admit one tool call through its turn's gate and open its session.
+
+    See the module docstring for the gate and session policies.
+    """
+    user_id, db = _resolve_runtime(config)
+    read_only = tool_name in READ_ONLY_TOOLS
+    gate = get_tool_gate(db)
+    async with gate.slot(read_only=read_only):
+        if _IN_SYNC_ENTRYPOINT.get():
+            yield user_id, db
+            return
+        if ASYNC_DB_ENABLED:
+            async with AsyncSessionLocal() as session:
+                yield user_id, session
+            return
+        bind = db.get_bind()
+        if read_only and not isinstance(bind.pool, StaticPool):
+            with Session(bind=bind, autoflush=False) as session:
+                yield user_id, session
+            return
+        if read_only:
+            get_tool_gate_stats().record_shared_session_read()
+        async with gate.shared_session_lock:
+            yield user_id, db
+
+
 class CreateTaskArgs(BaseModel):
     title: str = Field(..., min_length=1, max_length=300)
     description: str | None = None
@@ -115,12 +225,14 @@ class CreateTaskArgs(BaseModel):
 
 
 @safe_tool(name="create_task", return_direct=True, args_schema=CreateTaskArgs)
-def create_task_tool(config: RunnableConfig | None = None, **kwargs) -> dict[str, Any]:
+async def create_task_tool(
+    config: RunnableConfig | None = None, **kwargs
+) -> dict[str, Any]:
     """Create a task with tenant context injected at graph execution time."""
-    user_id, db = _resolve_runtime(config)
     args = CreateTaskArgs(**kwargs)
     payload = args.model_dump(exclude_none=True)
-    return create_task_service(payload, user_id, db)
+    async with _tool_session(config, "create_task") as (user_id, db):
+        return await create_task_service_async(payload, user_id, db)
 
 
 class ListTasksArgs(BaseModel):
@@ -128,11 +240,11 @@ class ListTasksArgs(BaseModel):
 
 
 @safe_tool(name="list_tasks", return_direct=True, args_schema=ListTasksArgs)
-def list_tasks_tool(config: RunnableConfig | None = None, **kwargs) -> str:
+async def list_tasks_tool(config: RunnableConfig | None = None, **kwargs) -> str:
     """Read-only listing tool for agent use."""
-    user_id, db = _resolve_runtime(config)
     args = ListTasksArgs(**kwargs)
-    tasks = list_tasks_service(user_id, db)
+    async with _tool_session(config, "list_tasks") as (user_id, db):
+        tasks = await list_tasks_service_async(user_id, db)
 
     lines: list[str] = []
     limit = args.limit or 10
@@ -154,11 +266,11 @@ class GetTaskDetailsArgs(BaseModel):
 
 
 @safe_tool(name="get_task_details", return_direct=True, args_schema=GetTaskDetailsArgs)
-def get_task_details_tool(config: RunnableConfig | None = None, **kwargs) -> str:
+async def get_task_details_tool(config: RunnableConfig | None = None, **kwargs) -> str:
     """Get details for a specific task, including description and subtasks."""
-    user_id, db = _resolve_runtime(config)
     args = GetTaskDetailsArgs(**kwargs)
-    task = get_task_service(args.task_id, user_id, db)
+    async with _tool_session(config, "get_task_details") as (user_id, db):
+        task = await get_task_service_async(args.task_id, user_id, db)
 
     if not task:
         return "Task not found."
@@ -190,23 +302,27 @@ class RecallArgs(BaseModel):
 
 
 @safe_tool(name="recall_memory", return_direct=True, args_schema=RecallArgs)
-def recall_memory_tool(config: RunnableConfig | None = None, **kwargs) -> str:
+async def recall_memory_tool(config: RunnableConfig | None = None, **kwargs) -> str:
     """Recall relevant long-term memories using vector search."""
-    user_id, db = _resolve_runtime(config)
     args = RecallArgs(**kwargs)
 
+    # Embed before taking the session so other tools can use it meanwhile
     try:
-        vec = get_embedding(args.query)
+        vec = await get_embedding_provider().aembed(args.query)
     except Exception as e:
         return f"Error generating embedding: {e}"
 
-    matches = search_memories(
-        db,
-        user_id,
-        vec,
-        limit=args.limit or 3,
-        query_text=args.query,
-    )
+    async with _tool_session(config, "recall_memory") as (user_id, db):
+        matches = await run_in_session(
+            db,
+            lambda s: search_memories(
+                s,
+                user_id,
+                vec,
+                limit=args.limit or 3,
+                query_text=args.query,
+            ),
+        )
 
     if not matches:
         return "No memories found."
@@ -231,13 +347,17 @@ class AnalyzeProductivityArgs(BaseModel):
     return_direct=True,
     args_schema=AnalyzeProductivityArgs,
 )
-def analyze_productivity_tool(config: RunnableConfig | None = None, **kwargs) -> str:
+async def analyze_productivity_tool(
+    config: RunnableConfig | None = None, **kwargs
+) -> str:
     """Return compact weekly productivity aggregates for the active user."""
-    user_id, db = _resolve_runtime(config)
     args = AnalyzeProductivityArgs(**kwargs)
     _ = args.days
 
-    summary = analyze_weekly_productivity_service(db, user_id)
+    async with _tool_session(config, "analyze_productivity") as (user_id, db):
+        summary = await run_in_session(
+            db, lambda s: analyze_weekly_productivity_service(s, user_id)
+        )
     return (
         "tasks_completed={tasks_completed} "
         "tasks_pending={tasks_pending} "
@@ -254,12 +374,14 @@ class CreateHabitArgs(BaseModel):
 
 
 @safe_tool(name="create_habit", return_direct=True, args_schema=CreateHabitArgs)
-def create_habit_tool(config: RunnableConfig | None = None, **kwargs) -> dict[str, Any]:
+async def create_habit_tool(
+    config: RunnableConfig | None = None, **kwargs
+) -> dict[str, Any]:
     """Create a new habit tracker."""
-    user_id, db = _resolve_runtime(config)
     args = CreateHabitArgs(**kwargs)
     payload = args.model_dump(exclude_none=True)
-    return create_habit_service(payload, user_id, db)
+    async with _tool_session(config, "create_habit") as (user_id, db):
+        return await create_habit_service_async(payload, user_id, db)
 
 
 class TrackHabitArgs(BaseModel):
@@ -269,31 +391,33 @@ class TrackHabitArgs(BaseModel):
 
 
 @safe_tool(name="track_habit", return_direct=True, args_schema=TrackHabitArgs)
-def track_habit_tool(config: RunnableConfig | None = None, **kwargs) -> str:
+async def track_habit_tool(config: RunnableConfig | None = None, **kwargs) -> str:
     """Log progress for a habit. If a name is provided, it resolves to an id."""
-    user_id, db = _resolve_runtime(config)
     args = TrackHabitArgs(**kwargs)
-    habits = list_habits_service(user_id, db)
-
-    target_habit = None
-    for h in habits:
-        if (
-            h["id"] == args.habit_name_or_id
-            or h["name"].lower() == args.habit_name_or_id.lower()
-        ):
-            target_habit = h
-            break
-
-    if not target_habit:
-        return "Habit not found."
-
-    payload: dict[str, int | None] = {}
-    if args.count is not None:
-        payload["count"] = args.count
-    else:
-        payload["delta"] = args.delta
-
-    res = update_habit_count_service(target_habit["id"], payload, user_id, db)
+    async with _tool_session(config, "track_habit") as (user_id, db):
+        habits = await list_habits_service_async(user_id, db)
+
+        target_habit = None
+        for h in habits:
+            if (
+                h["id"] == args.habit_name_or_id
+                or h["name"].lower() == args.habit_name_or_id.lower()
+            ):
+                target_habit = h
+                break
+
+        if not target_habit:
+            return "Habit not found."
+
+        payload: dict[str, int | None] = {}
+        if args.count is not None:
+            payload["count"] = args.count
+        else:
+            payload["delta"] = args.delta
+
+        res = await update_habit_count_service_async(
+            target_habit["id"], payload, user_id, db
+        )
     if res:
         return (
             f"Tracked habit '{target_habit['name']}'. "
@@ -315,23 +439,25 @@ def _status_to_completed(value: bool | str) -> bool:
 
 
 @safe_tool(name="log_habit", return_direct=True, args_schema=LogHabitArgs)
-def log_habit_tool(config: RunnableConfig | None = None, **kwargs) -> str:
+async def log_habit_tool(config: RunnableConfig | None = None, **kwargs) -> str:
     """Log today's completion status for a habit by habit name."""
-    user_id, db = _resolve_runtime(config)
     args = LogHabitArgs(**kwargs)
-    habits = list_habits_service(user_id, db)
-
-    target_habit = next(
-        (h for h in habits if h.get("name", "").lower() == args.habit_name.lower()),
-        None,
-    )
-    if not target_habit:
-        return f"Habit '{args.habit_name}' not found."
-
-    completed = _status_to_completed(args.status)
-    target = int(target_habit.get("target") or 1)
-    payload = {"count": target if completed else 0}
-    updated = update_habit_count_service(target_habit["id"], payload, user_id, db)
+    async with _tool_session(config, "log_habit") as (user_id, db):
+        habits = await list_habits_service_async(user_id, db)
+
+        target_habit = next(
+            (h for h in habits if h.get("name", "").lower() == args.habit_name.lower()),
+            None,
+        )
+        if not target_habit:
+            return f"Habit '{args.habit_name}' not found."
+
+        completed = _status_to_completed(args.status)
+        target = int(target_habit.get("target") or 1)
+        payload = {"count": target if completed else 0}
+        updated = await update_habit_count_service_async(
+            target_habit["id"], payload, user_id, db
+        )
     if not updated:
         return f"Could not log habit '{target_habit['name']}'."
 
@@ -347,14 +473,14 @@ class CreateJournalArgs(BaseModel):
 
 
 @safe_tool(name="create_journal", return_direct=True, args_schema=CreateJournalArgs)
-def create_journal_tool(
+async def create_journal_tool(
     config: RunnableConfig | None = None, **kwargs
 ) -> dict[str, Any]:
     """Create a new journal entry."""
-    user_id, db = _resolve_runtime(config)
     args = CreateJournalArgs(**kwargs)
     payload = args.model_dump(exclude_none=True)
-    return create_entry_service(payload, user_id, db)
+    async with _tool_session(config, "create_journal") as (user_id, db):
+        return await create_entry_service_async(payload, user_id, db)
 
 
 class LogJournalArgs(BaseModel):
@@ -363,9 +489,8 @@ class LogJournalArgs(BaseModel):
 
 
 @safe_tool(name="log_journal", return_direct=True, args_schema=LogJournalArgs)
-def log_journal_tool(config: RunnableConfig | None = None, **kwargs) -> str:
+async def log_journal_tool(config: RunnableConfig | None = None, **kwargs) -> str:
     """Create a journal entry from free-text content and optional tags."""
-    user_id, db = _resolve_runtime(config)
     args = LogJournalArgs(**kwargs)
     payload: dict[str, Any] = {
         "content": args.content,
@@ -374,7 +499,8 @@ def log_journal_tool(config: RunnableConfig | None = None, **kwargs) -> str:
     if args.tags:
         payload["tags"] = args.tags
 
-    created = create_entry_service(payload, user_id, db)
+    async with _tool_session(config, "log_journal") as (user_id, db):
+        created = await create_entry_service_async(payload, user_id, db)
     entry_id = created.get("id")
     if entry_id:
         return f"Journal entry saved ({entry_id})."
@@ -387,12 +513,12 @@ class StartFocusArgs(BaseModel):
 
 
 @safe_tool(name="start_focus", return_direct=True, args_schema=StartFocusArgs)
-def start_focus_tool(config: RunnableConfig | None = None, **kwargs) -> str:
+async def start_focus_tool(config: RunnableConfig | None = None, **kwargs) -> str:
     """Start a Pomodoro focus session."""
-    user_id, db = _resolve_runtime(config)
     args = StartFocusArgs(**kwargs)
     payload = args.model_dump(exclude_none=True)
-    created = create_session_service(payload, user_id, db)
+    async with _tool_session(config, "start_focus") as (user_id, db):
+        created = await create_session_service_async(payload, user_id, db)
     duration = int(created.get("duration_minutes") or args.duration_minutes or 25)
     return f"Started a {duration}-minute focus session."
 
@@ -409,27 +535,27 @@ class CreatePlanArgs(BaseModel):
 
 
 @safe_tool(name="create_plan", args_schema=CreatePlanArgs)
-def create_plan_tool(config: RunnableConfig | None = None, **kwargs) -> str:
+async def create_plan_tool(config: RunnableConfig | None = None, **kwargs) -> str:
     """Create multiple tasks at once and optionally add a plan summary journal entry."""
-    user_id, db = _resolve_runtime(config)
     args = CreatePlanArgs(**kwargs)
     created_count = 0
 
-    for item in args.tasks:
-        payload = item.model_dump(exclude_none=True)
-        create_task_service(payload, user_id, db)
-        created_count += 1
-
-    if args.journal_summary:
-        create_entry_service(
-            {
-                "content": args.journal_summary,
-                "title": "Plan Created",
-                "type": "text",
-                "tags": ["plan"],
-            },
-            user_id,
-            db,
-        )
+    async with _tool_session(config, "create_plan") as (user_id, db):
+        for item in args.tasks:
+            payload = item.model_dump(exclude_none=True)
+            await create_task_service_async(payload, user_id, db)
+            created_count += 1
+
+        if args.journal_summary:
+            await create_entry_service_async(
+                {
+                    "content": args.journal_summary,
+                    "title": "Plan Created",
+                    "type": "text",
+                    "tags": ["plan"],
+                },
+                user_id,
+                db,
+            )
 
     return f"Successfully created {created_count} tasks based on the plan."
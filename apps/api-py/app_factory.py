@@ -1,12 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
 import sys
 import uuid
 from contextlib import asynccontextmanager
-from contextvars import ContextVar
 from typing import Any, cast
 
 from dotenv import load_dotenv
@@ -36,8 +36,13 @@ from routers import (
 )
 from routers.audio_pipeline import router as audio_pipeline_router
 from routers.system import router as system_router
+from services.embedding_cache import prune_embedding_cache, shutdown_embedding_cache
 from services.idempotency import prune_old_keys
-from storage.database import SessionLocal, init_db
+from services.provider_clients import get_provider_clients
+from services.stt_batcher import shutdown_stt_batcher
+from services.vad import warn_if_vad_cannot_decode
+from storage.database import SessionLocal, dispose_async_engine, init_db
+from utils.request_context import request_id_ctx
 
 load_dotenv()
 
@@ -50,7 +55,6 @@ if sys.stderr.encoding != "utf-8":
     if callable(_reconf):
         _reconf(encoding="utf-8")
 
-request_id_ctx: ContextVar[str] = ContextVar("request_id", default="-")
 REQUEST_ID_HEADER = "x-request-id"
 
 
@@ -91,9 +95,13 @@ async def lifespan(app: FastAPI):
         with SessionLocal() as db:
             deleted = prune_old_keys(db)
             logging.info("Pruned %s old idempotency keys", deleted)
+            pruned = prune_embedding_cache(db)
+            logging.info("Pruned %s embedding cache rows", pruned)
     except Exception:
         logging.exception("Database initialization failed")
 
+    warn_if_vad_cannot_decode()
+
     if os.getenv("PRELOAD_STT", "false").lower() == "true":
         from services.ai_clients import ensure_stt_loaded
 
@@ -105,10 +113,22 @@ async def lifespan(app: FastAPI):
                 "are unavailable: %s",
                 exc,
             )
+
+    if os.getenv("PRELOAD_EMBEDDINGS", "false").lower() == "true":
+        from services.embeddings import get_embedding_provider
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, get_embedding_provider().warmup)
+
+    provider_clients = get_provider_clients()
+    await provider_clients.start()
     try:
         yield
     finally:
-        pass
+        await provider_clients.aclose()
+        await shutdown_stt_batcher()
+        shutdown_embedding_cache()
+        await dispose_async_engine()
 
 
 def _normalize_request_id(value: str | None) -> str:
@@ -0,0 +1,86 @@
+"""add habit streak counters
+
+Revision ID: b5e2c7d9a1f3
+Revises: 9ad8cd9dc578
+Create Date: 2026-10-16 10:00:00.000000
+
+Existing habits are backfilled from their completed habit_entries in the
+same upgrade, so streaks are correct as soon as the migration runs.
+``scripts/backfill_habit_streaks.py`` remains available to repair drift.
+"""
+
+from collections.abc import Sequence
+from datetime import date
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b5e2c7d9a1f3"
+down_revision: str | Sequence[str] | None = "9ad8cd9dc578"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "habits",
+        sa.Column("current_streak", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "habits",
+        sa.Column("best_streak", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "habits",
+        sa.Column("last_completed_date", sa.String(length=10), nullable=True),
+    )
+    _backfill_streaks()
+
+
+def _backfill_streaks() -> None:
+    # Self-contained (no app imports) so the migration stays stable as the
+    # models evolve; mirrors services.habits.backfill_habit_streaks.
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text(
+            "SELECT habit_id, date FROM habit_entries "
+            "WHERE completed = :done ORDER BY habit_id, date"
+        ),
+        {"done": True},
+    )
+    days: dict[str, set[date]] = {}
+    for habit_id, day in rows:
+        try:
+            days.setdefault(habit_id, set()).add(date.fromisoformat(str(day)))
+        except ValueError:
+            continue
+    updates = []
+    for habit_id, completed in days.items():
+        ordered = sorted(completed)
+        run = best = 1
+        for prev, curr in zip(ordered, ordered[1:], strict=False):
+            run = run + 1 if curr.toordinal() == prev.toordinal() + 1 else 1
+            best = max(best, run)
+        updates.append(
+            {
+                "id": habit_id,
+                "current": run,
+                "best": best,
+                "last": ordered[-1].isoformat(),
+            }
+        )
+    if updates:
+        bind.execute(
+            sa.text(
+                "UPDATE habits SET current_streak = :current, best_streak = :best, "
+                "last_completed_date = :last WHERE id = :id"
+            ),
+            updates,
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("habits", "last_completed_date")
+    op.drop_column("habits", "best_streak")
+    op.drop_column("habits", "current_streak")
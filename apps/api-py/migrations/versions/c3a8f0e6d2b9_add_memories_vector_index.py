@@ -0,0 +1,66 @@
+"""add memories vector index
+
+Revision ID: c3a8f0e6d2b9
+Revises: b5e2c7d9a1f3
+Create Date: 2026-10-16 12:00:00.000000
+
+Adds an approximate-nearest-neighbor index on memories.embedding (HNSW by
+default, IVFFlat with MEMORY_VECTOR_INDEX=ivfflat) plus a (user_id,
+created_at) index for per-user filtering and recency scans. Indexes are
+built CONCURRENTLY so the table stays writable. Postgres only.
+
+Build-time knobs (read when the migration runs):
+    MEMORY_VECTOR_INDEX=hnsw|ivfflat
+    MEMORY_HNSW_M=16
+    MEMORY_HNSW_EF_CONSTRUCTION=64
+    MEMORY_IVFFLAT_LISTS=100  (~rows/1000 up to 1M rows, sqrt(rows) beyond)
+"""
+
+import os
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3a8f0e6d2b9"
+down_revision: str | Sequence[str] | None = "b5e2c7d9a1f3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _ann_index_sql() -> str:
+    method = os.getenv("MEMORY_VECTOR_INDEX", "hnsw").strip().lower()
+    if method == "ivfflat":
+        lists = int(os.getenv("MEMORY_IVFFLAT_LISTS", "100"))
+        options = f"lists = {lists}"
+    else:
+        method = "hnsw"
+        m = int(os.getenv("MEMORY_HNSW_M", "16"))
+        ef_construction = int(os.getenv("MEMORY_HNSW_EF_CONSTRUCTION", "64"))
+        options = f"m = {m}, ef_construction = {ef_construction}"
+    return (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_memories_embedding_ann "
+        f"ON memories USING {method} (embedding vector_cosine_ops) "
+        f"WITH ({options})"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+            "ix_memories_user_id_created_at ON memories (user_id, created_at)"
+        )
+        op.execute(_ann_index_sql())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_memories_embedding_ann")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_memories_user_id_created_at")
@@ -5,22 +5,44 @@ import logging
 from collections.abc import AsyncGenerator
 from typing import Any, cast
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from starlette.responses import StreamingResponse
 
 from routers.auth import get_optional_user
-from services.agent_service import run_agent_pipeline
+from services.agent_service import _end_events, run_agent_pipeline
+from services.audio_upload import receive_audio_upload
+from services.provider_router import ProviderBusyError
 from storage.database import get_db
+from utils.timing import TurnTimer, timing_requested
 
 router = APIRouter()
 
-
-@router.post("/api/v1/process-audio")
+# The body is parsed by receive_audio_upload (streamed, size-limited), so the
+# multipart schema is declared here instead of through a File() parameter.
+_AUDIO_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["audio_file"],
+                    "properties": {
+                        "audio_file": {"type": "string", "format": "binary"}
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@router.post("/api/v1/process-audio", openapi_extra=_AUDIO_UPLOAD_BODY)
 async def process_audio_pipeline(
     request: Request,
-    audio_file: UploadFile = File(...),
     mode: str = Query("chat", description="chat (default) or agent"),
+    timing: str | None = Query(None, description="1 to end with a timing event"),
     current_user: dict | None = Depends(get_optional_user),
     db: Session = Depends(get_db),
 ):
@@ -29,10 +51,12 @@ async def process_audio_pipeline(
     Protocol:
       {"type": "thought", "content": "..."}
       {"type": "tool_use", "tool": "...", "input": "..."}
+      {"type": "response_delta", "content": "..."}  (chat mode, incremental)
       {"type": "response", "content": "..."}
       {"type": "error", "content": "..."}
+      {"type": "timing", "spans": {...}, ...}  (with ?timing=1)
     """
-    from services.ai_clients import _get_llm_response, _get_transcription
+    from services.ai_clients import _get_transcription, _stream_llm_response
 
     mode_norm = (mode or "chat").strip().lower()
     if mode_norm not in {"chat", "agent"}:
@@ -48,12 +72,16 @@ async def process_audio_pipeline(
         user = cast(dict[str, Any], current_user)
         user_id = str(user["id"])
 
-    audio_bytes = await audio_file.read()
+    timer = TurnTimer(emit=timing_requested(timing))
+    audio_file = await receive_audio_upload(request)
     try:
-        transcribed_text = await _get_transcription(audio_bytes)
+        with timer.span("stt"):
+            transcribed_text = await _get_transcription(audio_file.file)
     except HTTPException as exc:
         logging.warning("STT failure treated as empty transcript: %s", exc.detail)
         transcribed_text = ""
+    finally:
+        await audio_file.close()
 
     if not transcribed_text or not transcribed_text.strip():
 
@@ -62,7 +90,8 @@ async def process_audio_pipeline(
                 json.dumps({"type": "response", "content": "I didn't catch that."})
                 + "\n"
             ).encode()
-            yield (json.dumps({"type": "end", "content": "done"}) + "\n").encode()
+            for line in _end_events(timer):
+                yield line
 
         return StreamingResponse(empty_stream(), media_type="application/x-ndjson")
 
@@ -84,43 +113,48 @@ async def process_audio_pipeline(
                         + "\n"
                     ).encode()
 
-                llm_result = await _get_llm_response(transcribed_text)
-                assistant_text = None
-                if isinstance(llm_result, dict):
-                    choices = llm_result.get("choices")
-                    if (
-                        isinstance(choices, list)
-                        and len(choices) > 0
-                        and isinstance(choices[0], dict)
-                    ):
-                        message = choices[0].get("message")
-                        if isinstance(message, dict):
-                            assistant_text = message.get("content")
-                if not assistant_text:
-                    assistant_text = (
-                        llm_result.get("reply")
-                        or llm_result.get("output")
-                        or llm_result.get("text")
-                    )
-                if not assistant_text:
-                    assistant_text = str(llm_result)
+                response_parts: list[str] = []
+                with timer.span("llm"):
+                    async for delta in _stream_llm_response(transcribed_text):
+                        timer.mark("llm_first_token")
+                        response_parts.append(delta)
+                        yield (
+                            json.dumps({"type": "response_delta", "content": delta})
+                            + "\n"
+                        ).encode()
                 yield (
-                    json.dumps({"type": "response", "content": assistant_text}) + "\n"
+                    json.dumps({"type": "response", "content": "".join(response_parts)})
+                    + "\n"
                 ).encode()
-                yield (json.dumps({"type": "end", "content": "done"}) + "\n").encode()
+                for line in _end_events(timer):
+                    yield line
                 return
 
             assert user_id is not None
-            async for chunk in run_agent_pipeline(transcribed_text, user_id, db):
+            async for chunk in run_agent_pipeline(
+                transcribed_text, user_id, db, timer=timer
+            ):
                 if await request.is_disconnected():
                     break
                 yield chunk
+        except ProviderBusyError as exc:
+            logging.warning("LLM overloaded: %s", exc.detail)
+            retry_after = int((exc.headers or {}).get("Retry-After", "1"))
+            yield (
+                json.dumps(
+                    {"type": "error", "content": exc.detail, "retry_after": retry_after}
+                )
+                + "\n"
+            ).encode()
+            for line in _end_events(timer):
+                yield line
         except Exception:
             logging.exception("Error in event stream")
             yield (
                 json.dumps({"type": "error", "content": "Something went wrong."}) + "\n"
             ).encode()
-            yield (json.dumps({"type": "end", "content": "done"}) + "\n").encode()
+            for line in _end_events(timer):
+                yield line
         return
 
     return StreamingResponse(event_stream(), media_type="application/x-ndjson")
@@ -1,21 +1,22 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Header, status
+from fastapi import APIRouter, Depends, Header, Query, status
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from routers.auth import get_current_user
-from routers.resource_access import raise_owned_resource_error
+from routers.resource_access import raise_owned_resource_error_async
 from routers.response_models import HabitResponse
 from services.habits import (
-    create_habit_service,
-    delete_habit_service,
-    get_habit_service,
-    list_habits_service,
-    update_habit_count_service,
-    update_habit_service,
+    create_habit_service_async,
+    delete_habit_service_async,
+    get_habit_service_async,
+    list_habits_service_async,
+    update_habit_count_service_async,
+    update_habit_service_async,
 )
-from storage.database import get_db
+from storage.database import get_request_db
 from storage.models import Habit
 
 router = APIRouter(tags=["habits"])
@@ -46,19 +47,21 @@ class HabitCountUpdate(BaseModel):
 @router.get("", response_model=list[HabitResponse])
 async def list_habits(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
     limit: int | None = None,
     offset: int = 0,
     sort: str = "created_at",
     order: str = "desc",
+    history_days: int | None = Query(None, ge=1, le=3660),
 ):
-    return list_habits_service(
+    return await list_habits_service_async(
         current_user["id"],
         db,
         limit=limit,
         offset=offset,
         sort=sort,
         order=order,
+        history_days=history_days,
     )
 
 
@@ -66,14 +69,17 @@ async def list_habits(
 async def create_habit(
     payload: HabitCreate,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
     Idempotency_Key: str | None = Header(default=None, convert_underscores=False),
 ):
-    from services.idempotency import get_idempotent_response, save_idempotent_response
+    from services.idempotency import (
+        get_idempotent_response_async,
+        save_idempotent_response_async,
+    )
 
     data = payload.model_dump()
     if Idempotency_Key:
-        saved = get_idempotent_response(
+        saved = await get_idempotent_response_async(
             db,
             Idempotency_Key,
             current_user.get("id"),
@@ -83,10 +89,10 @@ async def create_habit(
         if saved:
             return saved["response"]
 
-    created = create_habit_service(data, current_user["id"], db)
+    created = await create_habit_service_async(data, current_user["id"], db)
 
     if Idempotency_Key:
-        save_idempotent_response(
+        await save_idempotent_response_async(
             db,
             Idempotency_Key,
             current_user.get("id"),
@@ -103,11 +109,14 @@ async def create_habit(
 async def get_habit(
     habit_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
+    history_days: int | None = Query(None, ge=1, le=3660),
 ):
-    habit = get_habit_service(habit_id, current_user["id"], db)
+    habit = await get_habit_service_async(
+        habit_id, current_user["id"], db, history_days=history_days
+    )
     if not habit:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             Habit,
             habit_id,
@@ -123,13 +132,18 @@ async def update_habit(
     habit_id: str,
     patch: HabitUpdate,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
+    history_days: int | None = Query(None, ge=1, le=3660),
 ):
-    updated = update_habit_service(
-        habit_id, patch.model_dump(exclude_unset=True), current_user["id"], db
+    updated = await update_habit_service_async(
+        habit_id,
+        patch.model_dump(exclude_unset=True),
+        current_user["id"],
+        db,
+        history_days=history_days,
     )
     if not updated:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             Habit,
             habit_id,
@@ -144,11 +158,11 @@ async def update_habit(
 async def delete_habit(
     habit_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    ok = delete_habit_service(habit_id, current_user["id"], db)
+    ok = await delete_habit_service_async(habit_id, current_user["id"], db)
     if not ok:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             Habit,
             habit_id,
@@ -164,13 +178,18 @@ async def update_habit_count(
     habit_id: str,
     payload: HabitCountUpdate,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
+    history_days: int | None = Query(None, ge=1, le=3660),
 ):
-    updated = update_habit_count_service(
-        habit_id, payload.model_dump(exclude_unset=True), current_user["id"], db
+    updated = await update_habit_count_service_async(
+        habit_id,
+        payload.model_dump(exclude_unset=True),
+        current_user["id"],
+        db,
+        history_days=history_days,
     )
     if not updated:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             Habit,
             habit_id,
@@ -4,21 +4,22 @@ from typing import Literal
 
 from fastapi import APIRouter, Depends, Header, HTTPException, status
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from routers.auth import get_current_user
-from routers.resource_access import raise_owned_resource_error
+from routers.resource_access import raise_owned_resource_error_async
 from routers.response_models import JournalEntryResponse, JournalSummaryResponse
 from services.journal import (
-    create_entry_service,
-    delete_entry_service,
+    create_entry_service_async,
+    delete_entry_service_async,
     entry_to_dict,
-    generate_summary_service,
-    get_entry_service,
-    list_entries_service,
-    update_entry_service,
+    generate_summary_service_async,
+    get_entry_service_async,
+    list_entries_service_async,
+    update_entry_service_async,
 )
-from storage.database import get_db
+from storage.database import get_request_db, run_in_session
 from storage.models import JournalEntry
 
 router = APIRouter(tags=["journal"])
@@ -46,13 +47,13 @@ class JournalEntryUpdate(BaseModel):
 @router.get("", response_model=list[JournalEntryResponse])
 async def list_entries(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
     limit: int | None = None,
     offset: int = 0,
     sort: str = "created_at",
     order: str = "desc",
 ):
-    return list_entries_service(
+    return await list_entries_service_async(
         current_user["id"],
         db,
         limit=limit,
@@ -71,14 +72,17 @@ async def create_entry(
     payload: JournalEntryCreate,
     current_user: dict = Depends(get_current_user),
     Idempotency_Key: str | None = Header(default=None, convert_underscores=False),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
     entry_data = payload.model_dump()
     entry_data["userId"] = current_user["id"]
-    from services.idempotency import get_idempotent_response, save_idempotent_response
+    from services.idempotency import (
+        get_idempotent_response_async,
+        save_idempotent_response_async,
+    )
 
     if Idempotency_Key:
-        saved = get_idempotent_response(
+        saved = await get_idempotent_response_async(
             db,
             Idempotency_Key,
             current_user.get("id"),
@@ -88,10 +92,10 @@ async def create_entry(
         if saved:
             return saved["response"]
 
-    created = create_entry_service(entry_data, current_user["id"], db)
+    created = await create_entry_service_async(entry_data, current_user["id"], db)
 
     if Idempotency_Key:
-        save_idempotent_response(
+        await save_idempotent_response_async(
             db,
             Idempotency_Key,
             current_user.get("id"),
@@ -107,14 +111,17 @@ async def create_entry(
 @router.get("/briefing", response_model=JournalEntryResponse)
 async def get_latest_briefing(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    entries = (
-        db.query(JournalEntry)
-        .filter(JournalEntry.user_id == current_user["id"])
-        .order_by(JournalEntry.created_at.desc())
-        .limit(100)
-        .all()
+    entries = await run_in_session(
+        db,
+        lambda s: (
+            s.query(JournalEntry)
+            .filter(JournalEntry.user_id == current_user["id"])
+            .order_by(JournalEntry.created_at.desc())
+            .limit(100)
+            .all()
+        ),
     )
 
     for entry in entries:
@@ -139,11 +146,11 @@ async def get_latest_briefing(
 async def get_entry(
     entry_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    entry = get_entry_service(entry_id, current_user["id"], db)
+    entry = await get_entry_service_async(entry_id, current_user["id"], db)
     if not entry:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             JournalEntry,
             entry_id,
@@ -159,13 +166,13 @@ async def update_entry(
     entry_id: str,
     patch: JournalEntryUpdate,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    updated = update_entry_service(
+    updated = await update_entry_service_async(
         entry_id, patch.model_dump(exclude_unset=True), current_user["id"], db
     )
     if not updated:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             JournalEntry,
             entry_id,
@@ -180,11 +187,11 @@ async def update_entry(
 async def delete_entry(
     entry_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    ok = delete_entry_service(entry_id, current_user["id"], db)
+    ok = await delete_entry_service_async(entry_id, current_user["id"], db)
     if not ok:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             JournalEntry,
             entry_id,
@@ -199,11 +206,11 @@ async def delete_entry(
 async def generate_summary(
     entry_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    result = generate_summary_service(entry_id, current_user["id"], db)
+    result = await generate_summary_service_async(entry_id, current_user["id"], db)
     if result is None:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             JournalEntry,
             entry_id,
@@ -4,19 +4,20 @@ from datetime import datetime
 
 from fastapi import APIRouter, Depends, Header, status
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from routers.auth import get_current_user
-from routers.resource_access import raise_owned_resource_error
+from routers.resource_access import raise_owned_resource_error_async
 from routers.response_models import PomodoroSessionResponse
 from services.pomodoro import (
-    create_session_service,
-    delete_session_service,
-    get_session_service,
-    list_sessions_service,
-    update_session_service,
+    create_session_service_async,
+    delete_session_service_async,
+    get_session_service_async,
+    list_sessions_service_async,
+    update_session_service_async,
 )
-from storage.database import get_db
+from storage.database import get_request_db
 from storage.models import PomodoroSession
 
 router = APIRouter(tags=["pomodoro"])
@@ -38,13 +39,13 @@ class PomodoroUpdate(BaseModel):
 @router.get("", response_model=list[PomodoroSessionResponse])
 async def list_sessions(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
     limit: int | None = None,
     offset: int = 0,
     sort: str = "created_at",
     order: str = "desc",
 ):
-    return list_sessions_service(
+    return await list_sessions_service_async(
         current_user["id"],
         db,
         limit=limit,
@@ -62,14 +63,17 @@ async def list_sessions(
 async def create_session(
     payload: PomodoroCreate,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
     Idempotency_Key: str | None = Header(default=None, convert_underscores=False),
 ):
-    from services.idempotency import get_idempotent_response, save_idempotent_response
+    from services.idempotency import (
+        get_idempotent_response_async,
+        save_idempotent_response_async,
+    )
 
     data = payload.model_dump()
     if Idempotency_Key:
-        saved = get_idempotent_response(
+        saved = await get_idempotent_response_async(
             db,
             Idempotency_Key,
             current_user.get("id"),
@@ -79,10 +83,10 @@ async def create_session(
         if saved:
             return saved["response"]
 
-    created = create_session_service(data, current_user["id"], db)
+    created = await create_session_service_async(data, current_user["id"], db)
 
     if Idempotency_Key:
-        save_idempotent_response(
+        await save_idempotent_response_async(
             db,
             Idempotency_Key,
             current_user.get("id"),
@@ -99,11 +103,11 @@ async def create_session(
 async def get_session(
     session_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    session = get_session_service(session_id, current_user["id"], db)
+    session = await get_session_service_async(session_id, current_user["id"], db)
     if not session:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             PomodoroSession,
             session_id,
@@ -119,13 +123,13 @@ async def update_session(
     session_id: str,
     patch: PomodoroUpdate,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    updated = update_session_service(
+    updated = await update_session_service_async(
         session_id, patch.model_dump(exclude_unset=True), current_user["id"], db
     )
     if not updated:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             PomodoroSession,
             session_id,
@@ -140,11 +144,11 @@ async def update_session(
 async def delete_session(
     session_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    ok = delete_session_service(session_id, current_user["id"], db)
+    ok = await delete_session_service_async(session_id, current_user["id"], db)
     if not ok:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             PomodoroSession,
             session_id,
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from collections.abc import Mapping
+import os
+import time
+from collections.abc import AsyncIterator, Callable, Mapping
+from contextlib import aclosing
 from typing import Any
 
 import jwt
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
 
 from agent import graph as agent_graph
@@ -18,15 +22,143 @@ from routers.auth import (
     normalize_guest_user_id,
 )
 from services.ai_clients import _get_transcription
+from services.conversation import get_conversation_store
+from services.fast_intents import (
+    FastIntent,
+    FastIntentUnresolved,
+    get_fast_intent_stats,
+    parse_fast_intent,
+    run_fast_intent,
+)
+from services.streaming_stt import StreamingSTTSession
+from services.vad import NoSpeechError
 from storage.database import SessionLocal
 from storage.models import User
+from utils.timing import (
+    ToolSpans,
+    TurnTimer,
+    begin_turn,
+    timed,
+    timing_requested,
+)
 
 router = APIRouter(tags=["realtime"])
 
+# Token streaming: buffered model chunks are flushed as one `response_delta`
+# frame once either threshold is crossed, so tiny chunks don't flood the socket.
+# The interval is also a deadline: text left pending when the model stalls
+# (e.g. before a tool call) is sent once the interval has passed.
+WS_STREAM_FLUSH_INTERVAL_MS = float(os.getenv("WS_STREAM_FLUSH_INTERVAL_MS", "50"))
+WS_STREAM_FLUSH_BYTES = int(os.getenv("WS_STREAM_FLUSH_BYTES", "64"))
+
+
+class _ChunkCoalescer:
+    """Accumulate streamed text and decide when a frame should be flushed."""
+
+    def __init__(
+        self,
+        flush_interval_ms: float | None = None,
+        flush_bytes: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if flush_interval_ms is None:
+            flush_interval_ms = WS_STREAM_FLUSH_INTERVAL_MS
+        if flush_bytes is None:
+            flush_bytes = WS_STREAM_FLUSH_BYTES
+        self._interval = max(0.0, flush_interval_ms) / 1000
+        self._flush_bytes = max(1, flush_bytes)
+        self._clock = clock
+        self._pending: list[str] = []
+        self._pending_bytes = 0
+        self._last_flush = clock()
+        self.parts: list[str] = []
+
+    def add(self, content: str) -> str | None:
+        """Buffer a chunk; return the coalesced text if it is time to flush."""
+        self._pending.append(content)
+        self._pending_bytes += len(content.encode("utf-8"))
+        self.parts.append(content)
+        if (
+            self._pending_bytes >= self._flush_bytes
+            or self._clock() - self._last_flush >= self._interval
+        ):
+            return self.flush()
+        return None
+
+    def seconds_until_flush(self) -> float | None:
+        """Time left before pending text is due, or None with nothing pending."""
+        if not self._pending:
+            return None
+        return max(0.0, self._interval - (self._clock() - self._last_flush))
+
+    def flush(self) -> str | None:
+        if not self._pending:
+            return None
+        text = "".join(self._pending)
+        self._pending.clear()
+        self._pending_bytes = 0
+        self._last_flush = self._clock()
+        return text
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+async def _events_with_flush_ticks(
+    events: AsyncIterator[Any], coalescer: _ChunkCoalescer
+) -> AsyncIterator[Any]:
+    """Yield ``events``, plus ``None`` whenever the coalescer's text is due.
+
+    The stream is consumed by one pump task, so waiting with a timeout never
+    cancels the agent's generator mid-step.
+    """
+    queue: asyncio.Queue[tuple[str, Any]] = asyncio.Queue(maxsize=1)
+
+    async def pump() -> None:
+        try:
+            async for event in events:
+                await queue.put(("event", event))
+        except Exception as exc:
+            await queue.put(("error", exc))
+        else:
+            await queue.put(("end", None))
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            try:
+                kind, payload = await asyncio.wait_for(
+                    queue.get(), coalescer.seconds_until_flush()
+                )
+            except TimeoutError:
+                yield None
+                continue
+            if kind == "end":
+                return
+            if kind == "error":
+                raise payload
+            yield payload
+    finally:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def _stream_chunk_text(chunk: Any) -> str:
+    """Text of an `on_chat_model_stream` chunk (message chunk object or dict)."""
+    content = chunk.get("content") if isinstance(chunk, dict) else None
+    if content is None:
+        content = getattr(chunk, "content", None)
+    return content if isinstance(content, str) else ""
+
 
 async def _safe_send_json(websocket: WebSocket, payload: dict[str, Any]) -> bool:
     try:
-        await websocket.send_json(payload)
+        with timed("serialize"):
+            await websocket.send_json(payload)
         return True
     except Exception:
         logging.exception("Failed to send websocket frame")
@@ -62,6 +194,37 @@ def _extract_auth_from_frame(frame_text: str) -> tuple[str | None, str | None]:
     return candidate, None
 
 
+_AUDIO_CONTROL_TYPES = {"audio_start", "audio_end"}
+
+
+def _parse_audio_control(frame: Mapping[str, Any]) -> dict[str, Any] | None:
+    """Return an ``audio_start``/``audio_end`` control message, if any."""
+    text = frame.get("text")
+    if not isinstance(text, str) or not text.lstrip().startswith("{"):
+        return None
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(parsed, dict) and parsed.get("type") in _AUDIO_CONTROL_TYPES:
+        return parsed
+    return None
+
+
+def _stream_sample_rate(control: Mapping[str, Any]) -> int | None:
+    """The ``sample_rate`` of an ``audio_start`` message, or None if invalid."""
+    value = control.get("sample_rate")
+    if value is None:
+        return 16000
+    if isinstance(value, bool):
+        return None
+    try:
+        rate = int(value)
+    except (TypeError, ValueError):
+        return None
+    return rate if 8000 <= rate <= 48000 else None
+
+
 def _extract_user_text_from_frame(frame: Mapping[str, Any]) -> str:
     text = frame.get("text")
     if isinstance(text, str) and text.strip():
@@ -74,6 +237,33 @@ def _extract_user_text_from_frame(frame: Mapping[str, Any]) -> str:
     raise ValueError("Expected non-empty text or audio bytes")
 
 
+async def _send_fast_intent_frames(
+    websocket: WebSocket, intent: FastIntent, reply: str, timer: TurnTimer
+) -> bool:
+    """Send the frames an agent turn that used ``intent.tool`` would send."""
+    for payload in (
+        {"type": "thought", "content": f"Using tool: {intent.tool}"},
+        {
+            "type": "tool_use",
+            "tool": intent.tool,
+            "input": json.dumps(intent.args)[:400],
+        },
+        {"type": "response_delta", "content": reply},
+        {"type": "response", "content": reply},
+    ):
+        if not await _safe_send_json(websocket, payload):
+            return False
+    return await _send_turn_end(websocket, timer)
+
+
+async def _send_turn_end(websocket: WebSocket, timer: TurnTimer) -> bool:
+    """Close a turn: the optional ``timing`` frame, then ``response_end``."""
+    event = timer.finish()
+    if timer.emit and not await _safe_send_json(websocket, event):
+        return False
+    return await _safe_send_json(websocket, {"type": "response_end", "content": "done"})
+
+
 async def _resolve_ws_user(websocket: WebSocket, db: Session) -> str:
     forwarded_user_id = (websocket.headers.get("x-user-id") or "").strip()
     if forwarded_user_id:
@@ -124,6 +314,9 @@ async def _resolve_ws_user(websocket: WebSocket, db: Session) -> str:
 async def chat_websocket(websocket: WebSocket):
     await websocket.accept()
 
+    audio_stream: StreamingSTTSession | None = None
+    # Opt-in per-turn timing frames: /ws/v1/chat?timing=1
+    emit_timing = timing_requested(websocket.query_params.get("timing"))
     with SessionLocal() as db:
         try:
             user_id = await _resolve_ws_user(websocket, db)
@@ -136,6 +329,11 @@ async def chat_websocket(websocket: WebSocket):
             ):
                 return
 
+            async def send_partial(text: str) -> None:
+                await _safe_send_json(
+                    websocket, {"type": "partial_transcript", "content": text}
+                )
+
             while True:
                 frame = await websocket.receive()
                 msg_type = frame.get("type")
@@ -143,9 +341,71 @@ async def chat_websocket(websocket: WebSocket):
                     break
 
                 user_text = ""
+                timer = begin_turn(emit=emit_timing)
                 audio_bytes = frame.get("bytes")
+                control = _parse_audio_control(frame)
+
+                if control is not None and control["type"] == "audio_start":
+                    if audio_stream is not None:
+                        await audio_stream.aclose()
+                        audio_stream = None
+                    sample_rate = _stream_sample_rate(control)
+                    if sample_rate is None:
+                        await _safe_send_json(
+                            websocket,
+                            {
+                                "type": "error",
+                                "content": "Invalid sample_rate in audio_start.",
+                            },
+                        )
+                        continue
+                    audio_stream = StreamingSTTSession(
+                        send_partial,
+                        encoding=str(control.get("encoding") or "webm"),
+                        sample_rate=sample_rate,
+                    )
+                    continue
 
-                if isinstance(audio_bytes, (bytes, bytearray)) and len(audio_bytes) > 0:
+                if audio_stream is not None and isinstance(
+                    audio_bytes, (bytes, bytearray)
+                ):
+                    try:
+                        await audio_stream.feed(bytes(audio_bytes))
+                    except HTTPException as exc:
+                        await audio_stream.aclose()
+                        audio_stream = None
+                        await _safe_send_json(
+                            websocket, {"type": "error", "content": str(exc.detail)}
+                        )
+                    continue
+
+                if control is not None:  # audio_end
+                    if audio_stream is None:
+                        await _safe_send_json(
+                            websocket,
+                            {
+                                "type": "error",
+                                "content": "audio_end without audio_start",
+                            },
+                        )
+                        continue
+                    stream, audio_stream = audio_stream, None
+                    try:
+                        with timer.span("stt"):
+                            user_text = (await stream.finish()).strip()
+                    except NoSpeechError:
+                        await _safe_send_json(
+                            websocket,
+                            {"type": "error", "content": "No speech detected."},
+                        )
+                        continue
+                    if user_text and not await _safe_send_json(
+                        websocket, {"type": "transcript", "content": user_text}
+                    ):
+                        break
+                elif (
+                    isinstance(audio_bytes, (bytes, bytearray)) and len(audio_bytes) > 0
+                ):
                     if not await _safe_send_json(
                         websocket,
                         {
@@ -154,7 +414,16 @@ async def chat_websocket(websocket: WebSocket):
                         },
                     ):
                         break
-                    user_text = (await _get_transcription(bytes(audio_bytes))).strip()
+                    try:
+                        with timer.span("stt"):
+                            user_text = await _get_transcription(bytes(audio_bytes))
+                    except NoSpeechError:
+                        await _safe_send_json(
+                            websocket,
+                            {"type": "error", "content": "No speech detected."},
+                        )
+                        continue
+                    user_text = user_text.strip()
                 else:
                     user_text = _extract_user_text_from_frame(frame)
 
@@ -168,11 +437,34 @@ async def chat_websocket(websocket: WebSocket):
                     )
                     continue
 
+                intent = parse_fast_intent(user_text)
+                if intent is not None:
+                    try:
+                        _, reply = await run_fast_intent(intent, user_id, db)
+                    except FastIntentUnresolved:
+                        pass
+                    except Exception:
+                        logging.exception("Fast-path intent failed; using the agent")
+                    else:
+                        get_conversation_store().record_turn(
+                            user_id, user_text, reply, tools_used=[intent.tool]
+                        )
+                        if not await _send_fast_intent_frames(
+                            websocket, intent, reply, timer
+                        ):
+                            break
+                        continue
+
+                conversations = get_conversation_store()
                 input_payload = {
                     "messages": [
+                        *conversations.history(user_id),
                         {"role": "user", "content": user_text},
                     ]
                 }
+                tools_used: list[str] = []
+                tool_spans = ToolSpans()
+                context_ms_before = timer.spans.get("daily_context", 0.0)
 
                 if not getattr(agent_graph, "agent_app", None) or not hasattr(
                     agent_graph.agent_app, "astream_events"
@@ -186,21 +478,45 @@ async def chat_websocket(websocket: WebSocket):
                     )
                     continue
 
-                response_parts: list[str] = []
+                coalescer = _ChunkCoalescer()
+                stream_open = True
+                turn_started = time.perf_counter()
                 tx_ctx = db.begin_nested() if db.in_transaction() else db.begin()
                 agent_config = agent_graph.build_agent_runnable_config(user_id, db)
 
                 try:
-                    with tx_ctx:
-                        with set_agent_runtime_context(user_id, db):
-                            async for event in agent_graph.agent_app.astream_events(
+                    with tx_ctx, set_agent_runtime_context(user_id, db):
+                        stream = _events_with_flush_ticks(
+                            agent_graph.agent_app.astream_events(
                                 input_payload,
                                 config=agent_config,
                                 version="v1",
-                            ):
-                                kind = event.get("event") if event else None
+                            ),
+                            coalescer,
+                        )
+                        async with aclosing(stream) as events:
+                            async for event in events:
+                                if event is None:
+                                    pending = coalescer.flush()
+                                    if pending and not await _safe_send_json(
+                                        websocket,
+                                        {"type": "response_delta", "content": pending},
+                                    ):
+                                        stream_open = False
+                                        break
+                                    continue
+                                kind = event.get("event")
                                 if kind == "on_tool_start":
+                                    pending = coalescer.flush()
+                                    if pending and not await _safe_send_json(
+                                        websocket,
+                                        {"type": "response_delta", "content": pending},
+                                    ):
+                                        stream_open = False
+                                        break
                                     tool_name = str(event.get("name") or "tool")
+                                    tools_used.append(tool_name)
+                                    tool_spans.start(str(event.get("run_id")))
                                     tool_input = event.get("data", {}).get("input")
                                     if isinstance(tool_input, (dict, list)):
                                         tool_input = json.dumps(tool_input)
@@ -211,6 +527,7 @@ async def chat_websocket(websocket: WebSocket):
                                             "content": f"Using tool: {tool_name}",
                                         },
                                     ):
+                                        stream_open = False
                                         break
                                     if not await _safe_send_json(
                                         websocket,
@@ -220,16 +537,26 @@ async def chat_websocket(websocket: WebSocket):
                                             "input": str(tool_input)[:400],
                                         },
                                     ):
+                                        stream_open = False
                                         break
+                                elif kind == "on_tool_end":
+                                    tool_ms = tool_spans.end(str(event.get("run_id")))
+                                    if tool_ms:
+                                        timer.add("tools", tool_ms)
                                 elif kind == "on_chat_model_stream":
-                                    chunk = event.get("data", {}).get("chunk", {})
-                                    content = (
-                                        chunk.get("content")
-                                        if isinstance(chunk, dict)
-                                        else None
+                                    content = _stream_chunk_text(
+                                        event.get("data", {}).get("chunk")
                                     )
-                                    if isinstance(content, str) and content:
-                                        response_parts.append(content)
+                                    if not content:
+                                        continue
+                                    timer.mark("llm_first_token")
+                                    ready = coalescer.add(content)
+                                    if ready and not await _safe_send_json(
+                                        websocket,
+                                        {"type": "response_delta", "content": ready},
+                                    ):
+                                        stream_open = False
+                                        break
                 except Exception:
                     logging.exception("Unhandled exception during agent astream_events")
                     await _safe_send_json(
@@ -241,24 +568,29 @@ async def chat_websocket(websocket: WebSocket):
                     )
                     break
 
-                if response_parts:
-                    if not await _safe_send_json(
-                        websocket,
-                        {
-                            "type": "response",
-                            "content": "".join(response_parts),
-                        },
-                    ):
-                        break
-                else:
-                    if not await _safe_send_json(
-                        websocket,
-                        {
-                            "type": "response",
-                            "content": "",
-                        },
-                    ):
-                        break
+                if not stream_open:
+                    break
+                agent_ms = (time.perf_counter() - turn_started) * 1000
+                # Tool and daily-context time have spans of their own
+                context_ms = timer.spans.get("daily_context", 0.0) - context_ms_before
+                timer.add("llm", max(0.0, agent_ms - tool_spans.ms - context_ms))
+                get_fast_intent_stats().record_agent_turn(agent_ms)
+                conversations.record_turn(
+                    user_id, user_text, coalescer.text, tools_used=tools_used
+                )
+
+                pending = coalescer.flush()
+                if pending and not await _safe_send_json(
+                    websocket, {"type": "response_delta", "content": pending}
+                ):
+                    break
+                # The full `response` frame is kept for clients that ignore deltas.
+                if not await _safe_send_json(
+                    websocket, {"type": "response", "content": coalescer.text}
+                ):
+                    break
+                if not await _send_turn_end(websocket, timer):
+                    break
 
         except WebSocketDisconnect:
             logging.info("WebSocket disconnected")
@@ -280,6 +612,8 @@ async def chat_websocket(websocket: WebSocket):
                 },
             )
         finally:
+            if audio_stream is not None:
+                await audio_stream.aclose()
             try:
                 await websocket.close()
             except Exception:
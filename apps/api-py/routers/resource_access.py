@@ -3,8 +3,11 @@ from __future__ import annotations
 from typing import Any
 
 from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from storage.database import run_in_session
+
 
 def raise_owned_resource_error(
     db: Session,
@@ -37,3 +40,20 @@ def raise_owned_resource_error(
         status_code=403,
         detail={"error": {"code": "FORBIDDEN", "message": "Access denied"}},
     )
+
+
+async def raise_owned_resource_error_async(
+    db: Session | AsyncSession,
+    model: type[Any],
+    resource_id: str,
+    user_id: str,
+    *,
+    code: str,
+    noun: str,
+) -> None:
+    await run_in_session(
+        db,
+        lambda s: raise_owned_resource_error(
+            s, model, resource_id, user_id, code=code, noun=noun
+        ),
+    )
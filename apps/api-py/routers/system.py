@@ -7,7 +7,9 @@ from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from services.provider_router import provider_router_snapshot
 from storage.database import get_db
+from utils.metrics import collect_metrics
 
 router = APIRouter()
 
@@ -38,3 +40,15 @@ async def ready(db: Session = Depends(get_db)):
 @router.get("/healthz")
 async def healthz(db: Session = Depends(get_db)):
     return await ready(db)
+
+
+@router.get("/metrics")
+async def metrics():
+    """JSON snapshot of in-process metrics (DB pool checkouts, wait times, ...)."""
+    return collect_metrics()
+
+
+@router.get("/providers")
+async def providers():
+    """STT/LLM provider health (circuit state, latency) and recent routing."""
+    return provider_router_snapshot()
@@ -4,22 +4,23 @@ import logging
 
 from fastapi import APIRouter, Depends, Header, status
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from routers.auth import get_current_user
-from routers.resource_access import raise_owned_resource_error
+from routers.resource_access import raise_owned_resource_error_async
 from routers.response_models import TaskResponse
 
 # Import service functions
 from services.tasks import (
-    create_task_service,
-    delete_task_service,
-    get_task_service,
-    list_tasks_service,
-    toggle_task_service,
-    update_task_service,
+    create_task_service_async,
+    delete_task_service_async,
+    get_task_service_async,
+    list_tasks_service_async,
+    toggle_task_service_async,
+    update_task_service_async,
 )
-from storage.database import get_db
+from storage.database import get_request_db
 from storage.models import Task
 
 router = APIRouter(tags=["tasks"])
@@ -45,13 +46,13 @@ class TaskUpdate(BaseModel):
 @router.get("", response_model=list[TaskResponse])
 async def list_tasks(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
     limit: int | None = None,
     offset: int = 0,
     sort: str = "created_at",
     order: str = "desc",
 ):
-    return list_tasks_service(
+    return await list_tasks_service_async(
         current_user["id"],
         db,
         limit=limit,
@@ -65,20 +66,25 @@ async def list_tasks(
 async def create_task(
     payload: TaskCreate,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
     Idempotency_Key: str | None = Header(default=None, convert_underscores=False),
 ):
     # Idempotency: check for existing response
-    from services.idempotency import get_idempotent_response, save_idempotent_response
+    from services.idempotency import (
+        get_idempotent_response_async,
+        save_idempotent_response_async,
+    )
 
     if Idempotency_Key:
-        saved = get_idempotent_response(
+        saved = await get_idempotent_response_async(
             db, Idempotency_Key, current_user.get("id"), "POST", "/api/v1/tasks"
         )
         if saved:
             return saved["response"]
 
-    created = create_task_service(payload.model_dump(), current_user["id"], db)
+    created = await create_task_service_async(
+        payload.model_dump(), current_user["id"], db
+    )
 
     # Publish event
     try:
@@ -89,7 +95,7 @@ async def create_task(
         logger.exception("Failed to publish task_created event")
 
     if Idempotency_Key:
-        save_idempotent_response(
+        await save_idempotent_response_async(
             db,
             Idempotency_Key,
             current_user.get("id"),
@@ -106,11 +112,11 @@ async def create_task(
 async def get_task(
     task_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    result = get_task_service(task_id, current_user["id"], db)
+    result = await get_task_service_async(task_id, current_user["id"], db)
     if not result:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             Task,
             task_id,
@@ -126,13 +132,13 @@ async def update_task(
     task_id: str,
     patch: TaskUpdate,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    updated = update_task_service(
+    updated = await update_task_service_async(
         task_id, patch.model_dump(exclude_unset=True), current_user["id"], db
     )
     if not updated:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             Task,
             task_id,
@@ -147,11 +153,11 @@ async def update_task(
 async def delete_task(
     task_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    ok = delete_task_service(task_id, current_user["id"], db)
+    ok = await delete_task_service_async(task_id, current_user["id"], db)
     if not ok:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             Task,
             task_id,
@@ -166,11 +172,11 @@ async def delete_task(
 async def toggle_task(
     task_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_request_db),
 ):
-    updated = toggle_task_service(task_id, current_user["id"], db)
+    updated = await toggle_task_service_async(task_id, current_user["id"], db)
     if not updated:
-        raise_owned_resource_error(
+        await raise_owned_resource_error_async(
             db,
             Task,
             task_id,
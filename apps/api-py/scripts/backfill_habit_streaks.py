@@ -0,0 +1,36 @@
+"""Backfill (or repair) the persisted habit streak counters.
+
+Recomputes ``current_streak``, ``best_streak`` and ``last_completed_date`` on
+every habit from its ``habit_entries`` rows. The ``add habit streak
+counters`` migration backfills existing habits itself; run this any time the
+counters are suspected to have drifted (e.g. entries edited directly in the
+database).
+
+Usage:
+    uv run python scripts/backfill_habit_streaks.py [--user USER_ID]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--user", help="only recompute this user's habits")
+    args = parser.parse_args()
+
+    from services.habits import backfill_habit_streaks
+    from storage.database import get_session_now
+
+    with get_session_now() as db:
+        updated = backfill_habit_streaks(db, args.user)
+    print(f"Recomputed streak counters for {updated} habit(s)")
+
+
+if __name__ == "__main__":
+    main()
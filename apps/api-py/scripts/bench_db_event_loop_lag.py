@@ -0,0 +1,107 @@
+"""Compare event-loop lag between sync and async (ASYNC_DB) storage modes.
+
+Seeds a throwaway SQLite database, then runs concurrent task-listing requests
+through ``list_tasks_service_async`` with either a sync ``Session`` (queries run
+in a worker thread via ``asyncio.to_thread``) or an ``AsyncSession``
+(queries await aiosqlite). A monitor coroutine ticks every millisecond and
+records how late each tick fires; that overshoot is what websocket and
+streaming traffic experience while DB work is in flight.
+
+Usage:
+    uv run --extra async-db python scripts/bench_db_event_loop_lag.py \
+        --tasks 300 --concurrency 20 --requests 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+_tmpdir = tempfile.mkdtemp(prefix="nargis-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+from storage import database  # noqa: E402
+from storage.models import Task, User  # noqa: E402
+
+USER_ID = "bench-user"
+
+
+def _seed(task_count: int) -> None:
+    database.init_db()
+    with database.SessionLocal() as db:
+        db.add(User(id=USER_ID, email="bench@nargis.test", password_hash="x"))
+        for i in range(task_count):
+            parent = Task(id=f"t{i}", user_id=USER_ID, title=f"Task {i}")
+            db.add(parent)
+            db.add(
+                Task(id=f"t{i}-sub", user_id=USER_ID, parent_id=parent.id, title="Sub")
+            )
+        db.commit()
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+async def _monitor(stop: asyncio.Event, lags: list[float]) -> None:
+    interval = 0.001
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - t0 - interval) * 1000)
+
+
+async def _run_mode(mode: str, concurrency: int, requests: int) -> None:
+    from services.tasks import list_tasks_service_async
+
+    async def worker() -> None:
+        for _ in range(requests):
+            if mode == "async":
+                async with database.AsyncSessionLocal() as db:
+                    await list_tasks_service_async(USER_ID, db)
+            else:
+                with database.SessionLocal() as db:
+                    await list_tasks_service_async(USER_ID, db)
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_monitor(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+
+    total = concurrency * requests
+    print(
+        f"{mode:<6} requests={total:<5} throughput={total / elapsed:7.1f}/s "
+        f"loop-lag p50={statistics.median(lags):6.2f}ms "
+        f"p99={_percentile(lags, 99):7.2f}ms max={max(lags):7.2f}ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+
+    _seed(args.tasks)
+    await _run_mode("sync", args.concurrency, args.requests)
+    await _run_mode("async", args.concurrency, args.requests)
+    await database.dispose_async_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+"""Replay a recall query log through the embedding cache.
+
+Builds a synthetic but realistic log: a Zipf-distributed mix of recurring
+recall queries ("what did I say about the dentist", ...), with whitespace
+variants and a tail of one-off queries. It is replayed through
+``EmbeddingProvider`` three ways:
+
+- uncached: every query hits the embedder (legacy behavior);
+- cold: a fresh cache (LRU plus a temp SQLite persistent tier);
+- restart: a new process-local LRU over the already-populated table.
+
+The embedder is simulated with a fixed per-call latency (``--embed-ms``,
+roughly an OpenAI round trip) unless ``--real`` is given, in which case the
+configured provider (OpenAI or sentence-transformers) is used.
+
+Usage:
+    uv run python scripts/bench_embedding_cache.py --queries 500 --embed-ms 80
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+_tmpdir = tempfile.mkdtemp(prefix="nargis-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+TOPICS = [
+    "dentist appointment",
+    "project deadline",
+    "gym routine",
+    "mom's birthday",
+    "book recommendations",
+    "sleep schedule",
+    "budget for the trip",
+    "meeting notes with Sam",
+    "reading habit",
+    "morning journal",
+]
+TEMPLATES = [
+    "what did I say about the {t}",
+    "remind me about the {t}",
+    "anything on {t}?",
+    "{t}",
+]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def _query_log(count: int, one_off_ratio: float, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    recurring = [tpl.format(t=t) for t in TOPICS for tpl in TEMPLATES]
+    weights = [1 / (rank + 1) for rank in range(len(recurring))]
+    log: list[str] = []
+    for i in range(count):
+        if rng.random() < one_off_ratio:
+            log.append(f"one-off question #{i} about {rng.choice(TOPICS)}")
+            continue
+        query = rng.choices(recurring, weights=weights)[0]
+        if rng.random() < 0.2:
+            query = f"  {query.replace(' ', '  ')} "
+        log.append(query)
+    return log
+
+
+class _SimulatedEncoder:
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.calls = 0
+
+    def encode(self, texts, batch_size=32):
+        import numpy as np
+
+        self.calls += 1
+        time.sleep(self.latency_s)
+        return np.ones((len(texts), 8))
+
+
+class _NoCache:
+    """Legacy baseline: every lookup goes to the embedder."""
+
+    def get_or_compute(self, model, texts, compute):
+        return compute(texts)
+
+    def stats(self) -> dict:
+        return {"hit_ratio": 0.0}
+
+
+def _replay(label: str, provider, log: list[str]) -> None:
+    samples: list[float] = []
+    started = time.perf_counter()
+    for query in log:
+        t0 = time.perf_counter()
+        provider.embed(query)
+        samples.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    stats = provider.cache.stats()
+    print(
+        f"{label:<9} queries={len(log):<5} total={elapsed:6.2f}s "
+        f"p50={statistics.median(samples):7.2f}ms "
+        f"p99={_percentile(samples, 99):7.2f}ms "
+        f"hit_ratio={stats.get('hit_ratio', 0.0):.3f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--one-off-ratio", type=float, default=0.15)
+    parser.add_argument("--embed-ms", type=float, default=80.0)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--real", action="store_true")
+    args = parser.parse_args()
+
+    import logging
+
+    logging.disable(logging.INFO)
+
+    from services.embedding_cache import EmbeddingCache
+    from services.embeddings import EmbeddingProvider
+    from storage.database import init_db
+
+    init_db()
+    log = _query_log(args.queries, args.one_off_ratio, args.seed)
+
+    def provider(cache) -> EmbeddingProvider:
+        p = EmbeddingProvider(cache=cache)
+        if not args.real:
+            os.environ.pop("OPENAI_API_KEY", None)
+            p._st_model = _SimulatedEncoder(args.embed_ms / 1000)
+        return p
+
+    _replay("uncached", provider(_NoCache()), log)
+
+    cold = EmbeddingCache(persist=True)
+    _replay("cold", provider(cold), log)
+    cold.close()
+    _replay("restart", provider(EmbeddingCache(persist=True)), log)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Recall-vs-latency benchmark for memory vector search (Postgres + pgvector).
+
+Loads a synthetic clustered corpus into ``memories`` for a handful of bench
+users, computes exact top-k neighbours in NumPy as ground truth, then runs
+the production query shape (``_vector_search_stmt``) with the ANN index
+disabled (exact scan) and across a sweep of ``hnsw.ef_search`` /
+``ivfflat.probes`` values, reporting recall@k and p50/p99 latency.
+
+Requires DATABASE_URL pointing at Postgres with the pgvector extension and
+the memories vector index migration applied (``alembic upgrade head``).
+Bench rows are deleted afterwards unless ``--keep`` is given.
+
+Usage:
+    uv run python scripts/bench_memory_ann.py --rows 50000 --users 10 \
+        --queries 200 --k 5 --sweep 10,20,40,80,160
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete, insert, text  # noqa: E402
+
+DIM = 1536
+USER_PREFIX = "bench-ann-"
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def _corpus(rows: int, topics: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, DIM)).astype(np.float32)
+    labels = rng.integers(0, topics, size=rows)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(rows, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _load(db, users: list[str], vectors: np.ndarray) -> dict[str, list[int]]:
+    from storage.models import Memory, User
+
+    for uid in users:
+        db.merge(User(id=uid, email=f"{uid}@bench.local", password_hash="x"))
+    db.commit()
+
+    ids: dict[str, list[int]] = {uid: [] for uid in users}
+    batch = 1000
+    for start in range(0, len(vectors), batch):
+        chunk = vectors[start : start + batch]
+        rows = [
+            {
+                "user_id": users[(start + i) % len(users)],
+                "content": f"bench memory {start + i}",
+                "embedding": vec.tolist(),
+            }
+            for i, vec in enumerate(chunk)
+        ]
+        stmt = insert(Memory).returning(
+            Memory.id, Memory.user_id, sort_by_parameter_order=True
+        )
+        result = db.execute(stmt, rows)
+        for mem_id, uid in result.all():
+            ids[uid].append(mem_id)
+        db.commit()
+    return ids
+
+
+def _index_method(db) -> str | None:
+    row = db.execute(
+        text(
+            "SELECT indexdef FROM pg_indexes "
+            "WHERE tablename = 'memories' AND indexname = 'ix_memories_embedding_ann'"
+        )
+    ).first()
+    if row is None:
+        return None
+    return "ivfflat" if "ivfflat" in row[0] else "hnsw"
+
+
+def _run(db, queries, truth, k: int, settings: dict[str, str]):
+    from services.memory_service import _vector_search_stmt
+
+    latencies: list[float] = []
+    recalls: list[float] = []
+    for (uid, vec), expected in zip(queries, truth, strict=True):
+        with db.begin():
+            for name, value in settings.items():
+                db.execute(
+                    text("SELECT set_config(:n, :v, true)"), {"n": name, "v": value}
+                )
+            t0 = time.perf_counter()
+            rows = db.execute(_vector_search_stmt(uid, vec.tolist(), k)).all()
+            latencies.append((time.perf_counter() - t0) * 1000)
+        got = {row[0].id for row in rows}
+        recalls.append(len(got & expected) / k)
+        db.expunge_all()
+    return statistics.fmean(recalls), latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--topics", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--sweep", default="10,20,40,80,160")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    from storage.database import SessionLocal, engine
+    from storage.models import Memory
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("bench_memory_ann requires DATABASE_URL to point at Postgres")
+
+    users = [f"{USER_PREFIX}{i}" for i in range(args.users)]
+    vectors = _corpus(args.rows, args.topics, args.seed)
+
+    with SessionLocal() as db:
+        db.execute(delete(Memory).where(Memory.user_id.in_(users)))
+        db.commit()
+        ids = _load(db, users, vectors)
+        db.execute(text("ANALYZE memories"))
+        db.commit()
+
+        method = _index_method(db)
+        print(f"rows={args.rows} users={args.users} k={args.k} index={method}")
+
+        rng = np.random.default_rng(args.seed + 1)
+        queries = []
+        truth = []
+        user_of = np.array([i % args.users for i in range(args.rows)])
+        for _ in range(args.queries):
+            u = int(rng.integers(0, args.users))
+            probe = vectors[int(rng.integers(0, args.rows))]
+            probe = probe + 0.1 * rng.normal(size=DIM).astype(np.float32)
+            probe /= np.linalg.norm(probe)
+            mask = np.flatnonzero(user_of == u)
+            scores = vectors[mask] @ probe
+            top = mask[np.argsort(-scores)[: args.k]]
+            # Row i of the corpus was inserted as the (i // users)-th row of
+            # user i % users, so map corpus positions to inserted ids.
+            truth.append({ids[users[u]][i // args.users] for i in top})
+            queries.append((users[u], probe))
+
+        db.commit()
+        sweeps: list[tuple[str, dict[str, str]]] = [
+            (
+                "exact",
+                {"enable_indexscan": "off", "enable_bitmapscan": "off"},
+            )
+        ]
+        if method is not None:
+            knob = "ivfflat.probes" if method == "ivfflat" else "hnsw.ef_search"
+            for value in args.sweep.split(","):
+                sweeps.append(
+                    (
+                        f"{knob}={value}",
+                        {knob: value, f"{method}.iterative_scan": "relaxed_order"},
+                    )
+                )
+
+        for label, settings in sweeps:
+            try:
+                recall, latencies = _run(db, queries, truth, args.k, settings)
+            except Exception as exc:
+                db.rollback()
+                print(f"{label:<22} failed: {exc}")
+                continue
+            print(
+                f"{label:<22} recall@{args.k}={recall:5.3f} "
+                f"p50={statistics.median(latencies):7.2f}ms "
+                f"p99={_percentile(latencies, 99):7.2f}ms"
+            )
+
+        if not args.keep:
+            db.execute(delete(Memory).where(Memory.user_id.in_(users)))
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
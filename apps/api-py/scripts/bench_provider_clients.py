@@ -0,0 +1,129 @@
+"""Benchmark per-turn provider latency: one-shot vs pooled HTTP clients.
+
+Starts a local stub that speaks just enough HTTP/1.1 (with keep-alive) to
+answer Deepgram- and Groq-shaped requests, then runs ``_get_transcription``
+followed by ``_get_llm_response`` for N turns, first with the provider
+registry stopped (a fresh client per call, the legacy behavior) and then with
+it started (pooled keep-alive connections).
+
+Usage:
+    uv run python scripts/bench_provider_clients.py --turns 300 --delay-ms 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+STT_BODY = json.dumps(
+    {"results": {"channels": [{"alternatives": [{"transcript": "add a task"}]}]}}
+).encode()
+LLM_BODY = json.dumps({"choices": [{"message": {"content": "Done."}}]}).encode()
+
+
+async def _handle(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, delay: float
+) -> None:
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode("latin1").split("\r\n")
+            path = lines[0].split(" ")[1]
+            length = 0
+            for line in lines[1:]:
+                if line.lower().startswith("content-length:"):
+                    length = int(line.split(":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            if delay:
+                await asyncio.sleep(delay)
+            body = STT_BODY if path.startswith("/stt") else LLM_BODY
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/json\r\n"
+                + f"Content-Length: {len(body)}\r\n".encode()
+                + b"Connection: keep-alive\r\n\r\n"
+                + body
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+async def _run_turns(turns: int) -> list[float]:
+    from services.ai_clients import _get_llm_response, _get_transcription
+
+    audio = b"\x1a\x45\xdf\xa3" + os.urandom(16 * 1024)
+    samples: list[float] = []
+    for _ in range(turns):
+        t0 = time.perf_counter()
+        text = await _get_transcription(audio)
+        await _get_llm_response(text)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:<10} turns={len(samples):<5} "
+        f"p50={statistics.median(samples):7.2f}ms "
+        f"p99={_percentile(samples, 99):7.2f}ms "
+        f"mean={statistics.fmean(samples):7.2f}ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    delay = args.delay_ms / 1000
+    server = await asyncio.start_server(
+        lambda r, w: _handle(r, w, delay), "127.0.0.1", 0
+    )
+    port = server.sockets[0].getsockname()[1]
+
+    import logging
+
+    logging.disable(logging.INFO)
+
+    import services.ai_clients as ai_clients
+    from services.provider_clients import get_provider_clients
+
+    ai_clients.STT_URL = f"http://127.0.0.1:{port}/stt"
+    ai_clients.DEEPGRAM_API_KEY = "bench"
+    ai_clients.LLM_URL = f"http://127.0.0.1:{port}/llm"
+    ai_clients.GROQ_API_KEY = "bench"
+
+    async with server:
+        await _run_turns(10)
+        _report("one-shot", await _run_turns(args.turns))
+
+        registry = get_provider_clients()
+        await registry.start()
+        try:
+            await _run_turns(10)
+            _report("pooled", await _run_turns(args.turns))
+        finally:
+            await registry.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
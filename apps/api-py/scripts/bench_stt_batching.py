@@ -0,0 +1,120 @@
+"""CPU throughput of local Whisper STT with and without micro-batching.
+
+Fires ``--concurrency`` simultaneous transcriptions of synthetic clips
+through ``STTBatcher`` twice: once with ``max_batch_size=1`` (the previous
+one-request-per-model-call behavior) and once with ``--batch-size`` /
+``--wait-ms``, reporting requests/s and p50/p99 latency.
+
+By default the real processor and model are loaded (``ensure_stt_loaded``;
+needs the 'ml' dependency group). ``--simulate`` replaces them with a cost
+model of ``--fixed-ms`` per model call plus ``--per-clip-ms`` per clip, for
+machines without torch; it shows the queueing behavior, not real speedups.
+
+Usage:
+    uv run python scripts/bench_stt_batching.py --requests 64 --concurrency 16
+    uv run python scripts/bench_stt_batching.py --simulate
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.stt_batcher import STTBatcher  # noqa: E402
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def _clips(count: int, seconds: float, seed: int) -> list[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(16000 * seconds)) / 16000
+    clips = []
+    for _ in range(count):
+        tone = np.sin(2 * np.pi * rng.uniform(120, 400) * t)
+        clips.append((0.3 * tone + 0.02 * rng.normal(size=t.size)).astype(np.float32))
+    return clips
+
+
+def _simulated(fixed_ms: float, per_clip_ms: float):
+    def infer(waveforms: list) -> list[str]:
+        time.sleep((fixed_ms + per_clip_ms * len(waveforms)) / 1000)
+        return ["" for _ in waveforms]
+
+    return infer
+
+
+async def _run(label: str, batcher: STTBatcher, clips, concurrency: int) -> None:
+    latencies: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(clip) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            await batcher.transcribe(clip)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(c) for c in clips))
+    elapsed = time.perf_counter() - started
+    await batcher.aclose()
+    sizes = batcher.stats()["batch_size"]
+    mean_batch = sizes["sum"] / sizes["count"] if sizes["count"] else 0.0
+    throughput = len(clips) / elapsed
+    print(
+        f"{label:<10} requests={len(clips):<4} throughput={throughput:6.2f}/s "
+        f"p50={statistics.median(latencies):8.1f}ms "
+        f"p99={_percentile(latencies, 99):8.1f}ms mean_batch={mean_batch:4.1f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--clip-seconds", type=float, default=4.0)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--wait-ms", type=float, default=10.0)
+    parser.add_argument("--simulate", action="store_true")
+    parser.add_argument("--fixed-ms", type=float, default=400.0)
+    parser.add_argument("--per-clip-ms", type=float, default=90.0)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.simulate:
+        infer = _simulated(args.fixed_ms, args.per_clip_ms)
+    else:
+        from services.ai_clients import ensure_stt_loaded, run_stt_batch_sync
+
+        await ensure_stt_loaded()
+        infer = run_stt_batch_sync
+        infer(_clips(1, args.clip_seconds, args.seed))  # warm up
+
+    clips = _clips(args.requests, args.clip_seconds, args.seed)
+    await _run(
+        "unbatched",
+        STTBatcher(infer, max_batch_size=1, max_wait_ms=0),
+        clips,
+        args.concurrency,
+    )
+    await _run(
+        "batched",
+        STTBatcher(infer, max_batch_size=args.batch_size, max_wait_ms=args.wait_ms),
+        clips,
+        args.concurrency,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
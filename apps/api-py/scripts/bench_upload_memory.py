@@ -0,0 +1,169 @@
+"""Peak memory of concurrent /api/v1/process-audio uploads.
+
+Sends ``--concurrency`` simultaneous uploads of ``--size-mb`` each through the
+ASGI app in-process, with the STT provider replaced by a sink that drains the
+request body and the LLM stubbed out. Two server variants are measured, each
+in a fresh subprocess so peak RSS is not shared:
+
+- buffered: the previous handler shape (``await audio_file.read()`` and the
+  whole byte string handed to the provider);
+- streaming: the current endpoint (spooled multipart parse, chunked
+  provider body).
+
+The client generates each multipart body on the fly, so the reported RSS
+growth is server-side buffering.
+
+Usage:
+    uv run python scripts/bench_upload_memory.py --size-mb 20 --concurrency 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from fastapi import File, UploadFile
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+_tmpdir = tempfile.mkdtemp(prefix="nargis-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ["ML_WORKER_URL"] = "http://ml-worker.bench"
+os.environ["VAD_ENABLED"] = "0"
+
+BOUNDARY = "benchboundary"
+CHUNK = 64 * 1024
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _multipart_body(size: int):
+    yield (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=audio_file; "
+        f'filename="clip.webm"\r\nContent-Type: audio/webm\r\n\r\n'
+    ).encode()
+    block = b"\x1aE\xdf\xa3" + os.urandom(CHUNK - 4)
+    sent = 0
+    while sent < size:
+        piece = block[: min(CHUNK, size - sent)]
+        sent += len(piece)
+        yield piece
+        await asyncio.sleep(0)
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+class _Resp:
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return {"text": "bench transcript"}
+
+
+class _SinkClient:
+    async def post(self, url, *, headers=None, content=None, params=None):
+        if isinstance(content, bytes):
+            return _Resp()
+        async for _chunk in content:
+            pass
+        return _Resp()
+
+
+@asynccontextmanager
+async def _sink_provider_client(_provider: str):
+    yield _SinkClient()
+
+
+async def _run(mode: str, size: int, concurrency: int) -> None:
+    import httpx
+
+    import services.ai_clients as ai_clients
+    from main import app
+
+    ai_clients.provider_client = _sink_provider_client
+
+    async def fake_llm(_text: str):
+        yield "ok"
+
+    ai_clients._stream_llm_response = fake_llm
+
+    @app.post("/bench/buffered")
+    async def buffered(audio_file: UploadFile = File(...)):
+        audio_bytes = await audio_file.read()
+        return {"text": await ai_clients._get_transcription(audio_bytes)}
+
+    path = "/bench/buffered" if mode == "buffered" else "/api/v1/process-audio"
+    headers = {"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        # Warm up imports and the first request path before measuring.
+        await c.post(path, content=_multipart_body(CHUNK), headers=headers)
+        baseline = _rss_mb()
+        started = time.perf_counter()
+        responses = await asyncio.gather(
+            *(
+                c.post(path, content=_multipart_body(size), headers=headers)
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+    assert all(r.status_code == 200 for r in responses), [
+        r.status_code for r in responses
+    ]
+    growth = max(0.0, _peak_rss_mb() - baseline)
+    print(
+        f"{mode:<10} uploads={concurrency} size={size / 2**20:.1f}MB "
+        f"peak_rss_growth={growth:7.1f}MB per_upload={growth / concurrency:6.2f}MB "
+        f"elapsed={elapsed:5.2f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=["buffered", "streaming"])
+    args = parser.parse_args()
+
+    if args.mode:
+        import logging
+
+        logging.disable(logging.WARNING)
+        asyncio.run(_run(args.mode, int(args.size_mb * 2**20), args.concurrency))
+        return
+
+    for mode in ("buffered", "streaming"):
+        subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--mode",
+                mode,
+                "--size-mb",
+                str(args.size_mb),
+                "--concurrency",
+                str(args.concurrency),
+            ],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 import json
+import logging
+import time
 from collections.abc import AsyncGenerator
 
 from langchain_core.messages import HumanMessage
@@ -7,24 +9,93 @@ from sqlalchemy.orm import Session
 from agent import graph as agent_graph
 from agent.tools import set_agent_runtime_context
 from services.ai_clients import _get_llm_response
+from services.conversation import get_conversation_store
+from services.fast_intents import (
+    FastIntentUnresolved,
+    get_fast_intent_stats,
+    parse_fast_intent,
+    run_fast_intent,
+)
+from utils.timing import TURN_TIMING_EVENTS, ToolSpans, TurnTimer, activate, timed
+
+
+def _ndjson(event: dict) -> bytes:
+    with timed("serialize"):
+        return (json.dumps(event) + "\n").encode()
+
+
+def _end_events(timer: TurnTimer) -> list[bytes]:
+    """Closing lines of a turn: the optional ``timing`` event, then ``end``."""
+    event = timer.finish()
+    lines = [_ndjson(event)] if timer.emit else []
+    lines.append(_ndjson({"type": "end", "content": "done"}))
+    return lines
 
 
 async def run_agent_pipeline(
-    user_input: str, user_id: str, db: Session, stream_events: bool = True
+    user_input: str,
+    user_id: str,
+    db: Session,
+    stream_events: bool = True,
+    timer: TurnTimer | None = None,
 ) -> AsyncGenerator[bytes, None]:
     """
     Runs the agent pipeline with system context injection.
-    Yields NDJSON events.
+    Yields NDJSON events. ``timer`` carries spans recorded by the caller
+    (e.g. STT); a ``timing`` event precedes ``end`` when ``timer.emit``.
     """
+    timer = timer or TurnTimer(emit=TURN_TIMING_EVENTS)
+    with activate(timer):
+        async for line in _run_agent_turn(user_input, user_id, db, timer):
+            yield line
+
+
+async def _run_agent_turn(
+    user_input: str, user_id: str, db: Session, timer: TurnTimer
+) -> AsyncGenerator[bytes, None]:
     # Emit thought
-    yield (json.dumps({"type": "thought", "content": "Processing…"}) + "\n").encode()
+    yield _ndjson({"type": "thought", "content": "Processing…"})
+
+    # Common commands skip the LLM round trip entirely
+    intent = parse_fast_intent(user_input)
+    if intent is not None:
+        try:
+            tool_result, assistant_text = await run_fast_intent(intent, user_id, db)
+        except FastIntentUnresolved:
+            pass
+        except Exception:
+            logging.exception("Fast-path intent failed; using the agent")
+        else:
+            get_conversation_store().record_turn(
+                user_id, user_input, assistant_text, tools_used=[intent.tool]
+            )
+            for event in (
+                {
+                    "type": "tool_use",
+                    "tool": intent.tool,
+                    "input": json.dumps(intent.args)[:200],
+                },
+                {
+                    "type": "tool_result",
+                    "tool": intent.tool,
+                    "result": tool_result[:2000],
+                    "output": tool_result[:2000],
+                },
+                {"type": "response", "content": assistant_text},
+            ):
+                yield _ndjson(event)
+            for line in _end_events(timer):
+                yield line
+            return
 
     # Check agent availability
     if not getattr(agent_graph, "agent_app", None) or not hasattr(
         agent_graph.agent_app, "astream_events"
     ):
         # Fallback: Normalize LLM output to assistant text only
-        llm_result = await _get_llm_response(user_input)
+        with timer.span("llm"):
+            llm_result = await _get_llm_response(user_input)
+        timer.mark("llm_first_token")
         assistant_text = None
         # OpenAI/Groq schema: choices[0].message.content
         if isinstance(llm_result, dict):
@@ -47,21 +118,28 @@ async def run_agent_pipeline(
         if not assistant_text:
             # Fallback to stringified dict
             assistant_text = str(llm_result)
-        yield (
-            json.dumps({"type": "response", "content": assistant_text}) + "\n"
-        ).encode()
-        yield (json.dumps({"type": "end", "content": "done"}) + "\n").encode()
+        yield _ndjson({"type": "response", "content": assistant_text})
+        for line in _end_events(timer):
+            yield line
         return
 
-    # Prepare payload
+    # Prepare payload: bounded conversation history, then this turn
+    conversations = get_conversation_store()
+    history = conversations.history(user_id)
     if HumanMessage:
-        messages = [HumanMessage(content=user_input)]
+        messages = [*history, HumanMessage(content=user_input)]
         input_payload = {"messages": messages}
     else:
-        input_payload = {"messages": [{"role": "user", "content": user_input}]}
+        input_payload = {
+            "messages": [*history, {"role": "user", "content": user_input}]
+        }
 
     # Stream events
+    started = time.perf_counter()
     response_parts: list[str] = []
+    tools_used: list[str] = []
+    tool_spans = ToolSpans()
+    context_ms_before = timer.spans.get("daily_context", 0.0)
     tx_ctx = db.begin_nested() if db.in_transaction() else db.begin()
     agent_config = agent_graph.build_agent_runnable_config(user_id, db)
 
@@ -83,54 +161,62 @@ async def run_agent_pipeline(
                         pass
                     elif kind == "on_tool_start":
                         tool_name = ev.get("name")
+                        tools_used.append(str(tool_name))
+                        tool_spans.start(str(ev.get("run_id")))
                         tool_input = ev.get("data", {}).get("input")
                         # Clean up input string if it's a dict
                         if isinstance(tool_input, dict):
                             tool_input = json.dumps(tool_input)
-                        yield (
-                            json.dumps(
-                                {
-                                    "type": "tool_use",
-                                    "tool": tool_name,
-                                    "input": str(tool_input)[:200],
-                                }
-                            )
-                            + "\n"
-                        ).encode()
+                        yield _ndjson(
+                            {
+                                "type": "tool_use",
+                                "tool": tool_name,
+                                "input": str(tool_input)[:200],
+                            }
+                        )
                     elif kind == "on_tool_end":
                         tool_name = ev.get("name")
+                        tool_ms = tool_spans.end(str(ev.get("run_id")))
+                        if tool_ms:
+                            timer.add("tools", tool_ms)
                         tool_output = ev.get("data", {}).get("output")
                         if tool_output is not None:
                             if isinstance(tool_output, (dict, list)):
                                 tool_output = json.dumps(tool_output)
                             result_text = str(tool_output)[:2000]
-                            yield (
-                                json.dumps(
-                                    {
-                                        "type": "tool_result",
-                                        "tool": tool_name,
-                                        # Canonical key expected by the web app.
-                                        "result": result_text,
-                                        # Backwards-compatible alias.
-                                        "output": result_text,
-                                    }
-                                )
-                                + "\n"
-                            ).encode()
+                            yield _ndjson(
+                                {
+                                    "type": "tool_result",
+                                    "tool": tool_name,
+                                    # Canonical key expected by the web app.
+                                    "result": result_text,
+                                    # Backwards-compatible alias.
+                                    "output": result_text,
+                                }
+                            )
                     elif kind == "on_chat_model_stream":
                         content = ev.get("data", {}).get("chunk", {}).get("content")
                         if content:
+                            timer.mark("llm_first_token")
                             response_parts.append(content)
     except Exception as exc:
-        yield (json.dumps({"type": "error", "content": str(exc)}) + "\n").encode()
-        yield (json.dumps({"type": "end", "content": "done"}) + "\n").encode()
+        yield _ndjson({"type": "error", "content": str(exc)})
+        for line in _end_events(timer):
+            yield line
         return
 
+    agent_ms = (time.perf_counter() - started) * 1000
+    # Tool and daily-context time have spans of their own; keep stages additive
+    context_ms = timer.spans.get("daily_context", 0.0) - context_ms_before
+    timer.add("llm", max(0.0, agent_ms - tool_spans.ms - context_ms))
+    get_fast_intent_stats().record_agent_turn(agent_ms)
+    conversations.record_turn(
+        user_id, user_input, "".join(response_parts), tools_used=tools_used
+    )
     if response_parts:
         # Normalize: emit only assistant text, not raw LLM dict
         assistant_text = "".join(response_parts)
-        yield (
-            json.dumps({"type": "response", "content": assistant_text}) + "\n"
-        ).encode()
+        yield _ndjson({"type": "response", "content": assistant_text})
 
-    yield (json.dumps({"type": "end", "content": "done"}) + "\n").encode()
+    for line in _end_events(timer):
+        yield line
@@ -1,13 +1,20 @@
 import asyncio
-import io
+import json
 import logging
 import os
-import subprocess
+import time
+from collections.abc import AsyncIterator, Collection
 from typing import TYPE_CHECKING
 
-import httpx
 from fastapi import HTTPException
-from openai import OpenAI
+
+from services.audio_decode import AudioSource, decode_audio, read_head, source_size
+from services.audio_upload import iter_upload_chunks
+from services.local_llm import chat_completion
+from services.provider_clients import provider_client
+from services.provider_router import ProviderCall, get_provider_router
+from services.stt_batcher import get_stt_batcher
+from services.vad import PreparedAudio, prepare_stt_audio
 
 if TYPE_CHECKING:
     pass
@@ -31,16 +38,6 @@ stt_processor = None
 stt_model = None
 _stt_lock = asyncio.Lock()
 
-# Initialize local Ollama client if available
-try:
-    ollama_client = OpenAI(base_url="http://localhost:11434/v1", api_key="ollama")
-    logging.info("Local Ollama client initialized successfully.")
-except Exception as e:
-    logging.warning(
-        f"Failed to initialize Ollama client. Is Ollama running? Error: {e}"
-    )
-    ollama_client = None
-
 
 async def ensure_stt_loaded():
     global stt_processor, stt_model
@@ -65,290 +62,316 @@ async def ensure_stt_loaded():
         logging.info("STT model ready.")
 
 
-def convert_audio_to_wav_sync(audio_bytes: bytes) -> bytes:
-    logging.info("Converting audio with FFmpeg...")
-    try:
-        command = [
-            "ffmpeg",
-            "-i",
-            "pipe:0",
-            "-f",
-            "wav",
-            "-ar",
-            "16000",
-            "-ac",
-            "1",
-            "pipe:1",
-        ]
-        process = subprocess.run(
-            command, input=audio_bytes, capture_output=True, check=True
-        )
-        return process.stdout
-    except subprocess.CalledProcessError as e:
-        logging.error(f"FFmpeg error: {e.stderr.decode('utf-8')}")
-        raise
-
-
-def run_stt_inference_sync(wav_audio_bytes: bytes) -> str:
-    logging.info("Running STT inference with local model...")
+def run_stt_batch_sync(waveforms: list) -> list[str]:
+    """Transcribe several waveforms in one padded processor/model pass."""
+    logging.info("Running STT inference with local model (batch=%d)", len(waveforms))
     assert stt_processor is not None and stt_model is not None, "STT model not loaded"
-    try:
-        import soundfile as sf
-    except ImportError as exc:
-        logging.warning(
-            "soundfile is not installed; local STT is unavailable. "
-            "Install optional dependency group 'ml' to enable local STT."
-        )
-        raise RuntimeError("Missing local STT dependency: soundfile") from exc
-
-    waveform, _ = sf.read(io.BytesIO(wav_audio_bytes))
-    inputs = stt_processor(waveform, sampling_rate=16000, return_tensors="pt")
+    inputs = stt_processor(waveforms, sampling_rate=16000, return_tensors="pt")
     input_features = inputs.input_features.to(device)
     predicted_ids = stt_model.generate(input_features)
-    transcription = stt_processor.batch_decode(predicted_ids, skip_special_tokens=True)[
-        0
-    ]
-    return transcription
+    return stt_processor.batch_decode(predicted_ids, skip_special_tokens=True)
 
 
-def run_llm_sync(text: str) -> dict:
-    if not ollama_client:
-        return {"error": "Ollama client is not initialized."}
-    logging.info(f"Received for Local LLM: '{text}'")
-    try:
-        chat_completion = ollama_client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are Nargis, a friendly AI assistant.",
-                },
-                {"role": "user", "content": text},
-            ],
-            model=OLLAMA_MODEL,
-        )
-        return chat_completion.model_dump()
-    except Exception as e:
-        logging.error(f"An error occurred with the Ollama API: {e}")
-        return {"error": str(e)}
+def run_stt_inference_sync(audio_bytes: bytes) -> str:
+    return run_stt_batch_sync([decode_audio(audio_bytes)])[0]
+
+
+def _stt_body(prepared: PreparedAudio) -> tuple[bytes | AsyncIterator[bytes], dict]:
+    """Request content and headers; spooled uploads are streamed in chunks."""
+    headers = {
+        "Content-Type": prepared.content_type,
+        "Content-Length": str(prepared.payload_bytes),
+    }
+    if isinstance(prepared.payload, bytes):
+        return prepared.payload, headers
+    return iter_upload_chunks(prepared.payload), headers
 
 
-async def _get_transcription(audio_bytes: bytes) -> str:
+def _deepgram_request(content_type: str) -> tuple[dict, dict]:
+    params = {"punctuate": "true", "smart_format": "true"}
+    if content_type == "audio/webm":
+        # ensure correct decoding on Deepgram side; wav/ogg are autodetected
+        params.update({"encoding": "opus", "container": "webm"})
+    headers = {"Authorization": f"Token {DEEPGRAM_API_KEY}"}
+    return params, headers
+
+
+async def _get_transcription(audio: AudioSource) -> str:
+    """Transcribe raw bytes or a seekable (spooled) upload file."""
     # Log basic info about the incoming audio for observability (can be removed later)
     try:
         logging.info(
             "STT input",
-            extra={"bytes": len(audio_bytes), "head": audio_bytes[:8].hex()},
+            extra={"bytes": source_size(audio), "head": read_head(audio, 8).hex()},
         )
     except Exception:
         logging.debug("Failed to log STT input head")
 
-    # Decision order (production-safe):
-    # 1) If Deepgram is configured -> use Deepgram
-    # 2) Else if ENABLE_LOCAL_STT -> use local Whisper
-    # 3) Else -> raise error
+    # Trim silence and reject empty clips before any provider call
+    loop = asyncio.get_running_loop()
+    prepared = await loop.run_in_executor(None, prepare_stt_audio, audio)
 
-    # 1) Deepgram
-    if STT_URL and DEEPGRAM_API_KEY:
-        logging.info("Using external STT provider: Deepgram")
-        try:
-            params = {
-                # ensure correct decoding on Deepgram side
-                "encoding": "opus",
-                "container": "webm",
-                "punctuate": "true",
-                "smart_format": "true",
-            }
-            headers = {
-                "Authorization": f"Token {DEEPGRAM_API_KEY}",
-                "Content-Type": "audio/webm",
-            }
-            async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-                resp = await client.post(
-                    STT_URL, headers=headers, params=params, content=audio_bytes
-                )
-                resp.raise_for_status()
-                data = resp.json()
-                # Deepgram shape: results.channels[0].alternatives[0].transcript
-                transcript = (
-                    data.get("results", {})
-                    .get("channels", [{}])[0]
-                    .get("alternatives", [{}])[0]
-                    .get("transcript", "")
-                )
-                if not transcript:
-                    # Empty transcripts are errors in production
-                    logging.error("Deepgram returned empty transcript")
-                    raise HTTPException(
-                        status_code=502, detail="STT returned empty transcript"
-                    )
-                return transcript
-        except HTTPException:
-            raise
-        except Exception as e:
-            logging.exception(f"Deepgram STT failed: {e}")
-            # Do not silently fall back; surface the error to caller
-            raise
+    candidates = _stt_candidates(prepared)
+    if not candidates:
+        logging.error("No STT backend available: none of Deepgram/ML worker/local")
+        raise HTTPException(status_code=503, detail="No STT backend available")
+    return await get_provider_router("stt").call(candidates)
 
-    # If an ML worker is available, prefer delegating to it (isolates heavy deps)
-    if ML_WORKER_URL:
-        logging.info(f"Delegating STT to ML worker at {ML_WORKER_URL}")
-        stt_url = ML_WORKER_URL.rstrip("/") + "/stt"
-        try:
-            headers = {"Content-Type": "audio/webm"}
-            async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-                resp = await client.post(stt_url, headers=headers, content=audio_bytes)
-                resp.raise_for_status()
-                data = resp.json()
-                # ML worker expected to return {"text": "..."}
-                text = data.get("text", "")
-                if not text:
-                    logging.error("ML worker returned empty transcript")
-                    raise HTTPException(
-                        status_code=502,
-                        detail="STT returned empty transcript from ML worker",
-                    )
-                return text
-        except HTTPException:
-            raise
-        except Exception as e:
-            logging.exception(f"Error delegating STT to ML worker: {e}")
-            raise
 
-    # 2) Local STT if explicitly enabled
+def _stt_candidates(prepared: PreparedAudio) -> list[tuple[str, ProviderCall]]:
+    """Configured STT backends in preference order: Deepgram, ML worker, local."""
+    candidates: list[tuple[str, ProviderCall]] = []
+    if STT_URL and DEEPGRAM_API_KEY:
+        candidates.append(("deepgram", lambda: _stt_deepgram(prepared)))
+    # An ML worker isolates heavy deps from the API process
+    if ML_WORKER_URL:
+        candidates.append(("ml_worker", lambda: _stt_ml_worker(prepared)))
     if ENABLE_LOCAL_STT:
-        logging.info("Using local STT model.")
-        try:
-            await ensure_stt_loaded()
+        candidates.append(("local", lambda: _stt_local(prepared)))
+    return candidates
+
+
+async def _stt_deepgram(prepared: PreparedAudio) -> str:
+    logging.info("Using external STT provider: Deepgram")
+    params, headers = _deepgram_request(prepared.content_type)
+    content, body_headers = _stt_body(prepared)
+    async with provider_client("deepgram") as client:
+        resp = await client.post(
+            STT_URL,
+            headers={**headers, **body_headers},
+            params=params,
+            content=content,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+    # Deepgram shape: results.channels[0].alternatives[0].transcript
+    transcript = (
+        data.get("results", {})
+        .get("channels", [{}])[0]
+        .get("alternatives", [{}])[0]
+        .get("transcript", "")
+    )
+    if not transcript:
+        # No speech is a valid answer, not a provider failure: it must not
+        # count against Deepgram's health or fall through to another backend.
+        logging.info("Deepgram returned empty transcript")
+    return transcript
+
+
+async def _stt_ml_worker(prepared: PreparedAudio) -> str:
+    logging.info(f"Delegating STT to ML worker at {ML_WORKER_URL}")
+    stt_url = ML_WORKER_URL.rstrip("/") + "/stt"
+    content, headers = _stt_body(prepared)
+    async with provider_client("ml_worker") as client:
+        resp = await client.post(stt_url, headers=headers, content=content)
+        resp.raise_for_status()
+        data = resp.json()
+    # ML worker expected to return {"text": "..."}
+    text = data.get("text", "")
+    if not text:
+        # Valid empty result; see _stt_deepgram
+        logging.info("ML worker returned empty transcript")
+    return text
+
+
+async def _stt_local(prepared: PreparedAudio) -> str:
+    logging.info("Using local STT model.")
+    # RuntimeError (missing deps) propagates so the router falls through
+    await ensure_stt_loaded()
+    try:
+        waveform = prepared.waveform
+        if waveform is None:
             loop = asyncio.get_running_loop()
-            wav_audio_bytes = await loop.run_in_executor(
-                None, convert_audio_to_wav_sync, audio_bytes
-            )
-            return await loop.run_in_executor(
-                None, run_stt_inference_sync, wav_audio_bytes
-            )
-        except RuntimeError as e:
-            logging.warning(
-                "Local STT dependencies unavailable: %s. "
-                "Falling back to configured remote STT providers.",
-                e,
+            waveform = await loop.run_in_executor(None, decode_audio, prepared.payload)
+        return await get_stt_batcher().transcribe(waveform)
+    except Exception as e:
+        logging.exception(f"Local STT failed: {e}")
+        raise HTTPException(status_code=500, detail="Local STT failed") from e
+
+
+CHAT_SYSTEM_PROMPT = "You are Nargis, a friendly and concise AI productivity assistant."
+
+
+def _groq_chat_request(text: str, *, stream: bool = False) -> tuple[dict, dict]:
+    payload: dict = {
+        "model": GROQ_MODEL,
+        "messages": [
+            {"role": "system", "content": CHAT_SYSTEM_PROMPT},
+            {"role": "user", "content": text},
+        ],
+    }
+    if stream:
+        payload["stream"] = True
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+    }
+    return payload, headers
+
+
+def extract_llm_text(llm_result: dict) -> str:
+    """Normalize an LLM response dict (OpenAI/Groq or legacy shapes) to text."""
+    assistant_text = None
+    choices = llm_result.get("choices")
+    if isinstance(choices, list) and len(choices) > 0 and isinstance(choices[0], dict):
+        message = choices[0].get("message")
+        if isinstance(message, dict):
+            assistant_text = message.get("content")
+    if not assistant_text:
+        assistant_text = (
+            llm_result.get("reply")
+            or llm_result.get("output")
+            or llm_result.get("text")
+        )
+    if not assistant_text:
+        assistant_text = str(llm_result)
+    return assistant_text
+
+
+def _sse_delta_content(line: str) -> str | None:
+    """Return the delta text carried by one OpenAI-compatible SSE line."""
+    if not line.startswith("data:"):
+        return None
+    data = line[len("data:") :].strip()
+    if not data or data == "[DONE]":
+        return None
+    try:
+        chunk = json.loads(data)
+    except ValueError:
+        logging.debug("Skipping malformed SSE chunk: %s", data[:80])
+        return None
+    choices = chunk.get("choices") if isinstance(chunk, dict) else None
+    if not isinstance(choices, list) or not choices:
+        return None
+    delta = choices[0].get("delta") if isinstance(choices[0], dict) else None
+    content = delta.get("content") if isinstance(delta, dict) else None
+    return content if isinstance(content, str) and content else None
+
+
+async def _stream_llm_response(text: str) -> AsyncIterator[str]:
+    """Yield assistant text incrementally as the LLM produces it.
+
+    Groq (OpenAI-compatible) is streamed over SSE while its circuit is
+    closed; if it fails before the first token, the remaining providers are
+    tried. The ML worker and Ollama paths have no streaming contract yet, so
+    their full reply is yielded as a single chunk. Time-to-first-token is
+    logged for every request.
+    """
+    started = time.perf_counter()
+    first_token_ms: float | None = None
+    provider = "fallback"
+
+    def _mark_first_token() -> None:
+        nonlocal first_token_ms
+        if first_token_ms is None:
+            first_token_ms = (time.perf_counter() - started) * 1000
+            logging.info(
+                "LLM time-to-first-token provider=%s ttft_ms=%.1f",
+                provider,
+                first_token_ms,
             )
-            if STT_URL and DEEPGRAM_API_KEY:
-                logging.info("Retrying with external STT provider: Deepgram")
-                try:
-                    params = {
-                        "encoding": "opus",
-                        "container": "webm",
-                        "punctuate": "true",
-                        "smart_format": "true",
-                    }
-                    headers = {
-                        "Authorization": f"Token {DEEPGRAM_API_KEY}",
-                        "Content-Type": "audio/webm",
-                    }
-                    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-                        resp = await client.post(
-                            STT_URL,
-                            headers=headers,
-                            params=params,
-                            content=audio_bytes,
-                        )
-                        resp.raise_for_status()
-                        data = resp.json()
-                        transcript = (
-                            data.get("results", {})
-                            .get("channels", [{}])[0]
-                            .get("alternatives", [{}])[0]
-                            .get("transcript", "")
-                        )
-                        if transcript:
-                            return transcript
-                except Exception:
-                    logging.exception("Fallback to Deepgram STT failed")
-        except Exception as e:
-            logging.exception(f"Local STT failed: {e}")
-            raise HTTPException(status_code=500, detail="Local STT failed") from e
-
-    # 3) No STT backend available
-    logging.error("No STT backend available: neither Deepgram nor local STT enabled")
-    raise HTTPException(status_code=503, detail="No STT backend available")
 
+    router = get_provider_router("llm")
+    groq_configured = bool(LLM_URL and GROQ_API_KEY)
+    if groq_configured and router.health("groq").acquire():
+        provider = "groq"
+        logging.info("Streaming from external LLM provider: Groq")
+        payload, headers = _groq_chat_request(text, stream=True)
+        try:
+            async with provider_client("groq") as client:
+                async with client.stream(
+                    "POST", LLM_URL, json=payload, headers=headers
+                ) as resp:
+                    resp.raise_for_status()
+                    async for line in resp.aiter_lines():
+                        delta = _sse_delta_content(line)
+                        if delta:
+                            _mark_first_token()
+                            yield delta
+        except (asyncio.CancelledError, GeneratorExit):
+            router.health("groq").release()
+            raise
+        except Exception as exc:
+            router.record_stream("groq", _elapsed_ms(started), ok=False)
+            if first_token_ms is not None:
+                raise
+            logging.warning("Groq stream failed before first token: %s", exc)
+            provider = "fallback"
+        else:
+            router.record_stream("groq", _elapsed_ms(started), ok=True)
+
+    if provider == "fallback":
+        if groq_configured:
+            # Groq failed or its circuit is open: route over the rest.
+            llm_result = await router.call(_llm_candidates(text, skip={"groq"}))
+        else:
+            llm_result = await _get_llm_response(text)
+        _mark_first_token()
+        yield extract_llm_text(llm_result)
+
+    logging.info(
+        "LLM stream finished provider=%s total_ms=%.1f",
+        provider,
+        _elapsed_ms(started),
+    )
 
-async def _get_llm_response(text: str) -> dict:
-    # Prefer external LLM provider if configured
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+def _llm_candidates(
+    text: str, skip: Collection[str] = ()
+) -> list[tuple[str, ProviderCall]]:
+    """Configured LLM backends in preference order: Groq, ML worker, Ollama."""
+    candidates: list[tuple[str, ProviderCall]] = []
     if LLM_URL and GROQ_API_KEY:
-        logging.info("Using external LLM provider: Groq")
-        payload = {
-            "model": GROQ_MODEL,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": (
-                        "You are Nargis, a friendly and concise "
-                        "AI productivity assistant."
-                    ),
-                },
-                {"role": "user", "content": text},
-            ],
-        }
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-        }
-        async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-            resp = await client.post(LLM_URL, json=payload, headers=headers)
-            resp.raise_for_status()
-            return resp.json()
-
-    # If ML worker is available, delegate LLM requests to it
+        candidates.append(("groq", lambda: _llm_groq(text)))
     if ML_WORKER_URL:
-        logging.info(f"Delegating LLM to ML worker at {ML_WORKER_URL}")
-        llm_url = ML_WORKER_URL.rstrip("/") + "/llm"
-        try:
-            async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-                resp = await client.post(llm_url, json={"text": text})
-                resp.raise_for_status()
-                return resp.json()
-        except Exception as e:
-            logging.exception(f"Error delegating LLM to ML worker: {e}")
+        candidates.append(("ml_worker", lambda: _llm_ml_worker(text)))
+    candidates.append(("ollama", lambda: _llm_ollama(text)))
+    return [c for c in candidates if c[0] not in skip]
 
+
+async def _llm_groq(text: str) -> dict:
+    logging.info("Using external LLM provider: Groq")
+    payload, headers = _groq_chat_request(text)
+    async with provider_client("groq") as client:
+        resp = await client.post(LLM_URL, json=payload, headers=headers)
+        resp.raise_for_status()
+        return resp.json()
+
+
+async def _llm_ml_worker(text: str) -> dict:
+    logging.info(f"Delegating LLM to ML worker at {ML_WORKER_URL}")
+    llm_url = ML_WORKER_URL.rstrip("/") + "/llm"
+    async with provider_client("ml_worker") as client:
+        resp = await client.post(llm_url, json={"text": text})
+        resp.raise_for_status()
+        return resp.json()
+
+
+async def _llm_ollama(text: str) -> dict:
     logging.info("Using local LLM (Ollama).")
-    if not ollama_client:
-        raise HTTPException(
-            status_code=503, detail="Local LLM client is not initialized."
-        )
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, run_llm_sync, text)
+    messages = [
+        {"role": "system", "content": "You are Nargis, a friendly AI assistant."},
+        {"role": "user", "content": text},
+    ]
+    return await chat_completion(messages, model=OLLAMA_MODEL)
+
+
+async def _get_llm_response(text: str) -> dict:
+    # Ollama is always last, so there is at least one candidate
+    return await get_provider_router("llm").call(_llm_candidates(text))
 
 
 def get_embedding(text: str) -> list[float]:
     """Return an embedding vector for the given text.
 
     Tries providers in order: OpenAI -> sentence-transformers local model.
-    Raises RuntimeError if no provider is available.
+    Raises RuntimeError if no provider is available. Clients and models are
+    shared process-wide; see services.embeddings.
     """
-    # Try OpenAI (synchronous client usage)
-    try:
-        from openai import OpenAI
+    from services.embeddings import get_embedding_provider
 
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY not set")
-
-        client = OpenAI(api_key=api_key)
-        model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
-        resp = client.embeddings.create(model=model, input=text)
-        return list(resp.data[0].embedding)
-    except Exception:
-        # Fall back to sentence-transformers if available
-        try:
-            from sentence_transformers import SentenceTransformer
-
-            model_name = os.getenv("SENTENCE_TRANSFORMER_MODEL", "all-MiniLM-L6-v2")
-            model = SentenceTransformer(model_name)
-            vec = model.encode(text)
-            return vec.tolist()
-        except Exception:
-            raise RuntimeError(
-                "No embedding provider available. "
-                "Install OpenAI SDK or sentence-transformers."
-            ) from None
+    return get_embedding_provider().embed(text)
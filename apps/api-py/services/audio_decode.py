@@ -0,0 +1,262 @@
+"""In-process audio decoding for local STT.
+
+Uploads (webm/opus from the browser, wav, ...) are decoded and resampled to
+16 kHz mono float32 with PyAV inside the worker thread, so local Whisper gets
+a NumPy buffer directly: no ``ffmpeg`` process per utterance and no
+intermediate WAV bytes. WAV input that is already 16 kHz mono 16-bit PCM is
+read with the stdlib ``wave`` module and skips decoding and resampling.
+
+PyAV is a base dependency. If it is missing, decoding falls back to one
+``ffmpeg`` subprocess that emits raw float32 samples. The encoders
+below turn trimmed waveforms back into upload payloads for remote STT.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import logging
+import subprocess
+import threading
+import wave
+from collections import deque
+from typing import BinaryIO
+
+import numpy as np
+
+TARGET_SAMPLE_RATE = 16000
+
+# Raw bytes (websocket frames) or a seekable file (spooled uploads).
+type AudioSource = bytes | BinaryIO
+
+
+def _open(source: AudioSource) -> BinaryIO:
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+
+def read_head(source: AudioSource, size: int = 12) -> bytes:
+    if isinstance(source, bytes):
+        return source[:size]
+    source.seek(0)
+    head = source.read(size)
+    source.seek(0)
+    return head
+
+
+def source_size(source: AudioSource) -> int:
+    if isinstance(source, bytes):
+        return len(source)
+    size = source.seek(0, io.SEEK_END)
+    source.seek(0)
+    return size
+
+
+def _is_pcm16k_mono_wav(source: AudioSource) -> bool:
+    head = read_head(source)
+    if head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+        return False
+    try:
+        with wave.open(_open(source)) as wav:
+            return (
+                wav.getframerate() == TARGET_SAMPLE_RATE
+                and wav.getnchannels() == 1
+                and wav.getsampwidth() == 2
+            )
+    except (wave.Error, EOFError):
+        return False
+
+
+def _read_pcm16k_mono(source: AudioSource) -> np.ndarray:
+    with wave.open(_open(source)) as wav:
+        frames = wav.readframes(wav.getnframes())
+    return np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def _decode_with_av(source: AudioSource) -> np.ndarray:
+    import av
+
+    resampler = av.AudioResampler(format="flt", layout="mono", rate=TARGET_SAMPLE_RATE)
+    chunks: list[np.ndarray] = []
+    try:
+        with av.open(_open(source), mode="r") as container:
+            if not container.streams.audio:
+                raise ValueError("Audio upload has no audio stream")
+            for frame in container.decode(container.streams.audio[0]):
+                for out in resampler.resample(frame):
+                    chunks.append(out.to_ndarray().reshape(-1))
+            for out in resampler.resample(None):
+                chunks.append(out.to_ndarray().reshape(-1))
+    except av.FFmpegError as exc:
+        raise ValueError(f"Could not decode audio: {exc}") from exc
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks).astype(np.float32, copy=False)
+
+
+def _decode_with_ffmpeg(source: AudioSource) -> np.ndarray:
+    command = [
+        "ffmpeg",
+        "-i",
+        "pipe:0",
+        "-f",
+        "f32le",
+        "-acodec",
+        "pcm_f32le",
+        "-ar",
+        str(TARGET_SAMPLE_RATE),
+        "-ac",
+        "1",
+        "pipe:1",
+    ]
+    try:
+        process = subprocess.run(
+            command, input=_open(source).read(), capture_output=True, check=True
+        )
+    except FileNotFoundError as exc:
+        raise RuntimeError("Missing local STT dependency: av (or ffmpeg)") from exc
+    except subprocess.CalledProcessError as e:
+        logging.error("FFmpeg error: %s", e.stderr.decode("utf-8", "replace"))
+        raise ValueError("Could not decode audio") from e
+    return np.frombuffer(process.stdout, dtype="<f4").copy()
+
+
+def decode_audio(source: AudioSource) -> np.ndarray:
+    """Decode ``source`` to a 16 kHz mono float32 waveform.
+
+    Raises ValueError for undecodable input and RuntimeError when neither
+    PyAV nor ffmpeg is available.
+    """
+    if _is_pcm16k_mono_wav(source):
+        return _read_pcm16k_mono(source)
+    if not has_pyav():
+        logging.info("PyAV not installed; decoding audio with ffmpeg")
+        return _decode_with_ffmpeg(source)
+    return _decode_with_av(source)
+
+
+def has_pyav() -> bool:
+    return importlib.util.find_spec("av") is not None
+
+
+def can_decode_in_process(source: AudioSource) -> bool:
+    """True when decoding ``source`` needs no ffmpeg subprocess."""
+    if _is_pcm16k_mono_wav(source):
+        return True
+    return has_pyav()
+
+
+class StreamDecoder:
+    """Decode a growing container stream (MediaRecorder webm) exactly once.
+
+    Chunks are pushed as they arrive. A background thread demuxes and decodes
+    them with PyAV as soon as they land, keeping the last ``keep_s`` seconds
+    at 16 kHz mono, so reading the tail is a copy rather than a re-decode of
+    everything received so far. Requires PyAV.
+    """
+
+    def __init__(self, keep_s: float):
+        self._keep = max(1, int(keep_s * TARGET_SAMPLE_RATE))
+        self._cond = threading.Condition()
+        self._data = bytearray()
+        self._eof = False
+        self._pieces: deque[np.ndarray] = deque()
+        self._kept = 0
+        self._thread: threading.Thread | None = None
+        self.failed = False
+
+    def push(self, chunk: bytes) -> None:
+        with self._cond:
+            self._data += chunk
+            self._cond.notify_all()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="stt-stream-decode", daemon=True
+                )
+                self._thread.start()
+
+    def close(self) -> None:
+        """Signal end of input; the decoder thread drains and exits."""
+        with self._cond:
+            self._eof = True
+            self._cond.notify_all()
+
+    def tail(self) -> np.ndarray:
+        with self._cond:
+            pieces = list(self._pieces)
+        if not pieces:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(pieces)[-self._keep :]
+
+    def read(self, size: int = -1) -> bytes:
+        """Blocking read for the demuxer: waits for data or ``close``."""
+        with self._cond:
+            while not self._data and not self._eof:
+                self._cond.wait()
+            n = len(self._data) if size < 0 else min(size, len(self._data))
+            out = bytes(self._data[:n])
+            del self._data[:n]
+            return out
+
+    def _append(self, samples: np.ndarray) -> None:
+        with self._cond:
+            self._pieces.append(samples)
+            self._kept += len(samples)
+            while self._pieces and self._kept - len(self._pieces[0]) >= self._keep:
+                self._kept -= len(self._pieces.popleft())
+
+    def _run(self) -> None:
+        import av
+
+        resampler = av.AudioResampler(
+            format="flt", layout="mono", rate=TARGET_SAMPLE_RATE
+        )
+        try:
+            # Small probe so decoding starts on the first chunk instead of
+            # waiting for seconds of audio to analyse.
+            with av.open(
+                self, mode="r", options={"probesize": "32", "analyzeduration": "0"}
+            ) as container:
+                if not container.streams.audio:
+                    raise ValueError("Audio stream has no audio track")
+                for frame in container.decode(container.streams.audio[0]):
+                    for out in resampler.resample(frame):
+                        self._append(out.to_ndarray().reshape(-1))
+        except (av.FFmpegError, ValueError) as exc:
+            self.failed = True
+            logging.warning("Streaming audio decode stopped: %s", exc)
+
+
+def encode_wav_pcm16(waveform: np.ndarray) -> bytes:
+    """Encode a 16 kHz mono float32 waveform as 16-bit PCM WAV."""
+    pcm = (np.clip(waveform, -1.0, 1.0) * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(TARGET_SAMPLE_RATE)
+        wav.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def encode_ogg_opus(waveform: np.ndarray) -> bytes:
+    """Encode a 16 kHz mono float32 waveform as Ogg/Opus (requires PyAV)."""
+    import av
+
+    buf = io.BytesIO()
+    with av.open(buf, mode="w", format="ogg") as container:
+        stream = container.add_stream("libopus", rate=TARGET_SAMPLE_RATE)
+        stream.layout = "mono"
+        frame = av.AudioFrame.from_ndarray(
+            np.ascontiguousarray(waveform, dtype=np.float32).reshape(1, -1),
+            format="flt",
+            layout="mono",
+        )
+        frame.sample_rate = TARGET_SAMPLE_RATE
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buf.getvalue()
@@ -0,0 +1,108 @@
+"""Streaming handling of audio uploads.
+
+``receive_audio_upload`` parses the multipart body as it arrives instead of
+letting the route buffer it. Past ``AUDIO_SPOOL_THRESHOLD_BYTES`` the file
+part is spooled to a temporary file on disk. Uploads over
+``AUDIO_MAX_UPLOAD_BYTES`` are rejected with 413: up front when
+Content-Length says so, otherwise as soon as the running byte count passes
+the limit. Either way the rest of the body is never read.
+
+``iter_upload_chunks`` reads the spooled file back in
+``AUDIO_UPLOAD_CHUNK_BYTES`` pieces, so STT providers get a streaming request
+body and the full upload is never held in memory. Each iterator keeps its
+own offset, so a hedged request can stream the same file to two providers
+at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from collections.abc import AsyncIterator
+from typing import BinaryIO
+
+from fastapi import HTTPException, Request
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+AUDIO_MAX_UPLOAD_BYTES = int(os.getenv("AUDIO_MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+AUDIO_SPOOL_THRESHOLD_BYTES = int(
+    os.getenv("AUDIO_SPOOL_THRESHOLD_BYTES", str(256 * 1024))
+)
+AUDIO_UPLOAD_CHUNK_BYTES = int(os.getenv("AUDIO_UPLOAD_CHUNK_BYTES", str(64 * 1024)))
+
+# Room for multipart boundaries and part headers around the audio itself.
+_MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+
+class _AudioMultiPartParser(MultiPartParser):
+    spool_max_size = AUDIO_SPOOL_THRESHOLD_BYTES
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Audio upload exceeds {AUDIO_MAX_UPLOAD_BYTES} bytes",
+    )
+
+
+async def _limited_stream(request: Request, limit: int) -> AsyncIterator[bytes]:
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > limit:
+            raise _too_large()
+        yield chunk
+
+
+async def receive_audio_upload(
+    request: Request, field: str = "audio_file"
+) -> UploadFile:
+    """Stream the multipart body into a spooled file and return the upload."""
+    limit = AUDIO_MAX_UPLOAD_BYTES + _MULTIPART_OVERHEAD_BYTES
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise _too_large()
+
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("multipart/form-data"):
+        raise HTTPException(status_code=422, detail=f"Missing upload field: {field}")
+
+    parser = _AudioMultiPartParser(
+        request.headers, _limited_stream(request, limit), max_files=1, max_fields=8
+    )
+    try:
+        form = await parser.parse()
+    except MultiPartException as exc:
+        raise HTTPException(status_code=400, detail=exc.message) from exc
+
+    upload = form.get(field)
+    if not isinstance(upload, UploadFile):
+        await form.close()
+        raise HTTPException(status_code=422, detail=f"Missing upload field: {field}")
+    if upload.size is not None and upload.size > AUDIO_MAX_UPLOAD_BYTES:
+        await form.close()
+        raise _too_large()
+    return upload
+
+
+_read_lock = threading.Lock()
+
+
+def _read_at(file: BinaryIO, offset: int, size: int) -> bytes:
+    with _read_lock:
+        file.seek(offset)
+        return file.read(size)
+
+
+async def iter_upload_chunks(
+    file: BinaryIO, chunk_size: int | None = None
+) -> AsyncIterator[bytes]:
+    """Yield ``file`` from the start in chunks, reading off the event loop."""
+    size = chunk_size or AUDIO_UPLOAD_CHUNK_BYTES
+    loop = asyncio.get_running_loop()
+    offset = 0
+    while chunk := await loop.run_in_executor(None, _read_at, file, offset, size):
+        offset += len(chunk)
+        yield chunk
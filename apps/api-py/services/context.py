@@ -1,17 +1,61 @@
+import os
+import threading
+import time
 from datetime import UTC, datetime
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, func, literal, select, union_all
 from sqlalchemy.orm import Session
 
 from storage.models import Habit, HabitEntry, Task, User
 
+# Agent prompts re-read the daily state on every invocation; cache it briefly
+# per user. Task/habit service writes call ``invalidate_user_context``.
+DAILY_CONTEXT_TTL_SECONDS = float(os.getenv("DAILY_CONTEXT_TTL_SECONDS", "30"))
+
+_context_cache: dict[str, tuple[float, str, str]] = {}
+_context_cache_lock = threading.Lock()
+
+
+def invalidate_user_context(user_id: str | None) -> None:
+    if not user_id:
+        return
+    with _context_cache_lock:
+        _context_cache.pop(user_id, None)
+
+
+def clear_context_cache() -> None:
+    with _context_cache_lock:
+        _context_cache.clear()
+
 
 def get_user_daily_context(db: Session, user_id: str) -> str:
-    """Build a compact daily state summary for system-prompt injection."""
-    now_iso = datetime.now(UTC).isoformat()
+    """Build a compact daily state summary for system-prompt injection.
+
+    Served from a short-TTL per-user cache; on a miss the summary is built
+    with at most two queries.
+    """
     today = datetime.now(UTC).date().isoformat()
+    now = time.monotonic()
+    with _context_cache_lock:
+        cached = _context_cache.get(user_id)
+    if cached is not None:
+        expires_at, cached_day, summary = cached
+        if now < expires_at and cached_day == today:
+            return summary
+
+    summary = _build_user_daily_context(db, user_id, today)
+    if DAILY_CONTEXT_TTL_SECONDS > 0:
+        with _context_cache_lock:
+            _context_cache[user_id] = (
+                now + DAILY_CONTEXT_TTL_SECONDS,
+                today,
+                summary,
+            )
+    return summary
 
-    user_name = db.scalar(select(User.name).where(User.id == user_id))
+
+def _build_user_daily_context(db: Session, user_id: str, today: str) -> str:
+    now_iso = datetime.now(UTC).isoformat()
 
     task_filters = (
         Task.user_id == user_id,
@@ -19,51 +63,65 @@ def get_user_daily_context(db: Session, user_id: str) -> str:
         Task.due_date.is_not(None),
         Task.due_date <= now_iso,
     )
-    pending_task_count = (
-        db.scalar(select(func.count(Task.id)).where(*task_filters)) or 0
+    unlogged_habit_join = and_(
+        HabitEntry.habit_id == Habit.id,
+        HabitEntry.date == today,
+        HabitEntry.completed.is_(True),
     )
-    pending_task_titles = db.scalars(
-        select(Task.title)
-        .where(
-            *task_filters,
+    habit_filters = (Habit.user_id == user_id, HabitEntry.id.is_(None))
+
+    # Query 1: user name plus both counts as scalar subqueries (always one row).
+    user_name, pending_task_count, pending_habit_count = db.execute(
+        select(
+            select(User.name).where(User.id == user_id).scalar_subquery(),
+            select(func.count(Task.id)).where(*task_filters).scalar_subquery(),
+            select(func.count(Habit.id))
+            .outerjoin(HabitEntry, unlogged_habit_join)
+            .where(*habit_filters)
+            .scalar_subquery(),
         )
+    ).one()
+    pending_task_count = pending_task_count or 0
+    pending_habit_count = pending_habit_count or 0
+
+    if pending_task_count == 0 and pending_habit_count == 0:
+        return "[TODAY'S STATE] Clear schedule."
+
+    # Query 2: the first few task titles and habit names in one round trip.
+    task_rows = (
+        select(
+            Task.title.label("label"),
+            Task.due_date.label("sort_key"),
+            Task.id.label("tiebreak"),
+        )
+        .where(*task_filters)
         .order_by(Task.due_date.asc(), Task.id.asc())
         .limit(3)
-    ).all()
-
-    pending_habit_query = (
-        select(Habit.name)
-        .outerjoin(
-            HabitEntry,
-            and_(
-                HabitEntry.habit_id == Habit.id,
-                HabitEntry.date == today,
-                HabitEntry.completed.is_(True),
-            ),
+        .subquery()
+    )
+    habit_rows = (
+        select(
+            Habit.name.label("label"),
+            Habit.name.label("sort_key"),
+            Habit.id.label("tiebreak"),
         )
-        .where(Habit.user_id == user_id, HabitEntry.id.is_(None))
+        .outerjoin(HabitEntry, unlogged_habit_join)
+        .where(*habit_filters)
         .order_by(Habit.name.asc())
+        .limit(5)
+        .subquery()
     )
-    pending_habit_names = db.scalars(pending_habit_query.limit(5)).all()
-    pending_habit_count = (
-        db.scalar(
-            select(func.count())
-            .select_from(Habit)
-            .outerjoin(
-                HabitEntry,
-                and_(
-                    HabitEntry.habit_id == Habit.id,
-                    HabitEntry.date == today,
-                    HabitEntry.completed.is_(True),
-                ),
-            )
-            .where(Habit.user_id == user_id, HabitEntry.id.is_(None))
+    labels = union_all(
+        select(literal("task").label("kind"), *task_rows.c),
+        select(literal("habit").label("kind"), *habit_rows.c),
+    ).subquery()
+    rows = db.execute(
+        select(labels.c.kind, labels.c.label).order_by(
+            labels.c.kind, labels.c.sort_key, labels.c.tiebreak
         )
-        or 0
-    )
-
-    if pending_task_count == 0 and pending_habit_count == 0:
-        return "[TODAY'S STATE] Clear schedule."
+    ).all()
+    pending_task_titles = [label for kind, label in rows if kind == "task"]
+    pending_habit_names = [label for kind, label in rows if kind == "habit"]
 
     parts: list[str] = []
     if user_name:
@@ -0,0 +1,262 @@
+"""Per-user conversation history for agent turns.
+
+Each agent turn (``run_agent_pipeline`` and ``chat_websocket``) is sent with
+the user's recent history: a running summary as a system message, followed
+by the newest turns that fit in ``CONVERSATION_WINDOW_TOKENS``. When a new
+turn pushes the window over budget, the oldest turns are evicted and
+summarized in a background task (``_get_llm_response``), off the request
+path. The next prompt carries the updated summary. If summarization fails,
+a clipped extractive summary is used. Either way the prompt size stays
+bounded by the window plus ``CONVERSATION_SUMMARY_TOKENS``.
+
+History lives in-process. It is LRU-bounded to ``CONVERSATION_MAX_USERS``
+users and forgotten after ``CONVERSATION_TTL_SECONDS`` of inactivity. Window
+sizes, summary runs and per-turn tool usage (for example how often
+``recall_memory`` is still needed) are reported under ``conversations`` on
+``GET /metrics``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+from utils.metrics import Histogram, register_collector
+
+CONVERSATION_WINDOW_TOKENS = int(os.getenv("CONVERSATION_WINDOW_TOKENS", "1200"))
+CONVERSATION_SUMMARY_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_TOKENS", "250"))
+CONVERSATION_MAX_USERS = int(os.getenv("CONVERSATION_MAX_USERS", "1000"))
+CONVERSATION_TTL_SECONDS = float(os.getenv("CONVERSATION_TTL_SECONDS", "3600"))
+
+# Rough, tokenizer-free estimate (~4 characters per token for English text)
+_CHARS_PER_TOKEN = 4
+
+Summarizer = Callable[[str, list[tuple[str, str]]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / _CHARS_PER_TOKEN) if text else 0
+
+
+def clip_to_tokens(text: str, max_tokens: int, *, keep_tail: bool = False) -> str:
+    limit = max(1, max_tokens * _CHARS_PER_TOKEN)
+    if len(text) <= limit:
+        return text
+    if keep_tail:
+        return "…" + text[-(limit - 1) :]
+    return text[: limit - 1] + "…"
+
+
+def _format_turns(turns: Iterable[tuple[str, str]]) -> str:
+    return "\n".join(f"{role}: {content}" for role, content in turns)
+
+
+async def _llm_summarize(summary: str, turns: list[tuple[str, str]]) -> str:
+    from services.ai_clients import _get_llm_response, extract_llm_text
+
+    prompt = (
+        "Update the running summary of a conversation between a user and "
+        "their productivity assistant. Keep names, tasks, habits, dates and "
+        f"open questions; drop pleasantries. At most {CONVERSATION_SUMMARY_TOKENS}"
+        " tokens. Reply with the summary only.\n\n"
+        f"Current summary:\n{summary or '(none)'}\n\n"
+        f"New turns:\n{_format_turns(turns)}"
+    )
+    return extract_llm_text(await _get_llm_response(prompt)).strip()
+
+
+class _Conversation:
+    def __init__(self):
+        self.turns: deque[tuple[str, str, int]] = deque()
+        self.window_tokens = 0
+        self.summary = ""
+        self.evicted: list[tuple[str, str]] = []
+        self.summarizing = False
+        self.touched = time.monotonic()
+
+
+class ConversationStore:
+    def __init__(
+        self,
+        *,
+        window_tokens: int | None = None,
+        summary_tokens: int | None = None,
+        max_users: int | None = None,
+        ttl_seconds: float | None = None,
+        summarizer: Summarizer | None = None,
+    ):
+        self.window_tokens = (
+            CONVERSATION_WINDOW_TOKENS if window_tokens is None else window_tokens
+        )
+        self.summary_tokens = (
+            CONVERSATION_SUMMARY_TOKENS if summary_tokens is None else summary_tokens
+        )
+        self.max_users = CONVERSATION_MAX_USERS if max_users is None else max_users
+        self.ttl_seconds = (
+            CONVERSATION_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        )
+        self._summarize = summarizer or _llm_summarize
+        self._lock = threading.Lock()
+        self._conversations: OrderedDict[str, _Conversation] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+        self.summaries = 0
+        self.summary_failures = 0
+        self.tool_calls: dict[str, int] = {}
+        self.turns_recorded = 0
+        self.prompt_tokens = Histogram(buckets=(100, 250, 500, 1000, 1500, 2000))
+
+    def _get(self, user_id: str, *, create: bool) -> _Conversation | None:
+        now = time.monotonic()
+        conv = self._conversations.get(user_id)
+        if conv is not None and now - conv.touched > self.ttl_seconds:
+            del self._conversations[user_id]
+            conv = None
+        if conv is None and create:
+            conv = _Conversation()
+            self._conversations[user_id] = conv
+            while len(self._conversations) > self.max_users:
+                self._conversations.popitem(last=False)
+        if conv is not None:
+            conv.touched = now
+            self._conversations.move_to_end(user_id)
+        return conv
+
+    def history(self, user_id: str) -> list[dict[str, str]]:
+        """Summary (as a system message) plus the windowed turns, oldest first."""
+        with self._lock:
+            conv = self._get(user_id, create=False)
+            if conv is None:
+                return []
+            messages: list[dict[str, str]] = []
+            if conv.summary:
+                messages.append(
+                    {
+                        "role": "system",
+                        "content": f"[CONVERSATION SUMMARY] {conv.summary}",
+                    }
+                )
+            messages.extend(
+                {"role": role, "content": content} for role, content, _ in conv.turns
+            )
+        self.prompt_tokens.observe(sum(estimate_tokens(m["content"]) for m in messages))
+        return messages
+
+    def record_turn(
+        self,
+        user_id: str,
+        user_text: str,
+        assistant_text: str,
+        *,
+        tools_used: Iterable[str] = (),
+    ) -> None:
+        """Append a completed turn; schedules summarization if the window spills."""
+        with self._lock:
+            self.turns_recorded += 1
+            for tool in tools_used:
+                self.tool_calls[tool] = self.tool_calls.get(tool, 0) + 1
+            conv = self._get(user_id, create=True)
+            assert conv is not None
+            for role, content in (("user", user_text), ("assistant", assistant_text)):
+                if not content:
+                    continue
+                content = clip_to_tokens(content, self.window_tokens // 2)
+                tokens = estimate_tokens(content)
+                conv.turns.append((role, content, tokens))
+                conv.window_tokens += tokens
+            while conv.window_tokens > self.window_tokens and len(conv.turns) > 1:
+                role, content, tokens = conv.turns.popleft()
+                conv.window_tokens -= tokens
+                conv.evicted.append((role, content))
+            schedule = bool(conv.evicted) and not conv.summarizing
+            if schedule:
+                conv.summarizing = True
+        if schedule:
+            self._schedule(conv)
+
+    def _schedule(self, conv: _Conversation) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (sync caller): fold evicted turns in extractively
+            with self._lock:
+                self._fold(conv, None)
+            return
+        task = loop.create_task(self._summarize_evicted(conv))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _summarize_evicted(self, conv: _Conversation) -> None:
+        while True:
+            with self._lock:
+                batch, conv.evicted = conv.evicted, []
+                summary = conv.summary
+                if not batch:
+                    conv.summarizing = False
+                    return
+            try:
+                new_summary = await self._summarize(summary, batch)
+                self.summaries += 1
+            except Exception:
+                logging.warning("Conversation summarization failed", exc_info=True)
+                self.summary_failures += 1
+                new_summary = None
+            with self._lock:
+                self._fold(conv, new_summary, batch)
+
+    def _fold(
+        self,
+        conv: _Conversation,
+        new_summary: str | None,
+        batch: list[tuple[str, str]] | None = None,
+    ) -> None:
+        if batch is None:
+            batch, conv.evicted = conv.evicted, []
+            conv.summarizing = False
+        if not new_summary:
+            new_summary = " ".join(
+                part for part in (conv.summary, _format_turns(batch)) if part
+            )
+        conv.summary = clip_to_tokens(new_summary, self.summary_tokens, keep_tail=True)
+
+    async def drain(self) -> None:
+        """Wait for in-flight summarization tasks (tests and shutdown)."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def clear(self, user_id: str) -> None:
+        with self._lock:
+            self._conversations.pop(user_id, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "users": len(self._conversations),
+                "turns_recorded": self.turns_recorded,
+                "summaries": self.summaries,
+                "summary_failures": self.summary_failures,
+                "summaries_pending": len(self._tasks),
+                "tool_calls": dict(self.tool_calls),
+                "history_tokens": self.prompt_tokens.snapshot(),
+            }
+
+
+# Global instance
+_store: ConversationStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ConversationStore()
+                register_collector("conversations", _store.stats)
+    return _store
@@ -0,0 +1,315 @@
+"""Content-addressed embedding cache.
+
+Keys are ``sha256(model + normalized text)``, so repeated recall queries and
+re-ingested content reuse vectors instead of re-embedding. Two tiers:
+
+- a bounded in-process LRU (``EMBEDDING_CACHE_SIZE`` entries);
+- the ``embedding_cache`` table, shared across workers and restarts, with a
+  TTL (``EMBEDDING_CACHE_TTL_DAYS``) and a row cap
+  (``EMBEDDING_CACHE_MAX_ROWS``) enforced by ``prune_embedding_cache`` at
+  startup.
+
+New vectors are written behind the request: they are buffered and a
+background thread writes everything buffered in one session every
+``EMBEDDING_CACHE_FLUSH_MS``, so an embedding call never waits on an insert
+or holds a pool connection for it. ``shutdown_embedding_cache`` writes what
+is left on shutdown.
+
+Set ``EMBEDDING_CACHE_PERSIST=0`` to keep only the in-process tier. Hit/miss
+counters are reported under ``embedding_cache`` on ``GET /metrics``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from storage.models import EmbeddingCacheEntry
+from utils.metrics import register_collector
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_TTL_DAYS = float(os.getenv("EMBEDDING_CACHE_TTL_DAYS", "30"))
+EMBEDDING_CACHE_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "100000"))
+EMBEDDING_CACHE_PERSIST = os.getenv("EMBEDDING_CACHE_PERSIST", "1") == "1"
+EMBEDDING_CACHE_FLUSH_MS = float(os.getenv("EMBEDDING_CACHE_FLUSH_MS", "1000"))
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode()).hexdigest()
+
+
+def _default_session_factory() -> AbstractContextManager[Session]:
+    from storage.database import get_session_now
+
+    return get_session_now()
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        *,
+        max_entries: int | None = None,
+        ttl_seconds: float | None = None,
+        persist: bool | None = None,
+        session_factory: Callable[[], AbstractContextManager[Session]] | None = None,
+        flush_interval_ms: float | None = None,
+    ):
+        self.max_entries = EMBEDDING_CACHE_SIZE if max_entries is None else max_entries
+        self.ttl_seconds = (
+            EMBEDDING_CACHE_TTL_DAYS * 86400 if ttl_seconds is None else ttl_seconds
+        )
+        self.persist = EMBEDDING_CACHE_PERSIST if persist is None else persist
+        self._session_factory = session_factory or _default_session_factory
+        self.flush_interval_ms = (
+            EMBEDDING_CACHE_FLUSH_MS if flush_interval_ms is None else flush_interval_ms
+        )
+        self._write_buffer: dict[str, tuple[str, list[float]]] = {}
+        self._write_lock = threading.Lock()
+        self._write_wanted = threading.Event()
+        self._closed = threading.Event()
+        self._writer: threading.Thread | None = None
+        self.flushes = 0
+        self._lru: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # In-process tier
+
+    def _lru_get(self, key: str, now: float) -> list[float] | None:
+        item = self._lru.get(key)
+        if item is None:
+            return None
+        stored_at, vector = item
+        if now - stored_at > self.ttl_seconds:
+            del self._lru[key]
+            return None
+        self._lru.move_to_end(key)
+        return vector
+
+    def _lru_put(self, key: str, vector: list[float], now: float) -> None:
+        self._lru[key] = (now, vector)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+    # Persistent tier
+
+    def _load_persistent(self, keys: list[str]) -> dict[str, list[float]]:
+        if not self.persist or not keys:
+            return {}
+        cutoff = datetime.now(UTC) - timedelta(seconds=self.ttl_seconds)
+        try:
+            with self._session_factory() as db:
+                rows = (
+                    db.query(EmbeddingCacheEntry.key, EmbeddingCacheEntry.vector)
+                    .filter(
+                        EmbeddingCacheEntry.key.in_(keys),
+                        EmbeddingCacheEntry.created_at >= cutoff,
+                    )
+                    .all()
+                )
+        except Exception:
+            logging.exception("Embedding cache lookup failed")
+            return {}
+        return {key: list(vector) for key, vector in rows}
+
+    def _store_persistent(self, model: str, entries: dict[str, list[float]]) -> None:
+        """Buffer ``entries`` for the background writer."""
+        if not self.persist or not entries:
+            return
+        with self._write_lock:
+            for key, vector in entries.items():
+                self._write_buffer[key] = (model, vector)
+            if self._writer is None and not self._closed.is_set():
+                self._writer = threading.Thread(
+                    target=self._write_loop, name="embedding-cache-writer", daemon=True
+                )
+                self._writer.start()
+        self._write_wanted.set()
+
+    def _write_loop(self) -> None:
+        while not self._closed.is_set():
+            self._write_wanted.wait()
+            # Let a burst of misses accumulate into one write
+            self._closed.wait(self.flush_interval_ms / 1000)
+            self._write_wanted.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all buffered vectors in one session; returns the row count."""
+        with self._write_lock:
+            entries, self._write_buffer = self._write_buffer, {}
+        if not entries:
+            return 0
+        now = datetime.now(UTC)
+        try:
+            with self._session_factory() as db:
+                for key, (model, vector) in entries.items():
+                    db.merge(
+                        EmbeddingCacheEntry(
+                            key=key, model=model, vector=vector, created_at=now
+                        )
+                    )
+                db.commit()
+        except Exception:
+            logging.exception("Embedding cache write failed")
+            return 0
+        with self._lock:
+            self.flushes += 1
+        return len(entries)
+
+    def close(self) -> None:
+        """Stop the writer and write what is still buffered."""
+        self._closed.set()
+        self._write_wanted.set()
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.join(timeout=5)
+        self.flush()
+
+    def get_or_compute(
+        self,
+        model: str,
+        texts: list[str],
+        compute: Callable[[list[str]], list[list[float]]],
+    ) -> list[list[float]]:
+        """Return vectors for ``texts``, computing only uncached ones.
+
+        Misses are de-duplicated and passed to ``compute`` in one batch.
+        """
+        keys = [cache_key(model, t) for t in texts]
+        found: dict[str, list[float]] = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                vector = self._lru_get(key, now)
+                if vector is not None:
+                    found[key] = vector
+            self.memory_hits += sum(1 for k in keys if k in found)
+
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        if missing:
+            # Evicted from the LRU before the writer reached them
+            with self._write_lock:
+                for key in missing:
+                    buffered = self._write_buffer.get(key)
+                    if buffered is not None:
+                        found[key] = buffered[1]
+            missing = [k for k in missing if k not in found]
+        if missing:
+            persisted = self._load_persistent(missing)
+            found.update(persisted)
+            with self._lock:
+                self.persistent_hits += sum(1 for k in keys if k in persisted)
+                for key, vector in persisted.items():
+                    self._lru_put(key, vector, now)
+
+        pending: dict[str, str] = {}
+        for key, text in zip(keys, texts, strict=True):
+            if key not in found:
+                pending.setdefault(key, text)
+        if pending:
+            vectors = compute(list(pending.values()))
+            computed = dict(zip(pending, vectors, strict=True))
+            found.update(computed)
+            with self._lock:
+                self.misses += sum(1 for k in keys if k in computed)
+                for key, vector in computed.items():
+                    self._lru_put(key, vector, now)
+            self._store_persistent(model, computed)
+        return [found[k] for k in keys]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.persistent_hits + self.misses
+            hits = self.memory_hits + self.persistent_hits
+            return {
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "memory_hits_total": self.memory_hits,
+                "persistent_hits_total": self.persistent_hits,
+                "misses_total": self.misses,
+                "evictions_total": self.evictions,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "persistent": self.persist,
+                "pending_writes": len(self._write_buffer),
+                "flushes_total": self.flushes,
+            }
+
+
+def prune_embedding_cache(
+    db: Session,
+    ttl_days: float | None = None,
+    max_rows: int | None = None,
+) -> int:
+    """Delete expired rows, then the oldest rows beyond ``max_rows``."""
+    ttl_days = EMBEDDING_CACHE_TTL_DAYS if ttl_days is None else ttl_days
+    max_rows = EMBEDDING_CACHE_MAX_ROWS if max_rows is None else max_rows
+    cutoff = datetime.now(UTC) - timedelta(days=ttl_days)
+    deleted = (
+        db.query(EmbeddingCacheEntry)
+        .filter(EmbeddingCacheEntry.created_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    total = db.query(EmbeddingCacheEntry).count()
+    if total > max_rows:
+        oldest = (
+            select(EmbeddingCacheEntry.key)
+            .order_by(EmbeddingCacheEntry.created_at.asc())
+            .limit(total - max_rows)
+        )
+        deleted += (
+            db.query(EmbeddingCacheEntry)
+            .filter(EmbeddingCacheEntry.key.in_(oldest))
+            .delete(synchronize_session=False)
+        )
+    db.commit()
+    return deleted
+
+
+# Global instance
+_cache: EmbeddingCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
+
+
+def shutdown_embedding_cache() -> None:
+    global _cache
+    cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
+
+
+register_collector("embedding_cache", lambda: get_embedding_cache().stats())
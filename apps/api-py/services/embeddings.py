@@ -0,0 +1,158 @@
+"""Process-wide embedding provider.
+
+The OpenAI client and the local sentence-transformers model are created once
+and reused, so recall no longer pays for client construction (or a full model
+load from disk) on every query. ``embed_many`` batches inputs: lists are sent
+to OpenAI in chunks of ``EMBEDDING_BATCH_SIZE`` and encoded locally in one
+``encode`` call. ``aembed``/``aembed_many`` run the blocking work in the
+default executor so async callers don't stall the event loop. Results go
+through the content-addressed cache in services.embedding_cache, keyed by the
+model that actually produced them.
+
+Configuration:
+    OPENAI_API_KEY / OPENAI_EMBEDDING_MODEL   (default text-embedding-3-small)
+    SENTENCE_TRANSFORMER_MODEL                (default all-MiniLM-L6-v2)
+    EMBEDDING_BATCH_SIZE                      (default 128)
+    PRELOAD_EMBEDDINGS=true                   load the local model at startup
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Any
+
+from services.embedding_cache import EmbeddingCache, get_embedding_cache
+
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "128"))
+
+
+class EmbeddingProvider:
+    def __init__(self, cache: EmbeddingCache | None = None):
+        self._cache = cache
+        self._lock = threading.Lock()
+        self._openai_client: Any = None
+        self._openai_api_key: str | None = None
+        self._st_model: Any = None
+        self._st_unavailable = False
+
+    @property
+    def openai_model(self) -> str:
+        return os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+
+    @property
+    def local_model_name(self) -> str:
+        return os.getenv("SENTENCE_TRANSFORMER_MODEL", "all-MiniLM-L6-v2")
+
+    def _openai(self) -> Any:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            return None
+        with self._lock:
+            if self._openai_client is None or self._openai_api_key != api_key:
+                from openai import OpenAI
+
+                self._openai_client = OpenAI(api_key=api_key)
+                self._openai_api_key = api_key
+            return self._openai_client
+
+    def _sentence_transformer(self) -> Any:
+        if self._st_model is not None or self._st_unavailable:
+            return self._st_model
+        with self._lock:
+            if self._st_model is None and not self._st_unavailable:
+                try:
+                    from sentence_transformers import SentenceTransformer
+
+                    self._st_model = SentenceTransformer(self.local_model_name)
+                    logging.info(
+                        "Loaded sentence-transformers model %s", self.local_model_name
+                    )
+                except Exception:
+                    logging.warning(
+                        "sentence-transformers model %s unavailable",
+                        self.local_model_name,
+                    )
+                    self._st_unavailable = True
+        return self._st_model
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache if self._cache is not None else get_embedding_cache()
+
+    def _embed_openai(self, client: Any, texts: list[str]) -> list[list[float]]:
+        vectors: list[list[float]] = []
+        size = max(EMBEDDING_BATCH_SIZE, 1)
+        for start in range(0, len(texts), size):
+            batch = texts[start : start + size]
+            resp = client.embeddings.create(model=self.openai_model, input=batch)
+            ordered = sorted(resp.data, key=lambda d: d.index)
+            vectors.extend(list(d.embedding) for d in ordered)
+        return vectors
+
+    def _embed_local(self, model: Any, texts: list[str]) -> list[list[float]]:
+        vectors = model.encode(texts, batch_size=max(EMBEDDING_BATCH_SIZE, 1))
+        return [v.tolist() for v in vectors]
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """Embed ``texts`` in order.
+
+        Tries providers in order: OpenAI -> sentence-transformers local model.
+        Raises RuntimeError if no provider is available.
+        """
+        if not texts:
+            return []
+        client = self._openai()
+        if client is not None:
+            try:
+                return self.cache.get_or_compute(
+                    f"openai:{self.openai_model}",
+                    texts,
+                    lambda batch: self._embed_openai(client, batch),
+                )
+            except Exception as exc:
+                logging.warning("OpenAI embeddings failed; trying local model: %s", exc)
+        model = self._sentence_transformer()
+        if model is not None:
+            try:
+                return self.cache.get_or_compute(
+                    f"st:{self.local_model_name}",
+                    texts,
+                    lambda batch: self._embed_local(model, batch),
+                )
+            except Exception:
+                logging.exception("Local embedding model failed")
+        raise RuntimeError(
+            "No embedding provider available. "
+            "Install OpenAI SDK or sentence-transformers."
+        )
+
+    def embed(self, text: str) -> list[float]:
+        return self.embed_many([text])[0]
+
+    async def aembed_many(self, texts: list[str]) -> list[list[float]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.embed_many, texts)
+
+    async def aembed(self, text: str) -> list[float]:
+        return (await self.aembed_many([text]))[0]
+
+    def warmup(self) -> None:
+        """Load the local model now instead of on the first recall."""
+        self._sentence_transformer()
+
+
+# Global instance
+_provider: EmbeddingProvider | None = None
+_provider_lock = threading.Lock()
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = EmbeddingProvider()
+    return _provider
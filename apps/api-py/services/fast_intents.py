@@ -0,0 +1,342 @@
+"""Deterministic fast path for common voice/text commands.
+
+Short imperative utterances ("add task buy milk", "log habit meditation",
+"start a 25 minute focus") are matched against a small anchored grammar and
+dispatched straight to the matching agent tool, skipping the LangGraph/LLM
+round trip. Each match carries a confidence. Anything below
+``FAST_INTENT_MIN_CONFIDENCE`` goes to the agent as before: questions, an
+argument that mentions another command, overlong arguments, out-of-range
+durations.
+
+Hit rate, fast-path latency, agent-turn latency and the estimated time saved
+(agent mean minus fast-path time, per hit) are reported under
+``fast_intents`` on ``GET /metrics``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from utils.metrics import Histogram, register_collector
+
+FAST_INTENT_ENABLED = os.getenv("FAST_INTENT_ENABLED", "1") == "1"
+FAST_INTENT_MIN_CONFIDENCE = float(os.getenv("FAST_INTENT_MIN_CONFIDENCE", "0.8"))
+
+_MAX_ARG_CHARS = 120
+_MAX_FOCUS_MINUTES = 180
+
+_NUMBER_WORDS = {
+    "five": 5,
+    "ten": 10,
+    "fifteen": 15,
+    "twenty": 20,
+    "twenty five": 25,
+    "twenty-five": 25,
+    "thirty": 30,
+    "forty": 40,
+    "forty five": 45,
+    "forty-five": 45,
+    "fifty": 50,
+    "sixty": 60,
+    "ninety": 90,
+}
+_NUMBER = r"\d{1,3}|" + "|".join(
+    sorted((re.escape(w) for w in _NUMBER_WORDS), key=len, reverse=True)
+)
+
+_PREFIX = r"(?:(?:hey |ok |okay )?nargis,?\s+)?(?:please\s+|can you\s+|could you\s+)?"
+
+_TASK_PATTERNS = (
+    re.compile(
+        _PREFIX + r"(?:add|create|new|make)\s+(?:a\s+|new\s+)*(?:task|todo|to-do)"
+        r"(?:\s+to|\s+called|\s+named)?\s*[:,-]?\s+(?P<title>.+)",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        _PREFIX + r"add\s+(?P<title>.+?)\s+to\s+(?:my\s+)?(?:tasks|task list|todo list"
+        r"|to-do list|todos)",
+        re.IGNORECASE,
+    ),
+)
+_HABIT_PATTERNS = (
+    re.compile(
+        _PREFIX + r"(?:log|track|mark|complete|check off)\s+(?:my\s+|the\s+)?habit"
+        r"\s*[:,-]?\s+(?P<name>.+?)(?:\s+as\s+(?:done|complete|completed))?",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        _PREFIX + r"(?:log|track|mark|complete|check off)\s+(?:my\s+|the\s+)?"
+        r"(?P<name>.+?)\s+habit(?:\s+as\s+(?:done|complete|completed))?",
+        re.IGNORECASE,
+    ),
+)
+_FOCUS_PATTERNS = (
+    re.compile(
+        _PREFIX + r"(?:start|begin)\s+(?:a\s+|an\s+|my\s+)?"
+        rf"(?:(?P<minutes>{_NUMBER})[\s-]*(?:minute|min)s?\s+)?"
+        r"(?:focus|pomodoro)(?:\s+session|\s+timer)?"
+        rf"(?:\s+for\s+(?P<minutes_for>{_NUMBER})\s*(?:minutes|minute|mins|min))?",
+        re.IGNORECASE,
+    ),
+)
+
+# Another command keyword or a chaining word ("then", ", then", "and then",
+# "also", "and also") inside an argument suggests a compound request
+_COMMAND_WORDS = re.compile(
+    r"\b(?:add|create|log|track|start|focus|pomodoro|habit|task|journal|remind)\b"
+    r"|\b(?:then|also)\b",
+    re.IGNORECASE,
+)
+# A due date or time in a task title is something the agent would parse
+_TEMPORAL_WORDS = re.compile(
+    r"\b(?:today|tonight|tomorrow|yesterday|next|by|on|noon|midnight|weekend"
+    r"|monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+    r"|this (?:morning|afternoon|evening|week|month))\b"
+    r"|\bat \d|\b\d{1,2}(?::\d{2})?\s*(?:am|pm)\b",
+    re.IGNORECASE,
+)
+# Negations and trailing qualifiers change what a habit command means
+_HABIT_NEGATION = re.compile(r"\b(?:not|never|undo|unmark)\b|n't\b", re.IGNORECASE)
+_HABIT_QUALIFIER = re.compile(r"\b(?:for|of|at|as|by|on|with)\b", re.IGNORECASE)
+
+
+class FastIntent:
+    def __init__(self, tool: str, args: dict[str, Any], confidence: float):
+        self.tool = tool
+        self.args = args
+        self.confidence = confidence
+
+    def __repr__(self) -> str:
+        return f"FastIntent({self.tool!r}, {self.args!r}, {self.confidence})"
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().rstrip(".!")
+
+
+def _minutes(raw: str | None) -> int | None:
+    if raw is None:
+        return None
+    raw = raw.lower()
+    return int(raw) if raw.isdigit() else _NUMBER_WORDS.get(raw)
+
+
+def _arg_confidence(value: str) -> float:
+    if not value or len(value) > _MAX_ARG_CHARS:
+        return 0.0
+    if _COMMAND_WORDS.search(value):
+        return 0.5
+    return 1.0
+
+
+def _task_confidence(title: str) -> float:
+    if _TEMPORAL_WORDS.search(title):
+        return min(_arg_confidence(title), 0.5)
+    return _arg_confidence(title)
+
+
+def _habit_confidence(name: str) -> float:
+    if _HABIT_NEGATION.search(name):
+        return 0.0
+    if _HABIT_QUALIFIER.search(name):
+        return min(_arg_confidence(name), 0.5)
+    return _arg_confidence(name)
+
+
+def match_intent(text: str) -> FastIntent | None:
+    """Return the best grammar match for ``text`` (any confidence), if any."""
+    utterance = _normalize(text)
+    if not utterance or "?" in utterance:
+        return None
+
+    for pattern in _TASK_PATTERNS:
+        if m := pattern.fullmatch(utterance):
+            title = m.group("title").strip(" \"'")
+            return FastIntent("create_task", {"title": title}, _task_confidence(title))
+
+    for pattern in _HABIT_PATTERNS:
+        if m := pattern.fullmatch(utterance):
+            name = m.group("name").strip(" \"'")
+            return FastIntent(
+                "log_habit",
+                {"habit_name": name, "status": True},
+                _habit_confidence(name),
+            )
+
+    for pattern in _FOCUS_PATTERNS:
+        if m := pattern.fullmatch(utterance):
+            minutes = _minutes(m.group("minutes"))
+            if minutes is None:
+                minutes = _minutes(m.group("minutes_for"))
+            if minutes is None:
+                return FastIntent("start_focus", {"duration_minutes": 25}, 1.0)
+            confidence = 1.0 if 1 <= minutes <= _MAX_FOCUS_MINUTES else 0.0
+            return FastIntent("start_focus", {"duration_minutes": minutes}, confidence)
+
+    return None
+
+
+def parse_fast_intent(text: str) -> FastIntent | None:
+    """``match_intent`` filtered by ``FAST_INTENT_MIN_CONFIDENCE``."""
+    if not FAST_INTENT_ENABLED:
+        return None
+    intent = match_intent(text)
+    if intent is None or intent.confidence < FAST_INTENT_MIN_CONFIDENCE:
+        get_fast_intent_stats().record_miss(intent)
+        return None
+    return intent
+
+
+def _tools() -> dict[str, Any]:
+    from agent.tools import create_task_tool, log_habit_tool, start_focus_tool
+
+    return {
+        "create_task": create_task_tool,
+        "log_habit": log_habit_tool,
+        "start_focus": start_focus_tool,
+    }
+
+
+async def _invoke_tool(
+    tool_obj: Any, args: dict[str, Any], config: dict[str, Any]
+) -> Any:
+    # safe_tool yields a LangChain tool, or the bare function without langchain
+    coroutine = getattr(tool_obj, "coroutine", None)
+    if callable(coroutine):
+        return await coroutine(config=config, **args)
+    return await tool_obj(config=config, **args)
+
+
+class FastIntentUnresolved(Exception):
+    """The tool ran but could not resolve its target; let the agent handle it."""
+
+
+def _unresolved(intent: FastIntent, output: Any) -> bool:
+    # log_habit matches habits by exact name; the agent can disambiguate
+    return (
+        intent.tool == "log_habit"
+        and isinstance(output, str)
+        and output.endswith("not found.")
+    )
+
+
+def _response_text(intent: FastIntent, output: Any) -> str:
+    if intent.tool == "create_task" and isinstance(output, dict):
+        return f"Added task: {output.get('title') or intent.args['title']}."
+    return str(output)
+
+
+async def run_fast_intent(
+    intent: FastIntent, user_id: str, db: Session
+) -> tuple[str, str]:
+    """Run the intent's tool; returns ``(tool_result, response_text)``.
+
+    The tools are async (see agent.tools). The services commit their own
+    writes; a failed tool is rolled back. Raises ``FastIntentUnresolved`` when
+    the tool could not find its target (e.g. an unknown habit name).
+    """
+    started = time.perf_counter()
+    config = {"configurable": {"user_id": user_id, "db": db}}
+    tool_obj = _tools()[intent.tool]
+    try:
+        output = await _invoke_tool(tool_obj, intent.args, config)
+    except Exception:
+        db.rollback()
+        get_fast_intent_stats().record_error(intent)
+        raise
+    if _unresolved(intent, output):
+        get_fast_intent_stats().record_unresolved(intent)
+        raise FastIntentUnresolved(str(output))
+    if isinstance(output, (dict, list)):
+        tool_result = json.dumps(output, default=str)
+    else:
+        tool_result = str(output)
+    get_fast_intent_stats().record_hit(intent, (time.perf_counter() - started) * 1000)
+    return tool_result, _response_text(intent, output)
+
+
+class FastIntentStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits: dict[str, int] = {}
+        self.misses = 0
+        self.low_confidence = 0
+        self.errors = 0
+        self.unresolved = 0
+        self.saved_ms_total = 0.0
+        self.fast_path_ms = Histogram()
+        self.agent_turn_ms = Histogram(buckets=(250, 500, 1000, 2000, 4000, 8000))
+        self._agent_ms_sum = 0.0
+        self._agent_turns = 0
+
+    def record_hit(self, intent: FastIntent, elapsed_ms: float) -> None:
+        self.fast_path_ms.observe(elapsed_ms)
+        with self._lock:
+            self.hits[intent.tool] = self.hits.get(intent.tool, 0) + 1
+            if self._agent_turns:
+                agent_mean = self._agent_ms_sum / self._agent_turns
+                self.saved_ms_total += max(0.0, agent_mean - elapsed_ms)
+
+    def record_miss(self, intent: FastIntent | None) -> None:
+        with self._lock:
+            if intent is None:
+                self.misses += 1
+            else:
+                self.low_confidence += 1
+
+    def record_error(self, intent: FastIntent) -> None:
+        logging.warning("Fast-path tool %s failed; falling back", intent.tool)
+        with self._lock:
+            self.errors += 1
+
+    def record_unresolved(self, intent: FastIntent) -> None:
+        logging.info("Fast-path %s unresolved; using the agent", intent.tool)
+        with self._lock:
+            self.unresolved += 1
+
+    def record_agent_turn(self, elapsed_ms: float) -> None:
+        self.agent_turn_ms.observe(elapsed_ms)
+        with self._lock:
+            self._agent_ms_sum += elapsed_ms
+            self._agent_turns += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            hits = sum(self.hits.values())
+            total = (
+                hits + self.misses + self.low_confidence + self.errors + self.unresolved
+            )
+            return {
+                "hits": dict(self.hits),
+                "misses": self.misses,
+                "low_confidence": self.low_confidence,
+                "errors": self.errors,
+                "unresolved": self.unresolved,
+                "hit_rate": round(hits / total, 3) if total else 0.0,
+                "estimated_saved_ms_total": round(self.saved_ms_total, 1),
+                "fast_path_ms": self.fast_path_ms.snapshot(),
+                "agent_turn_ms": self.agent_turn_ms.snapshot(),
+            }
+
+
+# Global instance
+_stats: FastIntentStats | None = None
+_stats_lock = threading.Lock()
+
+
+def get_fast_intent_stats() -> FastIntentStats:
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = FastIntentStats()
+                register_collector("fast_intents", _stats.stats)
+    return _stats
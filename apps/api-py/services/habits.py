@@ -5,84 +5,181 @@ from datetime import UTC, datetime
 from datetime import date as date_cls
 from typing import Any
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from services.context import invalidate_user_context
+from storage.database import run_in_session
 from storage.models import Habit, HabitEntry
 
 
-def _compute_streaks(entries: list[HabitEntry]) -> dict[str, int]:
-    if not entries:
-        return {"currentStreak": 0, "bestStreak": 0}
-
-    # Convert entries to a set of date objects for easier lookup
+def _completed_dates(entries: list[HabitEntry]) -> set[date_cls]:
     # entries have .date as "YYYY-MM-DD" string
     completed_dates = set()
     for e in entries:
         if e.completed:
             try:
-                d = datetime.strptime(e.date, "%Y-%m-%d").date()
-                completed_dates.add(d)
+                completed_dates.add(datetime.strptime(e.date, "%Y-%m-%d").date())
             except ValueError:
                 continue  # Skip invalid dates
+    return completed_dates
+
 
+def _streak_counters(
+    completed_dates: set[date_cls],
+) -> tuple[int, int, date_cls | None]:
+    """Return (run ending at the last completion, best run, last completion)."""
     if not completed_dates:
-        return {"currentStreak": 0, "bestStreak": 0}
+        return 0, 0, None
+    ordered = sorted(completed_dates)
+    run = best = 1
+    for prev, curr in zip(ordered, ordered[1:], strict=False):
+        run = run + 1 if curr.toordinal() == prev.toordinal() + 1 else 1
+        best = max(best, run)
+    return run, best, ordered[-1]
 
+
+def _current_streak(run: int, last_completed: date_cls | None) -> int:
     # Use local date (date.today) for streak calculation. Using UTC here
     # can shift the perceived "today" across timezones and break tests.
-    today = date_cls.today()
-
-    # Current Streak
-    current_streak = 0
-    check_date = today
-
-    # If today is not completed, check if yesterday was completed (forgiving streak)
-    if check_date not in completed_dates:
-        check_date = check_date.fromordinal(check_date.toordinal() - 1)
-        if check_date not in completed_dates:
-            # Neither today nor yesterday completed -> streak broken
-            current_streak = 0
-        else:
-            # Yesterday completed, so streak is alive
-            pass
-
-    # Count backwards from the valid check_date
-    if check_date in completed_dates:
-        while check_date in completed_dates:
-            current_streak += 1
-            check_date = check_date.fromordinal(check_date.toordinal() - 1)
-
-    # Best Streak
-    best_streak = 0
-    running_streak = 0
-    sorted_dates = sorted(list(completed_dates))
-
-    if sorted_dates:
-        running_streak = 1
-        best_streak = 1
-        for i in range(1, len(sorted_dates)):
-            prev = sorted_dates[i - 1]
-            curr = sorted_dates[i]
-            if curr.toordinal() == prev.toordinal() + 1:
-                running_streak += 1
-            else:
-                running_streak = 1
-            best_streak = max(best_streak, running_streak)
-
-    return {"currentStreak": current_streak, "bestStreak": best_streak}
-
-
-def habit_to_dict(h: Habit) -> dict:
-    # Build history from related entries if loaded/available
+    # The streak stays alive until a full day is missed (forgiving streak).
+    if last_completed is None:
+        return 0
+    days_since = date_cls.today().toordinal() - last_completed.toordinal()
+    return run if 0 <= days_since <= 1 else 0
+
+
+def _compute_streaks(entries: list[HabitEntry]) -> dict[str, int]:
+    """Recompute streaks from a full entry history (repair/backfill path)."""
+    run, best, last = _streak_counters(_completed_dates(entries))
+    return {"currentStreak": _current_streak(run, last), "bestStreak": best}
+
+
+def _parse_day(value: str | None) -> date_cls | None:
+    if not value:
+        return None
     try:
-        entries: list[HabitEntry] = list(getattr(h, "entries", []) or [])
-    except Exception:
-        entries = []
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def recompute_habit_streaks(db: Session, h: Habit) -> None:
+    """Rebuild the persisted streak counters for ``h`` from its entries."""
+    entries = db.query(HabitEntry).filter(HabitEntry.habit_id == h.id).all()
+    run, best, last = _streak_counters(_completed_dates(entries))
+    h.current_streak = run
+    h.best_streak = best
+    h.last_completed_date = last.isoformat() if last else None
+
+
+def _apply_entry_completion(
+    db: Session, h: Habit, day: str, was_completed: bool, completed: bool
+) -> None:
+    """Update the streak counters for a single entry's completion change.
+
+    Completing the day right after ``last_completed_date`` extends the run
+    and starting a new day resets it, both in O(1). Anything that edits the
+    past (un-completing a day, out-of-order dates) falls back to a rebuild.
+    """
+    if was_completed == completed:
+        return
+    day_value = _parse_day(day)
+    last = _parse_day(h.last_completed_date)
+    if not completed or day_value is None or (last and last >= day_value):
+        db.flush()
+        recompute_habit_streaks(db, h)
+        return
+    if last is not None and last.toordinal() == day_value.toordinal() - 1:
+        run = int(h.current_streak or 0) + 1
+    else:
+        run = 1
+    h.current_streak = run
+    h.best_streak = max(int(h.best_streak or 0), run)
+    h.last_completed_date = day
+
+
+def backfill_habit_streaks(db: Session, user_id: str | None = None) -> int:
+    """Recompute streak counters for every habit (optionally one user's).
+
+    Only the (habit_id, date) pairs of completed entries are read, in one
+    streamed query. Returns the number of habits updated.
+    """
+    q = db.query(Habit)
+    if user_id:
+        q = q.filter(Habit.user_id == user_id)
+    habits = {h.id: h for h in q.all()}
+    if not habits:
+        return 0
+    dates: dict[str, set[date_cls]] = {hid: set() for hid in habits}
+    rows = (
+        db.query(HabitEntry.habit_id, HabitEntry.date)
+        .filter(HabitEntry.habit_id.in_(list(habits)), HabitEntry.completed.is_(True))
+        .yield_per(1000)
+    )
+    for habit_id, day in rows:
+        parsed = _parse_day(day)
+        if parsed is not None:
+            dates[habit_id].add(parsed)
+    for hid, h in habits.items():
+        run, best, last = _streak_counters(dates[hid])
+        h.current_streak = run
+        h.best_streak = best
+        h.last_completed_date = last.isoformat() if last else None
+    db.commit()
+    return len(habits)
+
+
+def _load_entries_by_habit(
+    db: Session, habit_ids: list[str], since: str | None = None
+) -> dict[str, list[HabitEntry]]:
+    """Fetch entries for all ``habit_ids`` in one query, grouped by habit."""
+    grouped: dict[str, list[HabitEntry]] = {hid: [] for hid in habit_ids}
+    if not habit_ids:
+        return grouped
+    q = db.query(HabitEntry).filter(HabitEntry.habit_id.in_(habit_ids))
+    if since is not None:
+        q = q.filter(HabitEntry.date >= since)
+    rows = q.order_by(HabitEntry.habit_id, HabitEntry.date).all()
+    for entry in rows:
+        grouped[entry.habit_id].append(entry)
+    return grouped
+
+
+def _history_cutoff(history_days: int | None) -> str | None:
+    if history_days is None:
+        return None
+    start = date_cls.today().toordinal() - max(int(history_days), 1) + 1
+    return date_cls.fromordinal(start).isoformat()
+
+
+def habit_to_dict(
+    h: Habit,
+    entries: list[HabitEntry] | None = None,
+    *,
+    history_days: int | None = None,
+) -> dict:
+    """Serialize a habit.
+
+    ``entries`` feeds ``history`` (see ``_load_entries_by_habit``); when
+    omitted the ``h.entries`` relationship is used. ``history_days`` trims
+    ``history`` to the trailing N days (today included). Streaks come from the
+    persisted counters, so they never depend on how much history is loaded.
+    """
+    if entries is None:
+        try:
+            entries = list(getattr(h, "entries", []) or [])
+        except Exception:
+            entries = []
+    cutoff = _history_cutoff(history_days)
     history = [
         {"date": e.date, "count": int(e.count or 0), "completed": bool(e.completed)}
         for e in sorted(entries, key=lambda x: x.date, reverse=False)
+        if cutoff is None or e.date >= cutoff
     ]
-    streaks = _compute_streaks(entries)
+    current = _current_streak(
+        int(h.current_streak or 0), _parse_day(h.last_completed_date)
+    )
     return {
         "id": h.id,
         "userId": h.user_id,
@@ -93,9 +190,9 @@ def habit_to_dict(h: Habit) -> dict:
         "color": h.color,
         "createdAt": h.created_at.isoformat() if h.created_at else None,
         "updatedAt": h.updated_at.isoformat() if h.updated_at else None,
-        "streak": streaks.get("currentStreak", 0),
-        "currentStreak": streaks.get("currentStreak", 0),
-        "bestStreak": streaks.get("bestStreak", 0),
+        "streak": current,
+        "currentStreak": current,
+        "bestStreak": int(h.best_streak or 0),
         "history": history,
     }
 
@@ -114,6 +211,7 @@ def create_habit_service(payload: dict[str, Any], user_id: str, db: Session) ->
     )
     db.add(habit)
     db.commit()
+    invalidate_user_context(user_id)
     db.refresh(habit)
     return habit_to_dict(habit)
 
@@ -126,6 +224,7 @@ def list_habits_service(
     offset: int = 0,
     sort: str = "created_at",
     order: str = "desc",
+    history_days: int | None = None,
 ) -> list[dict]:
     sort_map = {
         "created_at": Habit.created_at,
@@ -141,20 +240,37 @@ def list_habits_service(
     if limit:
         q = q.limit(int(limit))
     results = q.all()
-    return [habit_to_dict(h) for h in results]
+    entries = _load_entries_by_habit(
+        db, [h.id for h in results], since=_history_cutoff(history_days)
+    )
+    return [habit_to_dict(h, entries[h.id], history_days=history_days) for h in results]
+
+
+def _habit_detail(h: Habit, db: Session, history_days: int | None = None) -> dict:
+    """Serialize one habit, loading only ``history_days`` of entries if set."""
+    since = _history_cutoff(history_days)
+    entries = _load_entries_by_habit(db, [h.id], since=since)[h.id]
+    return habit_to_dict(h, entries, history_days=history_days)
 
 
-def get_habit_service(habit_id: str, user_id: str, db: Session) -> dict | None:
+def get_habit_service(
+    habit_id: str, user_id: str, db: Session, *, history_days: int | None = None
+) -> dict | None:
     h = db.query(Habit).filter(Habit.id == habit_id).first()
     if not h:
         return None
     if h.user_id != user_id:
         return None
-    return habit_to_dict(h)
+    return _habit_detail(h, db, history_days)
 
 
 def update_habit_service(
-    habit_id: str, patch: dict[str, Any], user_id: str, db: Session
+    habit_id: str,
+    patch: dict[str, Any],
+    user_id: str,
+    db: Session,
+    *,
+    history_days: int | None = None,
 ) -> dict | None:
     h = db.query(Habit).filter(Habit.id == habit_id).first()
     if not h:
@@ -173,8 +289,9 @@ def update_habit_service(
         h.color = patch["color"]
     h.updated_at = datetime.now(UTC)
     db.commit()
+    invalidate_user_context(user_id)
     db.refresh(h)
-    return habit_to_dict(h)
+    return _habit_detail(h, db, history_days)
 
 
 def delete_habit_service(habit_id: str, user_id: str, db: Session) -> bool:
@@ -185,11 +302,17 @@ def delete_habit_service(habit_id: str, user_id: str, db: Session) -> bool:
         return False
     db.delete(h)
     db.commit()
+    invalidate_user_context(user_id)
     return True
 
 
 def update_habit_count_service(
-    habit_id: str, payload: dict[str, Any], user_id: str, db: Session
+    habit_id: str,
+    payload: dict[str, Any],
+    user_id: str,
+    db: Session,
+    *,
+    history_days: int | None = None,
 ) -> dict | None:
     h = db.query(Habit).filter(Habit.id == habit_id).first()
     if not h:
@@ -206,6 +329,7 @@ def update_habit_count_service(
     if not entry:
         entry = HabitEntry(habit_id=habit_id, date=today, count=0, completed=False)
         db.add(entry)
+    was_completed = bool(entry.completed)
     if "count" in payload and payload["count"] is not None:
         entry.count = int(payload["count"])
     elif "delta" in payload and payload["delta"] is not None:
@@ -217,8 +341,96 @@ def update_habit_count_service(
         entry.completed = bool((entry.count or 0) >= int(h.target or 1))
     except Exception:
         entry.completed = bool((entry.count or 0) > 0)
+    _apply_entry_completion(db, h, today, was_completed, entry.completed)
     entry.updated_at = datetime.now(UTC)
     h.updated_at = datetime.now(UTC)
     db.commit()
+    invalidate_user_context(user_id)
     db.refresh(h)
-    return habit_to_dict(h)
+    return _habit_detail(h, db, history_days)
+
+
+# Async variants for AsyncSession callers (see storage.database.run_in_session).
+
+
+async def create_habit_service_async(
+    payload: dict[str, Any], user_id: str, db: Session | AsyncSession
+) -> dict:
+    return await run_in_session(db, lambda s: create_habit_service(payload, user_id, s))
+
+
+async def list_habits_service_async(
+    user_id: str,
+    db: Session | AsyncSession,
+    *,
+    limit: int | None = None,
+    offset: int = 0,
+    sort: str = "created_at",
+    order: str = "desc",
+    history_days: int | None = None,
+) -> list[dict]:
+    return await run_in_session(
+        db,
+        lambda s: list_habits_service(
+            user_id,
+            s,
+            limit=limit,
+            offset=offset,
+            sort=sort,
+            order=order,
+            history_days=history_days,
+        ),
+    )
+
+
+async def get_habit_service_async(
+    habit_id: str,
+    user_id: str,
+    db: Session | AsyncSession,
+    *,
+    history_days: int | None = None,
+) -> dict | None:
+    return await run_in_session(
+        db,
+        lambda s: get_habit_service(habit_id, user_id, s, history_days=history_days),
+    )
+
+
+async def update_habit_service_async(
+    habit_id: str,
+    patch: dict[str, Any],
+    user_id: str,
+    db: Session | AsyncSession,
+    *,
+    history_days: int | None = None,
+) -> dict | None:
+    return await run_in_session(
+        db,
+        lambda s: update_habit_service(
+            habit_id, patch, user_id, s, history_days=history_days
+        ),
+    )
+
+
+async def delete_habit_service_async(
+    habit_id: str, user_id: str, db: Session | AsyncSession
+) -> bool:
+    return await run_in_session(
+        db, lambda s: delete_habit_service(habit_id, user_id, s)
+    )
+
+
+async def update_habit_count_service_async(
+    habit_id: str,
+    payload: dict[str, Any],
+    user_id: str,
+    db: Session | AsyncSession,
+    *,
+    history_days: int | None = None,
+) -> dict | None:
+    return await run_in_session(
+        db,
+        lambda s: update_habit_count_service(
+            habit_id, payload, user_id, s, history_days=history_days
+        ),
+    )
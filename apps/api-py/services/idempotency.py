@@ -4,8 +4,10 @@ import uuid
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from storage.database import run_in_session
 from storage.models import IdempotencyKey
 
 
@@ -65,3 +67,28 @@ def prune_old_keys(db: Session, max_age_hours: int = 24) -> int:
     )
     db.commit()
     return deleted_count
+
+
+async def get_idempotent_response_async(
+    db: Session | AsyncSession, key: str, user_id: str | None, method: str, path: str
+) -> dict[str, Any] | None:
+    return await run_in_session(
+        db, lambda s: get_idempotent_response(s, key, user_id, method, path)
+    )
+
+
+async def save_idempotent_response_async(
+    db: Session | AsyncSession,
+    key: str,
+    user_id: str | None,
+    method: str,
+    path: str,
+    status_code: int,
+    response: dict[str, Any],
+) -> None:
+    await run_in_session(
+        db,
+        lambda s: save_idempotent_response(
+            s, key, user_id, method, path, status_code, response
+        ),
+    )
@@ -4,8 +4,10 @@ import uuid
 from datetime import UTC, datetime
 from typing import Any
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from storage.database import run_in_session
 from storage.models import JournalEntry
 
 
@@ -152,3 +154,59 @@ def generate_summary_service(entry_id: str, user_id: str, db: Session) -> dict |
     db.commit()
     db.refresh(e)
     return entry_to_dict(e)
+
+
+# Async variants for AsyncSession callers (see storage.database.run_in_session).
+
+
+async def create_entry_service_async(
+    payload: dict[str, Any], user_id: str, db: Session | AsyncSession
+) -> dict:
+    return await run_in_session(db, lambda s: create_entry_service(payload, user_id, s))
+
+
+async def list_entries_service_async(
+    user_id: str,
+    db: Session | AsyncSession,
+    *,
+    limit: int | None = None,
+    offset: int = 0,
+    sort: str = "created_at",
+    order: str = "desc",
+) -> list[dict]:
+    return await run_in_session(
+        db,
+        lambda s: list_entries_service(
+            user_id, s, limit=limit, offset=offset, sort=sort, order=order
+        ),
+    )
+
+
+async def get_entry_service_async(
+    entry_id: str, user_id: str, db: Session | AsyncSession
+) -> dict | None:
+    return await run_in_session(db, lambda s: get_entry_service(entry_id, user_id, s))
+
+
+async def update_entry_service_async(
+    entry_id: str, patch: dict[str, Any], user_id: str, db: Session | AsyncSession
+) -> dict | None:
+    return await run_in_session(
+        db, lambda s: update_entry_service(entry_id, patch, user_id, s)
+    )
+
+
+async def delete_entry_service_async(
+    entry_id: str, user_id: str, db: Session | AsyncSession
+) -> bool:
+    return await run_in_session(
+        db, lambda s: delete_entry_service(entry_id, user_id, s)
+    )
+
+
+async def generate_summary_service_async(
+    entry_id: str, user_id: str, db: Session | AsyncSession
+) -> dict | None:
+    return await run_in_session(
+        db, lambda s: generate_summary_service(entry_id, user_id, s)
+    )
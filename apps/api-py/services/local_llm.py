@@ -0,0 +1,145 @@
+"""Async client for the local OpenAI-compatible LLM (Ollama).
+
+Requests go over the pooled ``ollama`` httpx client (see
+services.provider_clients), so no executor thread is tied up while the
+model generates. A local model is CPU/GPU bound, so admission is limited:
+
+- at most ``OLLAMA_MAX_CONCURRENCY`` requests are sent to the model at once;
+- up to ``OLLAMA_MAX_QUEUE`` more wait for a slot;
+- beyond that, requests are rejected right away with 503 and a
+  ``Retry-After`` estimate (``ProviderBusyError``). Overload fails fast
+  instead of piling up.
+
+Queue depth, in-flight count, rejections and queue-wait times are reported
+under ``local_llm`` on ``GET /metrics``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from services.provider_clients import provider_client
+from services.provider_router import ProviderBusyError
+from utils.metrics import Histogram, register_collector
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1")
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2"))
+OLLAMA_MAX_QUEUE = int(os.getenv("OLLAMA_MAX_QUEUE", "8"))
+# Retry-After used until a few requests have completed
+OLLAMA_RETRY_AFTER_SECONDS = int(os.getenv("OLLAMA_RETRY_AFTER_SECONDS", "5"))
+
+
+class LocalLLMLimiter:
+    def __init__(
+        self,
+        *,
+        max_concurrency: int | None = None,
+        max_queue: int | None = None,
+    ):
+        self.max_concurrency = max(
+            1, OLLAMA_MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        )
+        self.max_queue = max(0, OLLAMA_MAX_QUEUE if max_queue is None else max_queue)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.completed = 0
+        self._avg_latency_s: float | None = None
+        self.queue_wait_ms = Histogram(buckets=(1, 10, 100, 1000, 5000, 30000))
+
+    def _ensure_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def retry_after_s(self) -> int:
+        """Rough time for the current backlog to drain."""
+        if self._avg_latency_s is None:
+            return OLLAMA_RETRY_AFTER_SECONDS
+        backlog = self.waiting + self.in_flight
+        return max(1, math.ceil(self._avg_latency_s * backlog / self.max_concurrency))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one model slot; raises ProviderBusyError if the queue is full."""
+        semaphore = self._ensure_semaphore()
+        if semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            logging.warning(
+                "Local LLM queue full (in_flight=%d waiting=%d); rejecting",
+                self.in_flight,
+                self.waiting,
+            )
+            raise ProviderBusyError(
+                "Local LLM is busy, retry later", self.retry_after_s()
+            )
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.queue_wait_ms.observe((started - queued_at) * 1000)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+            self._observe_latency(time.perf_counter() - started)
+
+    def _observe_latency(self, seconds: float) -> None:
+        self.completed += 1
+        if self._avg_latency_s is None:
+            self._avg_latency_s = seconds
+        else:
+            self._avg_latency_s = 0.8 * self._avg_latency_s + 0.2 * seconds
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "completed_total": self.completed,
+            "rejected_total": self.rejected,
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
+
+
+# Global instance
+_limiter: LocalLLMLimiter | None = None
+_limiter_lock = threading.Lock()
+
+
+def get_local_llm_limiter() -> LocalLLMLimiter:
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = LocalLLMLimiter()
+                register_collector("local_llm", _limiter.stats)
+    return _limiter
+
+
+async def chat_completion(messages: list[dict], *, model: str) -> dict:
+    """POST ``/chat/completions`` to the local model within the limiter."""
+    url = OLLAMA_BASE_URL.rstrip("/") + "/chat/completions"
+    async with get_local_llm_limiter().slot():
+        async with provider_client("ollama") as client:
+            resp = await client.post(url, json={"model": model, "messages": messages})
+            resp.raise_for_status()
+            return resp.json()
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import logging
+import os
 from datetime import UTC, datetime
 from typing import Any, cast
 
-from sqlalchemy import select, text
+from sqlalchemy import Select, select, text
 from sqlalchemy.orm import Session
 
 from storage.models import Memory
@@ -23,6 +25,14 @@ except Exception:
     PgVector: Any = None
     PGVECTOR_VALUE_AVAILABLE = False
 
+# Query-time ANN tuning (Postgres/pgvector only; see the memories vector index
+# migration). Higher ef_search/probes trade latency for recall. Iterative scans
+# (pgvector >= 0.8) keep walking the index until enough rows pass the user_id
+# filter instead of returning short result sets.
+MEMORY_HNSW_EF_SEARCH = int(os.getenv("MEMORY_HNSW_EF_SEARCH", "40"))
+MEMORY_IVFFLAT_PROBES = int(os.getenv("MEMORY_IVFFLAT_PROBES", "10"))
+MEMORY_ITERATIVE_SCAN = os.getenv("MEMORY_ITERATIVE_SCAN", "relaxed_order").lower()
+
 
 def _mem_to_dict(m: Memory) -> dict[str, Any]:
     return {
@@ -85,6 +95,42 @@ def create_memory(
         raise
 
 
+def _apply_ann_search_settings(db: Session, limit: int) -> None:
+    """Set pgvector scan knobs for the current transaction (Postgres only)."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    settings = [
+        ("hnsw.ef_search", max(MEMORY_HNSW_EF_SEARCH, limit)),
+        ("ivfflat.probes", MEMORY_IVFFLAT_PROBES),
+    ]
+    if MEMORY_ITERATIVE_SCAN in ("relaxed_order", "strict_order"):
+        settings.append(("hnsw.iterative_scan", MEMORY_ITERATIVE_SCAN))
+        settings.append(("ivfflat.iterative_scan", MEMORY_ITERATIVE_SCAN))
+    for name, value in settings:
+        try:
+            # Savepoint so an unknown setting (older pgvector) can't abort
+            # the surrounding transaction.
+            with db.begin_nested():
+                db.execute(
+                    text("SELECT set_config(:name, :value, true)"),
+                    {"name": name, "value": str(value)},
+                )
+        except Exception:
+            logging.debug("pgvector setting %s unsupported; skipping", name)
+
+
+def _vector_search_stmt(user_id: str, qparam: Any, limit: int) -> Select:
+    # ORDER BY must be the bare distance operator (ascending) for the planner
+    # to use the HNSW/IVFFlat index; tie-breaks happen in Python.
+    distance = Memory.embedding.cosine_distance(qparam).label("distance")
+    return (
+        select(Memory, distance)
+        .where(Memory.user_id == user_id)
+        .order_by(distance)
+        .limit(limit)
+    )
+
+
 def search_memories(
     db: Session,
     user_id: str,
@@ -105,19 +151,21 @@ def search_memories(
                 except Exception:
                     qparam = query_vector
 
-            similarity = (1 - Memory.embedding.cosine_distance(qparam)).label(
-                "similarity"
-            )
-            stmt = (
-                select(Memory, similarity)
-                .where(Memory.user_id == user_id)
-                .order_by(similarity.desc(), Memory.created_at.desc(), Memory.id.desc())
-                .limit(limit)
-            )
+            _apply_ann_search_settings(db, limit)
+            stmt = _vector_search_stmt(user_id, qparam, limit)
             vector_rows = [
-                (row[0], float(row[1]) if row[1] is not None else None)
+                (row[0], 1 - float(row[1]) if row[1] is not None else None)
                 for row in db.execute(stmt).all()
             ]
+            # Iterative index scans may return rows slightly out of order.
+            vector_rows.sort(
+                key=lambda r: (
+                    r[1] if r[1] is not None else float("-inf"),
+                    r[0].created_at or datetime.min,
+                    r[0].id,
+                ),
+                reverse=True,
+            )
 
             if vector_rows:
                 top_similarity = vector_rows[0][1]
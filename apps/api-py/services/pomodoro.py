@@ -4,8 +4,10 @@ import uuid
 from datetime import UTC, datetime
 from typing import Any
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from storage.database import run_in_session
 from storage.models import PomodoroSession
 
 
@@ -116,3 +118,55 @@ def delete_session_service(session_id: str, user_id: str, db: Session) -> bool:
     db.delete(s)
     db.commit()
     return True
+
+
+# Async variants for AsyncSession callers (see storage.database.run_in_session).
+
+
+async def create_session_service_async(
+    payload: dict[str, Any], user_id: str, db: Session | AsyncSession
+) -> dict:
+    return await run_in_session(
+        db, lambda s: create_session_service(payload, user_id, s)
+    )
+
+
+async def list_sessions_service_async(
+    user_id: str,
+    db: Session | AsyncSession,
+    *,
+    limit: int | None = None,
+    offset: int = 0,
+    sort: str = "created_at",
+    order: str = "desc",
+) -> list[dict]:
+    return await run_in_session(
+        db,
+        lambda s: list_sessions_service(
+            user_id, s, limit=limit, offset=offset, sort=sort, order=order
+        ),
+    )
+
+
+async def get_session_service_async(
+    session_id: str, user_id: str, db: Session | AsyncSession
+) -> dict | None:
+    return await run_in_session(
+        db, lambda s: get_session_service(session_id, user_id, s)
+    )
+
+
+async def update_session_service_async(
+    session_id: str, patch: dict[str, Any], user_id: str, db: Session | AsyncSession
+) -> dict | None:
+    return await run_in_session(
+        db, lambda s: update_session_service(session_id, patch, user_id, s)
+    )
+
+
+async def delete_session_service_async(
+    session_id: str, user_id: str, db: Session | AsyncSession
+) -> bool:
+    return await run_in_session(
+        db, lambda s: delete_session_service(session_id, user_id, s)
+    )
@@ -0,0 +1,219 @@
+"""Token-budgeted assembly of the agent prompt.
+
+The agent prompt is built from sections (core instructions, today's state,
+conversation summary), the conversation messages and the tool schemas the
+provider sends alongside them. ``assemble_prompt`` measures each part and
+keeps the total within ``PROMPT_TOKEN_BUDGET``:
+
+- **Order.** Stable sections come first, in a fixed order, so the leading
+  bytes of every request are identical and provider-side prefix caching
+  can apply. Volatile sections (daily state, summary) follow.
+- **Trimming.** Over budget, the oldest history messages are dropped first
+  (the summary covers them). Then trimmable sections are clipped, lowest
+  ``priority`` first, down to their ``min_tokens``. The newest message and
+  non-trimmable sections are never cut.
+
+Token counts are estimated (services.conversation.estimate_tokens); no
+tokenizer is required. Per-section counts are logged for every prompt and
+aggregated under ``prompt_budget`` on ``GET /metrics``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from services.conversation import clip_to_tokens, estimate_tokens
+from utils.metrics import Histogram, register_collector
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "4000"))
+
+
+class PromptSection:
+    def __init__(
+        self,
+        name: str,
+        text: str,
+        *,
+        stable: bool = False,
+        trimmable: bool = True,
+        priority: int = 0,
+        min_tokens: int = 0,
+    ):
+        self.name = name
+        self.text = text
+        self.stable = stable
+        self.trimmable = trimmable
+        self.priority = priority
+        self.min_tokens = min_tokens
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+class PromptAssembly:
+    def __init__(
+        self,
+        system_text: str,
+        messages: list[Any],
+        section_tokens: dict[str, int],
+        trimmed: list[str],
+        budget_tokens: int,
+    ):
+        self.system_text = system_text
+        self.messages = messages
+        self.section_tokens = section_tokens
+        self.trimmed = trimmed
+        self.budget_tokens = budget_tokens
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.section_tokens.values())
+
+
+def message_text(message: Any) -> str:
+    if isinstance(message, dict):
+        content = message.get("content", "")
+    else:
+        content = getattr(message, "content", "")
+    return content if isinstance(content, str) else str(content)
+
+
+def tool_schema_tokens(tools: Iterable[Any]) -> int:
+    """Estimated tokens the provider spends on the tools' JSON schemas."""
+    total = 0
+    for tool in tools:
+        schema: Any = {}
+        args_schema = getattr(tool, "args_schema", None)
+        if hasattr(args_schema, "model_json_schema"):
+            schema = args_schema.model_json_schema()
+        payload = {
+            "name": getattr(tool, "name", getattr(tool, "__name__", "")),
+            "description": getattr(tool, "description", None)
+            or getattr(tool, "__doc__", None)
+            or "",
+            "parameters": schema,
+        }
+        total += estimate_tokens(json.dumps(payload))
+    return total
+
+
+def assemble_prompt(
+    sections: Sequence[PromptSection],
+    messages: Sequence[Any],
+    *,
+    tool_tokens: int = 0,
+    budget_tokens: int | None = None,
+) -> PromptAssembly:
+    """Order, measure and trim the prompt parts to fit the budget."""
+    budget = PROMPT_TOKEN_BUDGET if budget_tokens is None else budget_tokens
+    ordered = [s for s in sections if s.stable] + [s for s in sections if not s.stable]
+    texts = {s.name: s.text for s in ordered}
+    history = list(messages)
+    trimmed: list[str] = []
+
+    def total() -> int:
+        return (
+            tool_tokens
+            + sum(estimate_tokens(t) for t in texts.values() if t)
+            + sum(estimate_tokens(message_text(m)) for m in history)
+        )
+
+    dropped = 0
+    while total() > budget and len(history) > 1:
+        history.pop(0)
+        dropped += 1
+    if dropped:
+        trimmed.append(f"history:{dropped}")
+
+    for section in sorted(
+        (s for s in ordered if s.trimmable), key=lambda s: s.priority
+    ):
+        overflow = total() - budget
+        if overflow <= 0:
+            break
+        current = estimate_tokens(texts[section.name])
+        target = max(section.min_tokens, current - overflow)
+        if target >= current:
+            continue
+        texts[section.name] = (
+            clip_to_tokens(texts[section.name], target) if target > 0 else ""
+        )
+        trimmed.append(section.name)
+
+    section_tokens = {"tools": tool_tokens}
+    section_tokens.update({name: estimate_tokens(t) for name, t in texts.items()})
+    section_tokens["messages"] = sum(estimate_tokens(message_text(m)) for m in history)
+    assembly = PromptAssembly(
+        "\n".join(t for t in texts.values() if t),
+        history,
+        section_tokens,
+        trimmed,
+        budget,
+    )
+    get_prompt_budget_stats().observe(assembly)
+    return assembly
+
+
+class PromptBudgetStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total_tokens = Histogram(buckets=(500, 1000, 2000, 3000, 4000, 6000))
+        self.section_sums: dict[str, int] = {}
+        self.prompts = 0
+        self.trimmed_prompts = 0
+        self.over_budget = 0
+
+    def observe(self, assembly: PromptAssembly) -> None:
+        total = assembly.total_tokens
+        self.total_tokens.observe(total)
+        with self._lock:
+            self.prompts += 1
+            self.trimmed_prompts += bool(assembly.trimmed)
+            self.over_budget += total > assembly.budget_tokens
+            for name, tokens in assembly.section_tokens.items():
+                self.section_sums[name] = self.section_sums.get(name, 0) + tokens
+        logging.info(
+            "Prompt tokens total=%d budget=%d sections=%s trimmed=%s",
+            total,
+            assembly.budget_tokens,
+            assembly.section_tokens,
+            assembly.trimmed or "-",
+            extra={"prompt_tokens": assembly.section_tokens},
+        )
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            prompts = self.prompts
+            return {
+                "prompts": prompts,
+                "trimmed_prompts": self.trimmed_prompts,
+                "over_budget": self.over_budget,
+                "avg_section_tokens": {
+                    name: round(tokens / prompts, 1)
+                    for name, tokens in self.section_sums.items()
+                }
+                if prompts
+                else {},
+                "total_tokens": self.total_tokens.snapshot(),
+            }
+
+
+# Global instance
+_stats: PromptBudgetStats | None = None
+_stats_lock = threading.Lock()
+
+
+def get_prompt_budget_stats() -> PromptBudgetStats:
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = PromptBudgetStats()
+                register_collector("prompt_budget", _stats.stats)
+    return _stats
@@ -0,0 +1,141 @@
+"""Long-lived HTTP clients for the STT/LLM providers.
+
+Each provider (Deepgram, Groq, ML worker, local Ollama) gets its own
+``httpx.AsyncClient`` with a keep-alive connection pool so voice turns reuse
+warm TCP/TLS connections instead of paying a fresh handshake per call. The registry is
+started and closed by the app lifespan; outside of it (scripts, tests without
+lifespan) callers transparently get a one-shot client with the same settings.
+
+Pool limits and timeouts are configurable per provider, e.g.::
+
+    DEEPGRAM_HTTP_MAX_CONNECTIONS=20
+    DEEPGRAM_HTTP_MAX_KEEPALIVE=10
+    DEEPGRAM_HTTP_KEEPALIVE_EXPIRY_SECONDS=30
+    DEEPGRAM_HTTP_CONNECT_TIMEOUT_SECONDS=5
+    DEEPGRAM_HTTP_TIMEOUT_SECONDS=60
+    DEEPGRAM_HTTP_ENABLE_HTTP2=1
+
+Unprefixed ``PROVIDER_HTTP_*`` variables set the defaults for all providers.
+HTTP/2 is only negotiated when the optional ``h2`` package is installed.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import httpx
+
+PROVIDERS = ("deepgram", "groq", "ml_worker", "ollama")
+
+_DEFAULT_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "60"))
+
+
+def _provider_setting(provider: str, key: str, default: str) -> str:
+    specific = os.getenv(f"{provider.upper()}_HTTP_{key}")
+    if specific is not None and specific.strip():
+        return specific.strip()
+    shared = os.getenv(f"PROVIDER_HTTP_{key}")
+    if shared is not None and shared.strip():
+        return shared.strip()
+    return default
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class ProviderClientSettings:
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.max_connections = int(_provider_setting(provider, "MAX_CONNECTIONS", "20"))
+        self.max_keepalive = int(_provider_setting(provider, "MAX_KEEPALIVE", "10"))
+        self.keepalive_expiry = float(
+            _provider_setting(provider, "KEEPALIVE_EXPIRY_SECONDS", "30")
+        )
+        self.connect_timeout = float(
+            _provider_setting(provider, "CONNECT_TIMEOUT_SECONDS", "5")
+        )
+        default_timeout = str(_DEFAULT_TIMEOUT_SECONDS)
+        self.timeout = float(
+            _provider_setting(provider, "TIMEOUT_SECONDS", default_timeout)
+        )
+        wants_http2 = _provider_setting(provider, "ENABLE_HTTP2", "1") == "1"
+        self.http2 = wants_http2 and _http2_available()
+
+    def client_kwargs(self) -> dict:
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "timeout": httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            "http2": self.http2,
+        }
+
+
+class ProviderClientRegistry:
+    def __init__(self):
+        self._settings: dict[str, ProviderClientSettings] = {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    @property
+    def started(self) -> bool:
+        return bool(self._clients)
+
+    def settings(self, provider: str) -> ProviderClientSettings:
+        if provider not in self._settings:
+            self._settings[provider] = ProviderClientSettings(provider)
+        return self._settings[provider]
+
+    def _build_client(self, provider: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(**self.settings(provider).client_kwargs())
+
+    async def start(self) -> None:
+        if self.started:
+            return
+        for provider in PROVIDERS:
+            self._clients[provider] = self._build_client(provider)
+        logging.info(
+            "Provider HTTP clients ready: %s",
+            ", ".join(f"{p}(http2={self.settings(p).http2})" for p in self._clients),
+        )
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception:
+                logging.exception("Failed to close provider HTTP client")
+
+    @asynccontextmanager
+    async def client(self, provider: str) -> AsyncIterator[httpx.AsyncClient]:
+        """Yield the pooled client for ``provider`` (or a one-shot fallback)."""
+        pooled = self._clients.get(provider)
+        if pooled is not None:
+            yield pooled
+            return
+        async with self._build_client(provider) as transient:
+            yield transient
+
+
+# Global instance
+_registry: ProviderClientRegistry | None = None
+
+
+def get_provider_clients() -> ProviderClientRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ProviderClientRegistry()
+    return _registry
+
+
+def provider_client(provider: str):
+    """Shortcut for ``get_provider_clients().client(provider)``."""
+    return get_provider_clients().client(provider)
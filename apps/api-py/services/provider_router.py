@@ -0,0 +1,360 @@
+"""Health-tracked routing across STT/LLM backends.
+
+Every provider call goes through a ``ProviderRouter``, which keeps a rolling
+window of latencies and outcomes for each backend:
+
+- **Circuit breaker.** A backend's circuit opens after
+  ``ROUTER_FAILURE_THRESHOLD`` consecutive failures, or when its error rate
+  over the window reaches ``ROUTER_ERROR_RATE_THRESHOLD`` (with at least
+  ``ROUTER_MIN_SAMPLES`` calls). An open backend is skipped for
+  ``ROUTER_OPEN_SECONDS``. After that it gets a single half-open trial call:
+  success closes the circuit, failure re-opens it.
+- **Fallback.** Backends are tried in the configured preference order. A
+  failure falls through to the next healthy one, and the last error is
+  raised if all fail.
+- **Hedging.** With ``ROUTER_HEDGE=1``, if the first backend has not
+  answered within its rolling p95 (clamped to ``ROUTER_HEDGE_MIN_MS`` ..
+  ``ROUTER_HEDGE_MAX_MS``, or ``ROUTER_HEDGE_DEFAULT_MS`` before enough
+  samples), the next backend is started too. The first success wins and the
+  loser is cancelled.
+
+Per-provider health and the most recent routing decisions are served by
+``GET /providers`` (routers/system.py) and summarized under
+``provider_router`` on ``GET /metrics``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+
+from fastapi import HTTPException
+
+from utils.metrics import register_collector
+
+ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", "50"))
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "10"))
+ROUTER_FAILURE_THRESHOLD = int(os.getenv("ROUTER_FAILURE_THRESHOLD", "3"))
+ROUTER_ERROR_RATE_THRESHOLD = float(os.getenv("ROUTER_ERROR_RATE_THRESHOLD", "0.5"))
+ROUTER_OPEN_SECONDS = float(os.getenv("ROUTER_OPEN_SECONDS", "30"))
+ROUTER_HEDGE = os.getenv("ROUTER_HEDGE", "0") == "1"
+ROUTER_HEDGE_DEFAULT_MS = float(os.getenv("ROUTER_HEDGE_DEFAULT_MS", "2000"))
+ROUTER_HEDGE_MIN_MS = float(os.getenv("ROUTER_HEDGE_MIN_MS", "250"))
+ROUTER_HEDGE_MAX_MS = float(os.getenv("ROUTER_HEDGE_MAX_MS", "10000"))
+ROUTER_DECISION_LOG_SIZE = int(os.getenv("ROUTER_DECISION_LOG_SIZE", "50"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+ProviderCall = Callable[[], Awaitable[Any]]
+
+
+class ProviderBusyError(HTTPException):
+    """A provider shed load before doing any work (503 with Retry-After).
+
+    The router falls through to the next provider without counting this
+    against the busy provider's health.
+    """
+
+    def __init__(self, detail: str, retry_after_s: int):
+        super().__init__(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(retry_after_s)},
+        )
+
+
+def _percentile(values: Sequence[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+class ProviderHealth:
+    """Rolling latency/outcome window and circuit state for one backend."""
+
+    def __init__(self, name: str, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._samples: deque[tuple[float, bool]] = deque(maxlen=ROUTER_WINDOW)
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+
+    def _refresh(self) -> None:
+        if (
+            self.state == OPEN
+            and self.opened_at is not None
+            and self._clock() - self.opened_at >= ROUTER_OPEN_SECONDS
+        ):
+            self.state = HALF_OPEN
+            self._trial_in_flight = False
+
+    def acquire(self) -> bool:
+        """Whether a call may be sent now; reserves the half-open trial."""
+        with self._lock:
+            self._refresh()
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def available(self) -> bool:
+        with self._lock:
+            self._refresh()
+            return self.state == CLOSED or (
+                self.state == HALF_OPEN and not self._trial_in_flight
+            )
+
+    def record(self, latency_ms: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((latency_ms, ok))
+            if ok:
+                self.consecutive_failures = 0
+                self.state = CLOSED
+                self.opened_at = None
+            else:
+                self.consecutive_failures += 1
+                if self.state == HALF_OPEN or self._should_open():
+                    if self.state != OPEN:
+                        logging.warning("Provider circuit opened: %s", self.name)
+                    self.state = OPEN
+                    self.opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Give back a reserved trial without recording (call was cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _should_open(self) -> bool:
+        if self.consecutive_failures >= ROUTER_FAILURE_THRESHOLD:
+            return True
+        if len(self._samples) < ROUTER_MIN_SAMPLES:
+            return False
+        return self._error_rate() >= ROUTER_ERROR_RATE_THRESHOLD
+
+    def _error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def p95_ms(self) -> float | None:
+        with self._lock:
+            ok = [latency for latency, success in self._samples if success]
+            if len(ok) < ROUTER_MIN_SAMPLES:
+                return None
+            return _percentile(ok, 95)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            ok = [latency for latency, success in self._samples if success]
+            p50 = _percentile(ok, 50)
+            p95 = _percentile(ok, 95)
+            return {
+                "state": self.state,
+                "samples": len(self._samples),
+                "error_rate": round(self._error_rate(), 3),
+                "consecutive_failures": self.consecutive_failures,
+                "p50_ms": round(p50, 1) if p50 is not None else None,
+                "p95_ms": round(p95, 1) if p95 is not None else None,
+            }
+
+
+class ProviderRouter:
+    def __init__(
+        self,
+        kind: str,
+        *,
+        hedge: bool | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.kind = kind
+        self.hedge = ROUTER_HEDGE if hedge is None else hedge
+        self._clock = clock
+        self._health: dict[str, ProviderHealth] = {}
+        self._lock = threading.Lock()
+        self._decisions: deque[dict[str, Any]] = deque(maxlen=ROUTER_DECISION_LOG_SIZE)
+
+    def health(self, name: str) -> ProviderHealth:
+        with self._lock:
+            if name not in self._health:
+                self._health[name] = ProviderHealth(name, self._clock)
+            return self._health[name]
+
+    def hedge_delay_s(self, name: str) -> float:
+        p95 = self.health(name).p95_ms()
+        delay_ms = ROUTER_HEDGE_DEFAULT_MS if p95 is None else p95
+        return min(max(delay_ms, ROUTER_HEDGE_MIN_MS), ROUTER_HEDGE_MAX_MS) / 1000
+
+    async def _attempt(self, name: str, call: ProviderCall) -> Any:
+        health = self.health(name)
+        started = self._clock()
+        try:
+            result = await call()
+        except (asyncio.CancelledError, ProviderBusyError):
+            health.release()
+            raise
+        except Exception:
+            health.record((self._clock() - started) * 1000, ok=False)
+            raise
+        health.record((self._clock() - started) * 1000, ok=True)
+        return result
+
+    async def _race(
+        self,
+        first: tuple[str, ProviderCall],
+        second: tuple[str, ProviderCall],
+        on_hedge: Callable[[], None],
+    ) -> tuple[str, Any]:
+        """Run ``first``; start ``second`` if it is slower than its p95.
+
+        ``on_hedge`` runs when ``second`` is started, so the caller accounts
+        for it even if both attempts then fail.
+        """
+        tasks = {asyncio.ensure_future(self._attempt(*first)): first[0]}
+        done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay_s(first[0]))
+        if not done and self.health(second[0]).acquire():
+            on_hedge()
+            tasks[asyncio.ensure_future(self._attempt(*second))] = second[0]
+        pending = set(tasks)
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return tasks[task], task.result()
+                    error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        assert error is not None
+        raise error
+
+    async def call(self, candidates: Sequence[tuple[str, ProviderCall]]) -> Any:
+        """Call the first healthy candidate, falling back in order."""
+        started = self._clock()
+        decision = self._new_decision([name for name, _ in candidates])
+        queue = list(candidates)
+        last_error: BaseException | None = None
+        try:
+            while queue:
+                name, call = queue.pop(0)
+                if not self.health(name).acquire():
+                    decision["skipped"].append(name)
+                    continue
+                decision["attempted"].append(name)
+                backup = next((c for c in queue if self.health(c[0]).available()), None)
+
+                def on_hedge(backup=backup) -> None:
+                    assert backup is not None
+                    decision["hedged"] = True
+                    decision["attempted"].append(backup[0])
+                    queue.remove(backup)
+
+                try:
+                    if self.hedge and backup is not None:
+                        winner, result = await self._race(
+                            (name, call), backup, on_hedge
+                        )
+                    else:
+                        winner, result = name, await self._attempt(name, call)
+                except Exception as exc:
+                    logging.warning(
+                        "%s provider %s failed: %s", self.kind, name, exc or type(exc)
+                    )
+                    last_error = exc
+                    continue
+                decision["chosen"] = winner
+                decision["outcome"] = "ok"
+                return result
+            if last_error is not None:
+                decision["outcome"] = "error"
+                raise last_error
+            decision["outcome"] = "no_provider"
+            raise HTTPException(
+                status_code=503, detail=f"No {self.kind} backend available"
+            )
+        finally:
+            decision["latency_ms"] = round((self._clock() - started) * 1000, 1)
+            self._decisions.append(decision)
+
+    def record_stream(self, name: str, latency_ms: float, ok: bool) -> None:
+        """Record a streamed call made outside ``call`` (after ``acquire``)."""
+        self.health(name).record(latency_ms, ok)
+        decision = self._new_decision([name])
+        decision.update(
+            attempted=[name],
+            chosen=name if ok else None,
+            outcome="ok" if ok else "error",
+            stream=True,
+            latency_ms=round(latency_ms, 1),
+        )
+        self._decisions.append(decision)
+
+    def _new_decision(self, configured: list[str]) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "at": time.time(),
+            "configured": configured,
+            "skipped": [],
+            "attempted": [],
+            "hedged": False,
+            "chosen": None,
+            "outcome": "cancelled",
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            names = list(self._health)
+        return {
+            "hedge": self.hedge,
+            "providers": {name: self.health(name).snapshot() for name in names},
+            "recent_decisions": list(self._decisions),
+        }
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            names = list(self._health)
+        return {name: self.health(name).snapshot() for name in names}
+
+
+# Global instances
+_routers: dict[str, ProviderRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_provider_router(kind: str) -> ProviderRouter:
+    with _routers_lock:
+        if kind not in _routers:
+            _routers[kind] = ProviderRouter(kind)
+        return _routers[kind]
+
+
+def provider_router_snapshot() -> dict[str, Any]:
+    with _routers_lock:
+        routers = dict(_routers)
+    return {kind: router.snapshot() for kind, router in routers.items()}
+
+
+register_collector(
+    "provider_router",
+    lambda: {kind: r.summary() for kind, r in list(_routers.items())},
+)
@@ -0,0 +1,206 @@
+"""Incremental transcription for chunked websocket audio.
+
+A ``StreamingSTTSession`` is a local stand-in for a Deepgram live
+connection. Audio chunks are fed as they arrive. Every
+``STT_PARTIAL_INTERVAL_MS`` of new audio, the last ``STT_PARTIAL_WINDOW_S``
+seconds of the buffer are transcribed in the background and handed to
+``on_partial`` (the websocket sends it as a ``partial_transcript`` frame).
+Partials of a longer utterance start with "…", so the cost of each partial
+stays bounded however long the user talks. A partial is skipped while the
+shared Whisper batcher has queued or running work, so partials never delay
+another stream's final transcript. ``finish`` returns the final transcript as
+soon as the last chunk lands: the audio is already on the server, so there
+is no upload-then-wait gap.
+
+Two encodings are accepted:
+
+- ``linear16``: raw little-endian 16-bit mono PCM at ``sample_rate``;
+- ``webm`` (or any container ``decode_audio`` understands): MediaRecorder
+  timeslices, where each prefix of the stream is decodable. With PyAV, an
+  ``audio_decode.StreamDecoder`` decodes each chunk once as it arrives and
+  partials read its tail; without it, each partial decodes the whole prefix.
+
+Partials need the local Whisper model (``ENABLE_LOCAL_STT=1``). Without it,
+only the final transcript is produced, through the regular
+``_get_transcription`` provider chain (VAD, Deepgram, ML worker, local).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections.abc import Awaitable, Callable
+
+import numpy as np
+from fastapi import HTTPException
+
+from services import ai_clients
+from services.audio_decode import (
+    TARGET_SAMPLE_RATE,
+    StreamDecoder,
+    decode_audio,
+    encode_wav_pcm16,
+    has_pyav,
+)
+from services.audio_upload import AUDIO_MAX_UPLOAD_BYTES
+
+STT_PARTIAL_INTERVAL_MS = int(os.getenv("STT_PARTIAL_INTERVAL_MS", "800"))
+STT_PARTIAL_WINDOW_S = float(os.getenv("STT_PARTIAL_WINDOW_S", "6"))
+
+PartialCallback = Callable[[str], Awaitable[None]]
+WaveformTranscriber = Callable[[np.ndarray], Awaitable[str]]
+BusyCheck = Callable[[], bool]
+
+
+async def _local_transcribe(waveform: np.ndarray) -> str:
+    await ai_clients.ensure_stt_loaded()
+    return await ai_clients.get_stt_batcher().transcribe(waveform)
+
+
+def _local_stt_busy() -> bool:
+    return ai_clients.get_stt_batcher().pending > 0
+
+
+class StreamingSTTSession:
+    def __init__(
+        self,
+        on_partial: PartialCallback,
+        *,
+        encoding: str = "webm",
+        sample_rate: int = TARGET_SAMPLE_RATE,
+        transcribe_partial: WaveformTranscriber | None = None,
+        partial_interval_ms: int | None = None,
+        partial_window_s: float | None = None,
+        is_busy: BusyCheck | None = None,
+    ):
+        self.encoding = encoding.lower()
+        self.sample_rate = sample_rate
+        self._on_partial = on_partial
+        if transcribe_partial is None and ai_clients.ENABLE_LOCAL_STT:
+            transcribe_partial = _local_transcribe
+            is_busy = is_busy or _local_stt_busy
+        self._transcribe_partial = transcribe_partial
+        self._is_busy = is_busy
+        interval = (
+            STT_PARTIAL_INTERVAL_MS
+            if partial_interval_ms is None
+            else partial_interval_ms
+        )
+        self._partial_interval_s = max(interval, 1) / 1000
+        self._partial_window_s = (
+            STT_PARTIAL_WINDOW_S if partial_window_s is None else partial_window_s
+        )
+        self._decoder: StreamDecoder | None = None
+        if transcribe_partial is not None and not self.is_pcm and has_pyav():
+            self._decoder = StreamDecoder(self._partial_window_s)
+        self._chunks: list[bytes] = []
+        self._size = 0
+        self._last_partial_s = 0.0
+        self._last_partial_text = ""
+        self._partial_task: asyncio.Task | None = None
+
+    @property
+    def is_pcm(self) -> bool:
+        return self.encoding in {"linear16", "pcm", "pcm16"}
+
+    def _duration_s(self) -> float:
+        if self.is_pcm:
+            return self._size / 2 / self.sample_rate
+        # Container audio: estimate from bytes received (~32 kbit/s opus);
+        # only used to pace partials.
+        return self._size / 4000
+
+    def _waveform(self, window_s: float | None = None) -> np.ndarray:
+        """Decode the buffer, or only its last ``window_s`` seconds."""
+        if not self.is_pcm and self._decoder is not None and window_s is not None:
+            return self._decoder.tail()
+        data = b"".join(self._chunks)
+        if not self.is_pcm:
+            # A container suffix is not decodable on its own: decode it all,
+            # then keep the tail so inference cost stays bounded.
+            waveform = decode_audio(data)
+            if window_s is not None:
+                waveform = waveform[-int(window_s * TARGET_SAMPLE_RATE) :]
+            return waveform
+        if window_s is not None:
+            data = data[-int(window_s * self.sample_rate) * 2 :]
+        pcm = np.frombuffer(data[: len(data) // 2 * 2], dtype="<i2")
+        waveform = pcm.astype(np.float32) / 32768.0
+        if self.sample_rate != TARGET_SAMPLE_RATE and len(waveform):
+            n_out = round(len(waveform) * TARGET_SAMPLE_RATE / self.sample_rate)
+            positions = np.linspace(0, len(waveform) - 1, n_out)
+            waveform = np.interp(positions, np.arange(len(waveform)), waveform)
+            waveform = waveform.astype(np.float32)
+        return waveform
+
+    async def feed(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self._size += len(chunk)
+        if self._size > AUDIO_MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="Audio stream too long")
+        self._chunks.append(chunk)
+        if self._decoder is not None:
+            self._decoder.push(chunk)
+        if (
+            self._transcribe_partial is not None
+            and self._partial_task is None
+            and self._duration_s() - self._last_partial_s >= self._partial_interval_s
+        ):
+            self._last_partial_s = self._duration_s()
+            self._partial_task = asyncio.create_task(self._emit_partial())
+
+    async def _emit_partial(self) -> None:
+        assert self._transcribe_partial is not None
+        try:
+            if self._is_busy is not None and self._is_busy():
+                return
+            window_s = self._partial_window_s
+            truncated = self._duration_s() > window_s
+            loop = asyncio.get_running_loop()
+            waveform = await loop.run_in_executor(None, self._waveform, window_s)
+            text = (await self._transcribe_partial(waveform)).strip()
+            if text and truncated:
+                text = f"… {text}"
+            if text and text != self._last_partial_text:
+                self._last_partial_text = text
+                await self._on_partial(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logging.warning("Partial transcription failed", exc_info=True)
+        finally:
+            self._partial_task = None
+
+    async def _cancel_partial(self) -> None:
+        task = self._partial_task
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def finish(self) -> str:
+        """Stop partials and return the final transcript.
+
+        Raises NoSpeechError (from the VAD stage) for silent streams.
+        """
+        await self._cancel_partial()
+        if self._decoder is not None:
+            self._decoder.close()
+        if self.is_pcm:
+            loop = asyncio.get_running_loop()
+            waveform = await loop.run_in_executor(None, self._waveform)
+            audio = encode_wav_pcm16(waveform)
+        else:
+            audio = b"".join(self._chunks)
+        self._chunks.clear()
+        return await ai_clients._get_transcription(audio)
+
+    async def aclose(self) -> None:
+        await self._cancel_partial()
+        if self._decoder is not None:
+            self._decoder.close()
+        self._chunks.clear()
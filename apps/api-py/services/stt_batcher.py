@@ -0,0 +1,164 @@
+"""Dynamic micro-batching for local Whisper inference.
+
+Concurrent local-STT requests are queued. A single worker collects them for up
+to ``STT_BATCH_MAX_WAIT_MS`` (or until ``STT_BATCH_MAX_SIZE`` waveforms are
+queued) and runs them through the processor and model as one padded batch,
+then resolves each caller with its own transcript. Batches run on a dedicated
+single-thread executor so model calls never overlap. ``pending`` counts the
+requests queued or in flight, so optional work (streaming partials) can yield
+to final transcriptions.
+
+Batch sizes are reported under ``stt_batcher`` on ``GET /metrics``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from utils.metrics import Histogram, register_collector
+
+STT_BATCH_MAX_SIZE = int(os.getenv("STT_BATCH_MAX_SIZE", "8"))
+STT_BATCH_MAX_WAIT_MS = float(os.getenv("STT_BATCH_MAX_WAIT_MS", "10"))
+
+BatchInference = Callable[[list[Any]], list[str]]
+
+
+class STTBatcher:
+    def __init__(
+        self,
+        infer_batch: BatchInference,
+        *,
+        max_batch_size: int | None = None,
+        max_wait_ms: float | None = None,
+    ):
+        self._infer_batch = infer_batch
+        self.max_batch_size = max(
+            1, STT_BATCH_MAX_SIZE if max_batch_size is None else max_batch_size
+        )
+        self.max_wait_ms = STT_BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="stt-batch"
+        )
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.batch_sizes = Histogram(buckets=(1, 2, 4, 8, 16, 32))
+        self.requests = 0
+        self._in_flight = 0
+
+    @property
+    def pending(self) -> int:
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return queued + self._in_flight
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop or self._worker is None:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def transcribe(self, waveform: Any) -> str:
+        """Queue one 16 kHz mono waveform and wait for its transcript."""
+        queue = self._ensure_worker()
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        await queue.put((waveform, future))
+        return await future
+
+    async def _collect(self, queue: asyncio.Queue) -> list[tuple[Any, Any]]:
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect(queue)
+            waveforms = [item[0] for item in batch]
+            self.batch_sizes.observe(len(batch))
+            self.requests += len(batch)
+            self._in_flight = len(batch)
+            try:
+                texts = await loop.run_in_executor(
+                    self._executor, self._infer_batch, waveforms
+                )
+                if len(texts) != len(batch):
+                    raise RuntimeError(
+                        f"STT batch returned {len(texts)} results for {len(batch)}"
+                    )
+            except Exception as exc:
+                logging.exception("Batched STT inference failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            finally:
+                self._in_flight = 0
+            for (_, future), text in zip(batch, texts, strict=True):
+                if not future.done():
+                    future.set_result(text)
+
+    async def aclose(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+        self._worker = None
+        self._queue = None
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "requests_total": self.requests,
+            "pending": self.pending,
+            "batch_size": self.batch_sizes.snapshot(),
+        }
+
+
+# Global instance
+_batcher: STTBatcher | None = None
+_batcher_lock = threading.Lock()
+
+
+def get_stt_batcher() -> STTBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                from services.ai_clients import run_stt_batch_sync
+
+                _batcher = STTBatcher(run_stt_batch_sync)
+                register_collector("stt_batcher", _batcher.stats)
+    return _batcher
+
+
+async def shutdown_stt_batcher() -> None:
+    global _batcher
+    batcher, _batcher = _batcher, None
+    if batcher is not None:
+        await batcher.aclose()
@@ -4,12 +4,26 @@ import uuid
 from datetime import UTC, datetime
 from typing import Any
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from services.context import invalidate_user_context
+from storage.database import run_in_session
 from storage.models import Task
 
 
-def task_to_dict(t: Task) -> dict:
+def task_to_dict(t: Task, children: dict[str, list[Task]] | None = None) -> dict:
+    """Serialize a task and its subtasks.
+
+    When ``children`` (parent id -> subtasks, see ``_load_subtask_map``) is
+    given, the tree is assembled from it instead of lazy-loading
+    ``t.subtasks`` one level at a time.
+    """
+    if children is not None:
+        subtasks = children.get(t.id, [])
+    else:
+        subtasks = t.subtasks or []
     return {
         "id": t.id,
         "userId": t.user_id,
@@ -22,10 +36,36 @@ def task_to_dict(t: Task) -> dict:
         "tags": t.tags or [],
         "createdAt": t.created_at.isoformat() if t.created_at else None,
         "updatedAt": t.updated_at.isoformat() if t.updated_at else None,
-        "subtasks": [task_to_dict(sub) for sub in t.subtasks] if t.subtasks else [],
+        "subtasks": [task_to_dict(sub, children) for sub in subtasks],
     }
 
 
+def _load_subtask_map(db: Session, root_ids: list[str]) -> dict[str, list[Task]]:
+    """Fetch every descendant of ``root_ids`` in one recursive-CTE query."""
+    if not root_ids:
+        return {}
+    tree = (
+        select(Task.id)
+        .where(Task.parent_id.in_(root_ids))
+        .cte("task_tree", recursive=True)
+    )
+    tree = tree.union(select(Task.id).join(tree, Task.parent_id == tree.c.id))
+    descendants = (
+        db.query(Task)
+        .filter(Task.id.in_(select(tree.c.id)))
+        .order_by(Task.created_at.asc(), Task.id.asc())
+        .all()
+    )
+    children: dict[str, list[Task]] = {}
+    for task in descendants:
+        children.setdefault(task.parent_id, []).append(task)
+    return children
+
+
+def _task_tree_to_dict(task: Task, db: Session) -> dict:
+    return task_to_dict(task, _load_subtask_map(db, [task.id]))
+
+
 def create_task_service(payload: dict[str, Any], user_id: str, db: Session) -> dict:
     """
     Create a Task record from a plain dict or Pydantic model.dict().
@@ -53,6 +93,7 @@ def create_task_service(payload: dict[str, Any], user_id: str, db: Session) -> d
     )
     db.add(task)
     db.commit()
+    invalidate_user_context(user_id)
     db.refresh(task)
     return task_to_dict(task)
 
@@ -75,8 +116,8 @@ def list_tasks_service(
         "title": Task.title,
     }
     col = sort_map.get(sort, Task.created_at)
-    # Only fetch top-level tasks by default to avoid duplication
-    # Subtasks are loaded via relationship in task_to_dict
+    # Only fetch top-level tasks by default to avoid duplication.
+    # Subtasks for the whole page come from a single recursive query.
     q = db.query(Task).filter(Task.user_id == user_id, Task.parent_id.is_(None))
     q = q.order_by(col.desc() if order.lower() == "desc" else col.asc())
     if offset:
@@ -84,7 +125,8 @@ def list_tasks_service(
     if limit:
         q = q.limit(int(limit))
     tasks = q.all()
-    return [task_to_dict(t) for t in tasks]
+    children = _load_subtask_map(db, [t.id for t in tasks])
+    return [task_to_dict(t, children) for t in tasks]
 
 
 def get_task_service(task_id: str, user_id: str, db: Session) -> dict | None:
@@ -93,7 +135,7 @@ def get_task_service(task_id: str, user_id: str, db: Session) -> dict | None:
         return None
     if task.user_id != user_id:
         return None
-    return task_to_dict(task)
+    return _task_tree_to_dict(task, db)
 
 
 def update_task_service(
@@ -121,8 +163,9 @@ def update_task_service(
         task.parent_id = updates.get("parentId") or updates.get("parent_id")
     task.updated_at = datetime.now(UTC)
     db.commit()
+    invalidate_user_context(user_id)
     db.refresh(task)
-    return task_to_dict(task)
+    return _task_tree_to_dict(task, db)
 
 
 def delete_task_service(task_id: str, user_id: str, db: Session) -> bool:
@@ -133,6 +176,7 @@ def delete_task_service(task_id: str, user_id: str, db: Session) -> bool:
         return False
     db.delete(task)
     db.commit()
+    invalidate_user_context(user_id)
     return True
 
 
@@ -147,5 +191,58 @@ def toggle_task_service(task_id: str, user_id: str, db: Session) -> dict | None:
     task.status = next_status
     task.updated_at = datetime.now(UTC)
     db.commit()
+    invalidate_user_context(user_id)
     db.refresh(task)
-    return task_to_dict(task)
+    return _task_tree_to_dict(task, db)
+
+
+# Async variants for AsyncSession callers (see storage.database.run_in_session).
+
+
+async def create_task_service_async(
+    payload: dict[str, Any], user_id: str, db: Session | AsyncSession
+) -> dict:
+    return await run_in_session(db, lambda s: create_task_service(payload, user_id, s))
+
+
+async def list_tasks_service_async(
+    user_id: str,
+    db: Session | AsyncSession,
+    *,
+    limit: int | None = None,
+    offset: int = 0,
+    sort: str = "created_at",
+    order: str = "desc",
+) -> list[dict]:
+    return await run_in_session(
+        db,
+        lambda s: list_tasks_service(
+            user_id, s, limit=limit, offset=offset, sort=sort, order=order
+        ),
+    )
+
+
+async def get_task_service_async(
+    task_id: str, user_id: str, db: Session | AsyncSession
+) -> dict | None:
+    return await run_in_session(db, lambda s: get_task_service(task_id, user_id, s))
+
+
+async def update_task_service_async(
+    task_id: str, patch: dict[str, Any], user_id: str, db: Session | AsyncSession
+) -> dict | None:
+    return await run_in_session(
+        db, lambda s: update_task_service(task_id, patch, user_id, s)
+    )
+
+
+async def delete_task_service_async(
+    task_id: str, user_id: str, db: Session | AsyncSession
+) -> bool:
+    return await run_in_session(db, lambda s: delete_task_service(task_id, user_id, s))
+
+
+async def toggle_task_service_async(
+    task_id: str, user_id: str, db: Session | AsyncSession
+) -> dict | None:
+    return await run_in_session(db, lambda s: toggle_task_service(task_id, user_id, s))
@@ -0,0 +1,246 @@
+"""Energy-based voice-activity detection ahead of STT.
+
+Every clip is decoded to 16 kHz mono (services.audio_decode). It is then cut
+into ``VAD_FRAME_MS`` frames and each frame's RMS level is scored in dBFS in
+one vectorized pass. A frame counts as speech when it is above
+``VAD_THRESHOLD_DBFS`` and, if the clip has quiet stretches, above its own
+noise floor (10th-percentile frame level) plus ``VAD_NOISE_MARGIN_DB``. The
+floor only applies when it sits at least twice the margin below the loudest
+frame. A clip with no quiet frames (a tightly cropped word, a held vowel,
+speech over steady background noise) is judged on the absolute threshold
+alone, never against itself.
+
+Leading and trailing silence is cut, keeping ``VAD_PAD_MS`` of context. A
+clip with less than ``VAD_MIN_SPEECH_MS`` of speech is rejected with
+NoSpeechError before any provider is called.
+
+Trimmed audio is re-encoded for remote providers: 16-bit WAV when the upload
+was PCM, Ogg/Opus otherwise. The original bytes are sent instead whenever
+re-encoding would not make the payload smaller. Clips that cannot be decoded
+without an ffmpeg subprocess pass through untouched; PyAV is a base
+dependency so this is limited to odd formats, and startup logs a warning
+(``warn_if_vad_cannot_decode``) if it is missing.
+
+Bytes and milliseconds saved are logged per request and totalled under
+``vad`` on ``GET /metrics``. Set ``VAD_ENABLED=0`` to disable the stage.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Any
+
+import numpy as np
+from fastapi import HTTPException
+
+from services.audio_decode import (
+    TARGET_SAMPLE_RATE,
+    AudioSource,
+    can_decode_in_process,
+    decode_audio,
+    encode_ogg_opus,
+    encode_wav_pcm16,
+    has_pyav,
+    read_head,
+    source_size,
+)
+from utils.metrics import Histogram, register_collector
+
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") == "1"
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "20"))
+VAD_THRESHOLD_DBFS = float(os.getenv("VAD_THRESHOLD_DBFS", "-50"))
+VAD_NOISE_MARGIN_DB = float(os.getenv("VAD_NOISE_MARGIN_DB", "10"))
+VAD_PAD_MS = int(os.getenv("VAD_PAD_MS", "200"))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "120"))
+
+
+class NoSpeechError(HTTPException):
+    """Raised for clips with no detectable speech; no provider was called."""
+
+    def __init__(self) -> None:
+        super().__init__(status_code=422, detail="No speech detected")
+
+
+class PreparedAudio:
+    def __init__(
+        self,
+        payload: AudioSource,
+        content_type: str,
+        *,
+        waveform: np.ndarray | None = None,
+        original_bytes: int = 0,
+        original_ms: float = 0.0,
+        kept_ms: float = 0.0,
+    ):
+        self.payload = payload
+        self.payload_bytes = source_size(payload)
+        self.content_type = content_type
+        self.waveform = waveform
+        self.original_bytes = original_bytes
+        self.original_ms = original_ms
+        self.kept_ms = kept_ms
+
+    @property
+    def bytes_saved(self) -> int:
+        return max(0, self.original_bytes - self.payload_bytes)
+
+    @property
+    def ms_saved(self) -> float:
+        return max(0.0, self.original_ms - self.kept_ms)
+
+
+def speech_bounds(
+    waveform: np.ndarray, sample_rate: int = TARGET_SAMPLE_RATE
+) -> tuple[int, int] | None:
+    """Return the ``[start, end)`` sample range to keep, or None if silent."""
+    frame_len = max(1, sample_rate * VAD_FRAME_MS // 1000)
+    n_frames = len(waveform) // frame_len
+    if n_frames == 0:
+        return None
+    frames = waveform[: n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    level = 20 * np.log10(np.maximum(rms, 1e-10))
+    threshold = VAD_THRESHOLD_DBFS
+    floor = float(np.percentile(level, 10))
+    if float(level.max()) - floor >= 2 * VAD_NOISE_MARGIN_DB:
+        threshold = max(threshold, floor + VAD_NOISE_MARGIN_DB)
+    voiced = np.flatnonzero(level > threshold)
+    if len(voiced) * VAD_FRAME_MS < VAD_MIN_SPEECH_MS:
+        return None
+    pad = sample_rate * VAD_PAD_MS // 1000
+    start = max(0, int(voiced[0]) * frame_len - pad)
+    end = min(len(waveform), (int(voiced[-1]) + 1) * frame_len + pad)
+    return start, end
+
+
+def _sniff_content_type(source: AudioSource) -> str:
+    head = read_head(source, 4)
+    if head == b"RIFF":
+        return "audio/wav"
+    if head == b"OggS":
+        return "audio/ogg"
+    return "audio/webm"
+
+
+class VadStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.clips = 0
+        self.rejected = 0
+        self.passthrough = 0
+        self.bytes_saved = 0
+        self.ms_saved = 0.0
+        self.ms_saved_per_clip = Histogram(
+            buckets=(50, 100, 250, 500, 1000, 2500, 5000, 10000)
+        )
+
+    def record(self, prepared: PreparedAudio | None, *, passthrough: bool) -> None:
+        with self._lock:
+            self.clips += 1
+            if passthrough:
+                self.passthrough += 1
+            elif prepared is None:
+                self.rejected += 1
+            else:
+                self.bytes_saved += prepared.bytes_saved
+                self.ms_saved += prepared.ms_saved
+        if prepared is not None and not passthrough:
+            self.ms_saved_per_clip.observe(prepared.ms_saved)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "clips_total": self.clips,
+                "rejected_total": self.rejected,
+                "passthrough_total": self.passthrough,
+                "bytes_saved_total": self.bytes_saved,
+                "ms_saved_total": round(self.ms_saved, 1),
+                "ms_saved_per_clip": self.ms_saved_per_clip.snapshot(),
+            }
+
+
+vad_stats = VadStats()
+register_collector("vad", vad_stats.snapshot)
+
+
+def _encode_trimmed(
+    source: AudioSource, size: int, trimmed: np.ndarray
+) -> tuple[AudioSource, str]:
+    content_type = _sniff_content_type(source)
+    if content_type == "audio/wav":
+        encode, encoded_type = encode_wav_pcm16, "audio/wav"
+    else:
+        encode, encoded_type = encode_ogg_opus, "audio/ogg"
+    try:
+        encoded = encode(trimmed)
+    except Exception:
+        logging.warning("Re-encoding trimmed audio failed", exc_info=True)
+        return source, content_type
+    if len(encoded) < size:
+        return encoded, encoded_type
+    return source, content_type
+
+
+def warn_if_vad_cannot_decode() -> None:
+    """Log at startup when VAD would pass every compressed upload through."""
+    if VAD_ENABLED and not has_pyav():
+        logging.warning(
+            "VAD is enabled but PyAV is not installed: webm/ogg uploads (what "
+            "the web client sends) will skip silence trimming. Install av."
+        )
+
+
+def prepare_stt_audio(source: AudioSource) -> PreparedAudio:
+    """Trim silence from ``source`` and pick the payload to send.
+
+    Raises NoSpeechError when the clip holds no speech. Blocking; run it in
+    an executor.
+    """
+    content_type = _sniff_content_type(source)
+    size = source_size(source)
+    passthrough = PreparedAudio(source, content_type, original_bytes=size)
+    if not VAD_ENABLED or not can_decode_in_process(source):
+        vad_stats.record(passthrough, passthrough=True)
+        return passthrough
+    try:
+        waveform = decode_audio(source)
+    except (RuntimeError, ValueError) as exc:
+        logging.warning("VAD skipped; audio could not be decoded: %s", exc)
+        vad_stats.record(passthrough, passthrough=True)
+        return passthrough
+
+    original_ms = len(waveform) * 1000 / TARGET_SAMPLE_RATE
+    bounds = speech_bounds(waveform)
+    if bounds is None:
+        vad_stats.record(None, passthrough=False)
+        logging.info(
+            "VAD rejected clip with no speech",
+            extra={"bytes_saved": size, "ms_saved": round(original_ms)},
+        )
+        raise NoSpeechError()
+
+    start, end = bounds
+    trimmed = waveform[start:end]
+    if start == 0 and end == len(waveform):
+        payload, payload_type = source, content_type
+    else:
+        payload, payload_type = _encode_trimmed(source, size, trimmed)
+    prepared = PreparedAudio(
+        payload,
+        payload_type,
+        waveform=trimmed,
+        original_bytes=size,
+        original_ms=original_ms,
+        kept_ms=len(trimmed) * 1000 / TARGET_SAMPLE_RATE,
+    )
+    vad_stats.record(prepared, passthrough=False)
+    logging.info(
+        "VAD trimmed clip",
+        extra={
+            "bytes_saved": prepared.bytes_saved,
+            "ms_saved": round(prepared.ms_saved),
+        },
+    )
+    return prepared
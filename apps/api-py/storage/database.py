@@ -6,15 +6,27 @@ This module is imported at startup. It must be resilient across environments:
 - Hugging Face Spaces (filesystem restrictions; /tmp is writable)
 """
 
+import asyncio
 import logging
 import os
+from collections.abc import AsyncIterator, Callable
 from contextlib import contextmanager
 from pathlib import Path
 
 from dotenv import load_dotenv
+from fastapi import Depends
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+
+from storage.pool_metrics import PoolMetrics, instrumented_pool_class
+from utils.metrics import register_collector
 
 load_dotenv(override=True)
 
@@ -63,6 +75,31 @@ if ("PYTEST_CURRENT_TEST" in os.environ) and os.getenv(
 
 SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
 
+# Opt-in async storage mode: routers get an AsyncSession (asyncpg/aiosqlite) so
+# DB round trips no longer block the event loop. Requires the `async-db` extra.
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB", "0") == "1"
+
+# Postgres pool sizing (per process; applies to the sync and async engines).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_USE_LIFO = os.getenv("DB_POOL_USE_LIFO", "0") == "1"
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "pool_use_lifo": DB_POOL_USE_LIFO,
+        "pool_pre_ping": True,
+    }
+
 
 def _make_engine(database_url: str):
     if database_url.startswith("sqlite"):
@@ -76,8 +113,9 @@ def _make_engine(database_url: str):
 
     return create_engine(
         database_url,
-        pool_pre_ping=True,
+        poolclass=instrumented_pool_class(QueuePool, sync_pool_metrics),
         echo=SQL_ECHO,
+        **_pool_options(),
     )
 
 
@@ -134,6 +172,105 @@ def get_session_now():
             pass
 
 
+def _async_database_url(database_url: str) -> str:
+    if database_url.startswith("sqlite+aiosqlite") or "+asyncpg" in database_url:
+        return database_url
+    if database_url.startswith("sqlite"):
+        return "sqlite+aiosqlite" + database_url.removeprefix("sqlite")
+    for prefix in ("postgresql+psycopg2", "postgresql", "postgres"):
+        if database_url.startswith(prefix + "://"):
+            return "postgresql+asyncpg" + database_url.removeprefix(prefix)
+    return database_url
+
+
+_async_engine: AsyncEngine | None = None
+_async_sessionmaker: async_sessionmaker[AsyncSession] | None = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Create (once) the async engine mirroring the sync DATABASE_URL."""
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        async_url = _async_database_url(DATABASE_URL)
+        if async_url.startswith("sqlite"):
+            _async_engine = create_async_engine(
+                async_url, poolclass=StaticPool, echo=SQL_ECHO
+            )
+        else:
+            _async_engine = create_async_engine(
+                async_url,
+                poolclass=instrumented_pool_class(
+                    AsyncAdaptedQueuePool, async_pool_metrics
+                ),
+                echo=SQL_ECHO,
+                **_pool_options(),
+            )
+        _async_sessionmaker = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    assert _async_sessionmaker is not None
+    return _async_sessionmaker()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_request_db(
+    sync_db: Session = Depends(get_db),
+) -> AsyncIterator[Session | AsyncSession]:
+    """Router dependency: AsyncSession when ASYNC_DB=1, else the sync Session."""
+    if not ASYNC_DB_ENABLED:
+        yield sync_db
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def run_in_session[T](
+    db: Session | AsyncSession, fn: Callable[[Session], T]
+) -> T:
+    """Run sync-Session service code on either session flavor.
+
+    With an AsyncSession the callable runs through ``run_sync``, so every
+    statement (including lazy loads) awaits the async driver instead of
+    blocking the event loop. With a sync Session it runs in a worker thread,
+    so a slow query only holds up its own caller. Either way, one Session
+    must not be passed to two concurrent calls.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn)
+    return await asyncio.to_thread(fn, db)
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_sessionmaker = None
+
+
+def db_pool_metrics() -> dict:
+    """Checkout counters, wait histograms and live gauges for both engines."""
+    data = {
+        "database": "sqlite" if DATABASE_URL.startswith("sqlite") else "postgres",
+        "sync": sync_pool_metrics.snapshot(engine.pool),
+    }
+    if _async_engine is not None:
+        data["async"] = async_pool_metrics.snapshot(_async_engine.pool)
+    return data
+
+
+register_collector("db_pool", db_pool_metrics)
+
+
 def init_db():
     Base.metadata.create_all(bind=engine)
     logging.info("Database tables ensured")
@@ -2,9 +2,19 @@
 SQLAlchemy ORM models for Nargis database
 """
 
+import os
 from datetime import UTC, datetime
 
-from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from storage.database import Base
@@ -22,6 +32,24 @@ except Exception:  # pragma: no cover - optional dependency
     _PGVECTOR_AVAILABLE = False
 
 
+def _memory_ann_index_options() -> tuple[str, dict[str, int]]:
+    """Index method and build options for ``ix_memories_embedding_ann``.
+
+    Reads the same ``MEMORY_VECTOR_INDEX`` / ``MEMORY_HNSW_*`` /
+    ``MEMORY_IVFFLAT_LISTS`` variables as migration c3a8f0e6d2b9, so the
+    model describes the index the migration actually built.
+    """
+    if os.getenv("MEMORY_VECTOR_INDEX", "hnsw").strip().lower() == "ivfflat":
+        return "ivfflat", {"lists": int(os.getenv("MEMORY_IVFFLAT_LISTS", "100"))}
+    return "hnsw", {
+        "m": int(os.getenv("MEMORY_HNSW_M", "16")),
+        "ef_construction": int(os.getenv("MEMORY_HNSW_EF_CONSTRUCTION", "64")),
+    }
+
+
+_MEMORY_ANN_USING, _MEMORY_ANN_WITH = _memory_ann_index_options()
+
+
 class User(Base):
     """User account model"""
 
@@ -105,6 +133,13 @@ class Habit(Base):
     frequency: Mapped[str | None] = mapped_column(String(50), nullable=True)
     color: Mapped[str | None] = mapped_column(String(20), nullable=True)
     tags: Mapped[list[str] | None] = mapped_column(JSON, nullable=True)
+    # Streak counters maintained on entry upsert (see services.habits).
+    # current_streak is the run length ending at last_completed_date.
+    current_streak: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    best_streak: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    last_completed_date: Mapped[str | None] = mapped_column(
+        String(10), nullable=True
+    )  # YYYY-MM-DD
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(UTC)
     )
@@ -204,6 +239,19 @@ class Memory(Base):
     """Long-term semantic memory stored as a vector for RAG retrieval."""
 
     __tablename__ = "memories"
+    __table_args__ = (
+        # Per-user recency scans (text/recency fallbacks, small-user exact scans).
+        Index("ix_memories_user_id_created_at", "user_id", "created_at"),
+        # ANN index for cosine search; created by the vector index migration
+        # with the method chosen by MEMORY_VECTOR_INDEX.
+        Index(
+            "ix_memories_embedding_ann",
+            "embedding",
+            postgresql_using=_MEMORY_ANN_USING,
+            postgresql_with=_MEMORY_ANN_WITH,
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[str] = mapped_column(
@@ -242,3 +290,16 @@ class IdempotencyKey(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(UTC)
     )
+
+
+class EmbeddingCacheEntry(Base):
+    """Persistent tier of the embedding cache, keyed by (model, text) hash."""
+
+    __tablename__ = "embedding_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model: Mapped[str] = mapped_column(String(200), nullable=False)
+    vector: Mapped[list[float]] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(UTC), index=True
+    )
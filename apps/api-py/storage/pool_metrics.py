@@ -0,0 +1,82 @@
+"""Connection-pool instrumentation for the sync and async engines.
+
+``instrumented_pool_class`` wraps a SQLAlchemy ``QueuePool`` flavor so every
+checkout is timed (including time spent waiting for a free connection) and
+checkout timeouts are counted. Gauges (size, checked out, overflow in use) are
+read from the live pool when a snapshot is taken.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool, QueuePool
+
+from utils.metrics import Histogram
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms = Histogram()
+        self._lock = threading.Lock()
+
+    def record_checkout(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+        self.wait_ms.observe(wait_ms)
+
+    def record_timeout(self, wait_ms: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+        self.wait_ms.observe(wait_ms)
+
+    def snapshot(self, pool: Pool | None = None) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "checkouts_total": self.checkouts,
+            "checkout_timeouts_total": self.timeouts,
+            "checkout_wait_ms": self.wait_ms.snapshot(),
+        }
+        if pool is not None:
+            data.update(pool_gauges(pool))
+        return data
+
+
+def pool_gauges(pool: Pool) -> dict[str, Any]:
+    gauges: dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        gauges.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                # overflow() starts at -size and counts up as connections open.
+                "overflow_in_use": max(0, pool.overflow()),
+                "max_overflow": pool._max_overflow,
+            }
+        )
+    return gauges
+
+
+def instrumented_pool_class[P: QueuePool](base: type[P], metrics: PoolMetrics):
+    """Return a subclass of ``base`` that reports checkouts to ``metrics``."""
+
+    class InstrumentedPool(base):  # type: ignore[valid-type,misc]
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                conn = super()._do_get()
+            except exc.TimeoutError:
+                metrics.record_timeout((time.perf_counter() - started) * 1000)
+                raise
+            metrics.record_checkout((time.perf_counter() - started) * 1000)
+            return conn
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    InstrumentedPool.__qualname__ = InstrumentedPool.__name__
+    return InstrumentedPool
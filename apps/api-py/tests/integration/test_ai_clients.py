@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 import services.ai_clients
@@ -92,3 +94,163 @@ async def test_get_llm_delegates_to_ml_worker(monkeypatch):
 
     # Assert
     assert isinstance(resp, dict)
+
+
+@pytest.mark.asyncio
+async def test_stream_llm_response_yields_sse_deltas(monkeypatch):
+    import httpx
+
+    monkeypatch.setattr(services.ai_clients, "LLM_URL", "http://groq.test/v1/chat")
+    monkeypatch.setattr(services.ai_clients, "GROQ_API_KEY", "test-key")
+
+    sse_body = (
+        'data: {"choices":[{"delta":{"role":"assistant"}}]}\n\n'
+        'data: {"choices":[{"delta":{"content":"Hel"}}]}\n\n'
+        'data: {"choices":[{"delta":{"content":"lo"}}]}\n\n'
+        "data: [DONE]\n\n"
+    )
+    seen_payloads: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen_payloads.append(json.loads(request.content))
+        return httpx.Response(
+            200, text=sse_body, headers={"content-type": "text/event-stream"}
+        )
+
+    real_client = httpx.AsyncClient
+
+    def client_factory(*args, **kwargs):
+        kwargs.pop("http2", None)
+        return real_client(*args, transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr("httpx.AsyncClient", client_factory)
+
+    from services.ai_clients import _stream_llm_response
+
+    deltas = [d async for d in _stream_llm_response("say hello")]
+
+    assert deltas == ["Hel", "lo"]
+    assert seen_payloads[0]["stream"] is True
+
+
+@pytest.mark.asyncio
+async def test_get_transcription_rejects_silence_before_provider_call(monkeypatch):
+    import numpy as np
+
+    from services.audio_decode import encode_wav_pcm16
+    from services.vad import NoSpeechError
+
+    monkeypatch.setattr(services.ai_clients, "ML_WORKER_URL", "http://ml-worker:8001")
+    monkeypatch.setattr(services.ai_clients, "STT_URL", "")
+    monkeypatch.setattr(services.ai_clients, "DEEPGRAM_API_KEY", "")
+    posted: list[dict] = []
+
+    class RecordingClient:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb):
+            return False
+
+        async def post(self, url, *args, **kwargs):
+            posted.append(kwargs)
+            raise AssertionError("provider must not be called for silence")
+
+    monkeypatch.setattr("httpx.AsyncClient", RecordingClient)
+
+    silence = encode_wav_pcm16(np.zeros(16000, dtype=np.float32))
+    with pytest.raises(NoSpeechError):
+        await services.ai_clients._get_transcription(silence)
+    assert posted == []
+
+
+@pytest.mark.asyncio
+async def test_get_transcription_falls_back_when_deepgram_fails(monkeypatch):
+    import httpx
+
+    from services.provider_router import ProviderRouter
+
+    monkeypatch.setattr(services.ai_clients, "STT_URL", "https://deepgram.test")
+    monkeypatch.setattr(services.ai_clients, "DEEPGRAM_API_KEY", "key")
+    monkeypatch.setattr(services.ai_clients, "ML_WORKER_URL", "http://ml-worker:8001")
+    router = ProviderRouter("stt", hedge=False)
+    monkeypatch.setattr(
+        services.ai_clients, "get_provider_router", lambda _kind: router
+    )
+
+    class DummyResp:
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return {"text": "from worker"}
+
+    class FlakyClient:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb):
+            return False
+
+        async def post(self, url, *args, **kwargs):
+            if url.startswith("https://deepgram.test"):
+                raise httpx.ConnectError("deepgram unreachable")
+            return DummyResp()
+
+    monkeypatch.setattr("httpx.AsyncClient", FlakyClient)
+
+    text = await services.ai_clients._get_transcription(b"fake-audio-bytes")
+
+    assert text == "from worker"
+    decision = router.snapshot()["recent_decisions"][-1]
+    assert decision["attempted"] == ["deepgram", "ml_worker"]
+    assert router.health("deepgram").consecutive_failures == 1
+
+
+@pytest.mark.asyncio
+async def test_empty_deepgram_transcript_is_not_a_provider_failure(monkeypatch):
+    from services.provider_router import ProviderRouter
+
+    monkeypatch.setattr(services.ai_clients, "STT_URL", "https://deepgram.test")
+    monkeypatch.setattr(services.ai_clients, "DEEPGRAM_API_KEY", "key")
+    monkeypatch.setattr(services.ai_clients, "ML_WORKER_URL", "http://ml-worker:8001")
+    router = ProviderRouter("stt", hedge=False)
+    monkeypatch.setattr(
+        services.ai_clients, "get_provider_router", lambda _kind: router
+    )
+    posted: list[str] = []
+
+    class DummyResp:
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return {"results": {"channels": [{"alternatives": [{"transcript": ""}]}]}}
+
+    class DummyClient:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb):
+            return False
+
+        async def post(self, url, *args, **kwargs):
+            posted.append(url)
+            return DummyResp()
+
+    monkeypatch.setattr("httpx.AsyncClient", DummyClient)
+
+    text = await services.ai_clients._get_transcription(b"fake-audio-bytes")
+
+    assert text == ""
+    assert posted == ["https://deepgram.test"]
+    assert router.health("deepgram").consecutive_failures == 0
@@ -0,0 +1,29 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import storage.database as database
+from main import app
+
+pytest.importorskip("aiosqlite")
+
+
+def test_task_routes_work_with_async_session(monkeypatch, token):
+    monkeypatch.setattr(database, "ASYNC_DB_ENABLED", True)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client:
+        created = client.post(
+            "/api/v1/tasks", json={"title": "Async mode task"}, headers=headers
+        )
+        assert created.status_code == 201
+        task_id = created.json()["id"]
+
+        listed = client.get("/api/v1/tasks", headers=headers)
+        assert listed.status_code == 200
+        assert task_id in [t["id"] for t in listed.json()]
+
+        missing = client.get("/api/v1/tasks/does-not-exist", headers=headers)
+        assert missing.status_code == 404
+
+        deleted = client.delete(f"/api/v1/tasks/{task_id}", headers=headers)
+        assert deleted.status_code == 204
@@ -0,0 +1,131 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import services.ai_clients
+import services.audio_upload
+from main import app
+
+client = TestClient(app)
+
+
+def _fake_llm(monkeypatch):
+    async def fake_stream_llm_response(_text: str):
+        yield "ok"
+
+    monkeypatch.setattr(
+        services.ai_clients, "_stream_llm_response", fake_stream_llm_response
+    )
+
+
+def test_upload_is_spooled_and_passed_as_file(monkeypatch):
+    monkeypatch.setattr(
+        services.audio_upload._AudioMultiPartParser, "spool_max_size", 1024
+    )
+    seen = {}
+
+    async def fake_transcription(audio):
+        seen["rolled"] = getattr(audio, "_rolled", None)
+        seen["data"] = audio.read()
+        return "hello"
+
+    monkeypatch.setattr(services.ai_clients, "_get_transcription", fake_transcription)
+    _fake_llm(monkeypatch)
+    payload = b"\x1aE\xdf\xa3" + b"a" * 4096
+
+    resp = client.post(
+        "/api/v1/process-audio",
+        files={"audio_file": ("a.webm", payload, "audio/webm")},
+    )
+
+    assert resp.status_code == 200
+    assert seen == {"rolled": True, "data": payload}
+
+
+def test_oversized_upload_is_rejected_before_stt(monkeypatch):
+    monkeypatch.setattr(services.audio_upload, "AUDIO_MAX_UPLOAD_BYTES", 1024)
+    monkeypatch.setattr(services.audio_upload, "_MULTIPART_OVERHEAD_BYTES", 512)
+
+    async def fail_transcription(_audio):
+        raise AssertionError("STT must not run for oversized uploads")
+
+    monkeypatch.setattr(services.ai_clients, "_get_transcription", fail_transcription)
+    files = {"audio_file": ("a.webm", b"a" * 4096, "audio/webm")}
+
+    resp = client.post("/api/v1/process-audio", files=files)
+
+    assert resp.status_code == 413
+
+
+def test_oversized_chunked_upload_is_cut_off_mid_stream(monkeypatch):
+    monkeypatch.setattr(services.audio_upload, "AUDIO_MAX_UPLOAD_BYTES", 1024)
+    monkeypatch.setattr(services.audio_upload, "_MULTIPART_OVERHEAD_BYTES", 512)
+
+    def body():
+        yield (
+            b"--b\r\nContent-Disposition: form-data; name=audio_file; "
+            b'filename="a.webm"\r\nContent-Type: audio/webm\r\n\r\n'
+        )
+        for _ in range(64):
+            yield b"a" * 512
+        yield b"\r\n--b--\r\n"
+
+    resp = client.post(
+        "/api/v1/process-audio",
+        content=body(),
+        headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+
+    assert resp.status_code == 413
+
+
+def test_missing_upload_field_is_422():
+    resp = client.post("/api/v1/process-audio", data={"other": "x"})
+
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_spooled_upload_is_streamed_to_stt_provider(monkeypatch, tmp_path):
+    monkeypatch.setattr(services.ai_clients, "ML_WORKER_URL", "http://ml-worker:8001")
+    monkeypatch.setattr(services.ai_clients, "STT_URL", "")
+    monkeypatch.setattr(services.ai_clients, "DEEPGRAM_API_KEY", "")
+    monkeypatch.setattr(services.audio_upload, "AUDIO_UPLOAD_CHUNK_BYTES", 1000)
+    received = {}
+
+    class DummyResp:
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return {"text": "streamed"}
+
+    class StreamingSink:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb):
+            return False
+
+        async def post(self, url, *, headers, content):
+            assert not isinstance(content, bytes)
+            chunks = [chunk async for chunk in content]
+            received["chunks"] = len(chunks)
+            received["body"] = b"".join(chunks)
+            received["length"] = headers["Content-Length"]
+            return DummyResp()
+
+    monkeypatch.setattr("httpx.AsyncClient", StreamingSink)
+    payload = b"\x1aE\xdf\xa3" + bytes(range(256)) * 20
+    path = tmp_path / "upload.webm"
+    path.write_bytes(payload)
+
+    with path.open("rb") as f:
+        text = await services.ai_clients._get_transcription(f)
+
+    assert text == "streamed"
+    assert received["body"] == payload
+    assert received["chunks"] == 6
+    assert received["length"] == str(len(payload))
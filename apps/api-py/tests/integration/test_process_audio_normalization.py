@@ -47,3 +47,29 @@ def test_process_audio_response_normalized(monkeypatch):
             assert '"choices"' not in content
             assert "[" not in content
     assert found_response, "No response event was emitted"
+
+
+def test_process_audio_chat_mode_streams_response_deltas(monkeypatch):
+    async def fake_transcription(_audio_bytes: bytes) -> str:
+        return "Hello transcription"
+
+    async def fake_stream_llm_response(_text: str):
+        for part in ("This is ", "a streamed ", "reply."):
+            yield part
+
+    import services.ai_clients as ai_clients
+
+    monkeypatch.setattr(ai_clients, "_get_transcription", fake_transcription)
+    monkeypatch.setattr(ai_clients, "_stream_llm_response", fake_stream_llm_response)
+
+    files = {"audio_file": ("a.webm", b"dummy-audio-bytes", "audio/webm")}
+    resp = client.post("/api/v1/process-audio?mode=chat", files=files)
+    assert resp.status_code == 200
+
+    events = [json.loads(line) for line in resp.iter_lines() if line]
+    deltas = [e["content"] for e in events if e.get("type") == "response_delta"]
+    finals = [e["content"] for e in events if e.get("type") == "response"]
+
+    assert deltas == ["This is ", "a streamed ", "reply."]
+    assert finals == ["This is a streamed reply."]
+    assert events[-1]["type"] == "end"
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 from collections.abc import AsyncGenerator
 from types import SimpleNamespace
@@ -82,3 +83,128 @@ async def test_run_agent_pipeline_emits_tool_result_with_result_key():
     # Backwards-compatible alias
     assert "output" in evt
     assert evt.get("output") == evt.get("result")
+
+
+class _ToolCallingAgentApp:
+    async def astream_events(
+        self, _input_payload, config=None, version: str = "v1"
+    ) -> AsyncGenerator[dict, None]:
+        yield {"event": "on_tool_start", "name": "t", "run_id": "r1", "data": {}}
+        yield {"event": "on_tool_end", "name": "t", "run_id": "r1", "data": {}}
+        yield {
+            "event": "on_chat_model_stream",
+            "data": {"chunk": {"content": "done"}},
+        }
+
+
+@pytest.mark.asyncio
+async def test_run_agent_pipeline_emits_timing_before_end_when_requested():
+    from utils.timing import TurnTimer
+
+    fake_graph = SimpleNamespace(
+        agent_app=_ToolCallingAgentApp(),
+        build_agent_runnable_config=lambda user_id, db: {},
+    )
+    timer = TurnTimer(emit=True, request_id="req-1")
+    timer.add("stt", 12.0)
+
+    with patch("services.agent_service.agent_graph", fake_graph):
+        chunks = [
+            b
+            async for b in run_agent_pipeline(
+                "hi", "u-timing", cast(Session, _FakeDB()), timer=timer
+            )
+        ]
+
+    events = [json.loads(line) for line in b"".join(chunks).split(b"\n") if line]
+    assert [e["type"] for e in events[-2:]] == ["timing", "end"]
+    timing = events[-2]
+    assert timing["request_id"] == "req-1"
+    assert {"stt", "tools", "llm_first_token", "llm", "serialize"} <= set(
+        timing["spans"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_agent_pipeline_omits_timing_by_default():
+    fake_graph = SimpleNamespace(
+        agent_app=_FakeAgentApp(),
+        build_agent_runnable_config=lambda user_id, db: {},
+    )
+    with patch("services.agent_service.agent_graph", fake_graph):
+        chunks = [
+            b
+            async for b in run_agent_pipeline(
+                "hi", "u-timing", cast(Session, _FakeDB())
+            )
+        ]
+
+    types = [json.loads(line)["type"] for line in b"".join(chunks).split(b"\n") if line]
+    assert "timing" not in types
+    assert types[-1] == "end"
+
+
+class _SlowToolAgentApp:
+    async def astream_events(
+        self, _input_payload, config=None, version: str = "v1"
+    ) -> AsyncGenerator[dict, None]:
+        yield {"event": "on_tool_start", "name": "t", "run_id": "r1", "data": {}}
+        await asyncio.sleep(0.05)
+        yield {"event": "on_tool_end", "name": "t", "run_id": "r1", "data": {}}
+
+
+@pytest.mark.asyncio
+async def test_timing_llm_span_excludes_tool_time():
+    from utils.timing import TurnTimer
+
+    fake_graph = SimpleNamespace(
+        agent_app=_SlowToolAgentApp(),
+        build_agent_runnable_config=lambda user_id, db: {},
+    )
+    timer = TurnTimer(emit=True)
+    with patch("services.agent_service.agent_graph", fake_graph):
+        async for _ in run_agent_pipeline(
+            "hi", "u-timing", cast(Session, _FakeDB()), timer=timer
+        ):
+            pass
+
+    spans = timer.finish()["spans"]
+    assert spans["tools"] >= 50
+    assert spans["llm"] < 25
+
+
+class _ParallelToolsAgentApp:
+    async def astream_events(
+        self, _input_payload, config=None, version: str = "v1"
+    ) -> AsyncGenerator[dict, None]:
+        from utils.timing import timed
+
+        with timed("daily_context"):
+            await asyncio.sleep(0.05)
+        for run_id in ("r1", "r2", "r3"):
+            yield {"event": "on_tool_start", "name": "t", "run_id": run_id, "data": {}}
+        await asyncio.sleep(0.1)
+        for run_id in ("r1", "r2", "r3"):
+            yield {"event": "on_tool_end", "name": "t", "run_id": run_id, "data": {}}
+
+
+@pytest.mark.asyncio
+async def test_timing_counts_parallel_tools_and_daily_context_once():
+    from utils.timing import TurnTimer
+
+    fake_graph = SimpleNamespace(
+        agent_app=_ParallelToolsAgentApp(),
+        build_agent_runnable_config=lambda user_id, db: {},
+    )
+    timer = TurnTimer(emit=True)
+    with patch("services.agent_service.agent_graph", fake_graph):
+        async for _ in run_agent_pipeline(
+            "hi", "u-timing", cast(Session, _FakeDB()), timer=timer
+        ):
+            pass
+
+    spans = timer.finish()["spans"]
+    # Three concurrent 100 ms tools are 100 ms of wall time, not 300
+    assert 100 <= spans["tools"] < 200
+    assert spans["daily_context"] >= 50
+    assert spans["llm"] < 40
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import asyncio
+import threading
+import time
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
@@ -8,7 +11,9 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from agent.tools import (
+    _tool_session,
     analyze_productivity_tool,
+    list_tasks_tool,
     log_habit_tool,
     log_journal_tool,
     start_focus_tool,
@@ -243,3 +248,99 @@ def test_analyze_productivity_tool_returns_condensed_weekly_summary():
     assert "tasks_pending=1" in result
     assert "focus_minutes=40" in result
     assert "habits_hit=2" in result
+
+
+async def test_sync_session_db_work_runs_off_the_event_loop(monkeypatch):
+    SessionLocal = setup_inmemory_db()
+    loop_thread = threading.get_ident()
+    service_threads: list[int] = []
+
+    import services.tasks as tasks
+
+    real_list = tasks.list_tasks_service
+
+    def recording_list(*args, **kwargs):
+        service_threads.append(threading.get_ident())
+        return real_list(*args, **kwargs)
+
+    monkeypatch.setattr(tasks, "list_tasks_service", recording_list)
+    with SessionLocal() as db:
+        db.add(User(id="user-async", email="async@test.dev", password_hash="x"))
+        db.add(Task(id="t-a", user_id="user-async", title="Write tests"))
+        db.commit()
+
+        config = _runtime_config("user-async", db)
+        result = await list_tasks_tool.coroutine(config=config)
+
+    assert "Write tests" in result
+    assert service_threads and loop_thread not in service_threads
+
+
+def test_sync_entrypoint_uses_the_turn_session_with_async_db(monkeypatch):
+    def no_async_session():
+        raise AssertionError("sync entrypoint opened an async-engine session")
+
+    monkeypatch.setattr("agent.tools.ASYNC_DB_ENABLED", True)
+    monkeypatch.setattr("agent.tools.AsyncSessionLocal", no_async_session)
+    SessionLocal = setup_inmemory_db()
+    with SessionLocal() as db:
+        db.add(User(id="user-sync", email="sync@test.dev", password_hash="x"))
+        db.add(Task(id="t-s", user_id="user-sync", title="Sync path"))
+        db.commit()
+
+        result = list_tasks_tool.func(config=_runtime_config("user-sync", db))
+
+    assert "Sync path" in result
+
+
+async def test_writing_tool_calls_on_a_shared_session_run_one_at_a_time(tmp_path):
+    # A pooled engine: reads get sessions of their own and may overlap
+    engine = create_engine(f"sqlite:///{tmp_path / 'gate.db'}")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+    active = 0
+    peak = 0
+
+    async def call(config, tool_name):
+        nonlocal active, peak
+        async with _tool_session(config, tool_name):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    with SessionLocal() as db:
+        config = _runtime_config("user-lock", db)
+        await asyncio.gather(*(call(config, "create_task") for _ in range(3)))
+        assert peak == 1
+
+        peak = 0
+        await asyncio.gather(*(call(config, "list_tasks") for _ in range(3)))
+        assert peak == 3
+
+
+async def test_read_tools_in_one_step_overlap_with_slow_sync_services(
+    tmp_path, monkeypatch
+):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reads.db'}")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+
+    import services.tasks as tasks
+
+    def slow_list(*_args, **_kwargs):
+        time.sleep(0.3)
+        return []
+
+    monkeypatch.setattr(tasks, "list_tasks_service", slow_list)
+    with SessionLocal() as db:
+        config = _runtime_config("user-slow", db)
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(list_tasks_tool.coroutine(config=config) for _ in range(3))
+        )
+        elapsed = time.perf_counter() - started
+
+    assert len(results) == 3
+    # Three 300 ms reads back to back would take 900 ms
+    assert elapsed < 0.6
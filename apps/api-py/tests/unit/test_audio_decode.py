@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from services import audio_decode
+
+
+def _wav(samples: np.ndarray, *, rate: int, channels: int = 1) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+def test_16k_mono_pcm_skips_decoder(monkeypatch):
+    def _fail(_data):
+        raise AssertionError("decoder should not run for 16 kHz mono PCM")
+
+    monkeypatch.setattr(audio_decode, "_decode_with_av", _fail)
+    monkeypatch.setattr(audio_decode, "_decode_with_ffmpeg", _fail)
+    pcm = np.array([0, 16384, -16384, 32767], dtype=np.int16)
+
+    waveform = audio_decode.decode_audio(_wav(pcm, rate=16000))
+
+    assert waveform.dtype == np.float32
+    np.testing.assert_allclose(waveform, pcm / 32768.0)
+
+
+def test_other_formats_go_through_decoder(monkeypatch):
+    seen: list[bytes] = []
+
+    def _decoder(data):
+        seen.append(data)
+        return np.zeros(4, dtype=np.float32)
+
+    monkeypatch.setattr(audio_decode, "_decode_with_av", _decoder)
+    monkeypatch.setattr(audio_decode, "_decode_with_ffmpeg", _decoder)
+    stereo = _wav(np.zeros(8, dtype=np.int16), rate=16000, channels=2)
+    low_rate = _wav(np.zeros(8, dtype=np.int16), rate=8000)
+
+    for data in (stereo, low_rate, b"\x1aE\xdf\xa3webm"):
+        audio_decode.decode_audio(data)
+
+    assert seen == [stereo, low_rate, b"\x1aE\xdf\xa3webm"]
+
+
+def test_av_resamples_to_16k_mono():
+    pytest.importorskip("av")
+    t = np.arange(8000) / 8000
+    tone = (np.sin(2 * np.pi * 220 * t) * 12000).astype(np.int16)
+    stereo = np.repeat(tone, 2)
+
+    waveform = audio_decode.decode_audio(_wav(stereo, rate=8000, channels=2))
+
+    assert waveform.dtype == np.float32
+    assert abs(len(waveform) - 16000) < 400
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from services.conversation import ConversationStore, estimate_tokens
+
+
+def _summarizer(calls: list[list[tuple[str, str]]]):
+    async def summarize(summary: str, turns: list[tuple[str, str]]) -> str:
+        calls.append(turns)
+        topics = ", ".join(content for role, content in turns if role == "user")
+        return f"{summary} discussed {topics}".strip()
+
+    return summarize
+
+
+@pytest.mark.asyncio
+async def test_history_returns_recent_turns_in_order():
+    store = ConversationStore(window_tokens=1000, summarizer=_summarizer([]))
+    store.record_turn("u1", "add milk", "Added task: milk.")
+    store.record_turn("u1", "and eggs too", "Added task: eggs.")
+
+    assert store.history("u1") == [
+        {"role": "user", "content": "add milk"},
+        {"role": "assistant", "content": "Added task: milk."},
+        {"role": "user", "content": "and eggs too"},
+        {"role": "assistant", "content": "Added task: eggs."},
+    ]
+    assert store.history("someone-else") == []
+
+
+@pytest.mark.asyncio
+async def test_window_stays_within_budget_and_old_turns_are_summarized():
+    calls: list[list[tuple[str, str]]] = []
+    store = ConversationStore(window_tokens=20, summarizer=_summarizer(calls))
+
+    for i in range(6):
+        store.record_turn("u1", f"topic {i} " + "x" * 20, f"reply {i}")
+    await store.drain()
+
+    history = store.history("u1")
+    assert history[0]["role"] == "system"
+    assert "topic 0" in history[0]["content"]
+    window = sum(estimate_tokens(m["content"]) for m in history[1:])
+    assert window <= 20
+    assert calls  # evicted turns went through the summarizer
+    assert store.stats()["summaries"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_summarization_runs_off_the_request_path():
+    release = asyncio.Event()
+
+    async def slow_summarizer(summary, turns):
+        await release.wait()
+        return "summary"
+
+    store = ConversationStore(window_tokens=10, summarizer=slow_summarizer)
+    store.record_turn("u1", "a" * 20, "b" * 20)
+    store.record_turn("u1", "c" * 20, "d" * 20)  # returns without waiting
+
+    assert store.stats()["summaries_pending"] == 1
+    release.set()
+    await store.drain()
+    assert store.history("u1")[0]["content"] == "[CONVERSATION SUMMARY] summary"
+
+
+@pytest.mark.asyncio
+async def test_failed_summary_falls_back_to_clipped_extract():
+    async def failing(summary, turns):
+        raise RuntimeError("llm down")
+
+    store = ConversationStore(window_tokens=10, summary_tokens=8, summarizer=failing)
+    store.record_turn("u1", "remember the dentist on friday", "Noted.")
+    store.record_turn("u1", "and call bob", "Okay.")
+    await store.drain()
+
+    summary = store.history("u1")[0]["content"]
+    assert summary.startswith("[CONVERSATION SUMMARY] ")
+    assert estimate_tokens(summary.removeprefix("[CONVERSATION SUMMARY] ")) <= 8
+    assert store.stats()["summary_failures"] >= 1
+
+
+def test_store_is_bounded_by_users_and_counts_tools():
+    store = ConversationStore(max_users=2, summarizer=_summarizer([]))
+    for user in ("a", "b", "c"):
+        store.record_turn(user, "hi", "hello", tools_used=["recall_memory"])
+
+    assert store.history("a") == []
+    assert store.stats()["users"] == 2
+    assert store.stats()["tool_calls"] == {"recall_memory": 3}
+
+
+@pytest.mark.asyncio
+async def test_agent_pipeline_sends_history_and_records_the_turn(monkeypatch):
+    from types import SimpleNamespace
+    from unittest.mock import patch
+
+    import services.agent_service as agent_service
+
+    store = ConversationStore(window_tokens=1000, summarizer=_summarizer([]))
+    monkeypatch.setattr(agent_service, "get_conversation_store", lambda: store)
+    seen: list[list] = []
+
+    class _Agent:
+        async def astream_events(self, payload, config=None, version="v1"):
+            seen.append(payload["messages"])
+            chunk = {"content": "ok"}
+            yield {"event": "on_chat_model_stream", "data": {"chunk": chunk}}
+
+    class _Tx:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    db = SimpleNamespace(in_transaction=lambda: False, begin=_Tx)
+    graph = SimpleNamespace(
+        agent_app=_Agent(), build_agent_runnable_config=lambda u, d: {}
+    )
+    with patch("services.agent_service.agent_graph", graph):
+        for text in ("what's on today", "and tomorrow"):
+            async for _ in agent_service.run_agent_pipeline(text, "u-hist", db):
+                pass
+
+    assert len(seen[0]) == 1
+    assert [getattr(m, "content", None) or m["content"] for m in seen[1]] == [
+        "what's on today",
+        "ok",
+        "and tomorrow",
+    ]
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from services.embedding_cache import (
+    EmbeddingCache,
+    cache_key,
+    prune_embedding_cache,
+)
+from storage.models import Base, EmbeddingCacheEntry
+
+
+def setup_inmemory_db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _session_factory(SessionLocal):
+    @contextmanager
+    def factory():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    return factory
+
+
+class _Encoder:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+
+def test_cache_dedupes_misses_and_normalizes_whitespace():
+    cache = EmbeddingCache(persist=False)
+    encode = _Encoder()
+
+    first = cache.get_or_compute("m", ["hi there", "hi  there ", "x"], encode)
+    second = cache.get_or_compute("m", ["x", "hi there"], encode)
+
+    assert first == [[8.0], [8.0], [1.0]]
+    assert second == [[1.0], [8.0]]
+    assert encode.calls == [["hi there", "x"]]
+    stats = cache.stats()
+    assert stats["misses_total"] == 3
+    assert stats["memory_hits_total"] == 2
+    assert cache_key("m", "a") != cache_key("other", "a")
+
+
+def test_lru_evicts_and_persistent_tier_survives_restart():
+    SessionLocal = setup_inmemory_db()
+    factory = _session_factory(SessionLocal)
+    encode = _Encoder()
+
+    cache = EmbeddingCache(max_entries=2, persist=True, session_factory=factory)
+    cache.get_or_compute("m", ["a", "bb", "ccc"], encode)
+    assert cache.flush() == 3
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions_total"] == 1
+
+    # A fresh process has an empty LRU but reads the shared table.
+    restarted = EmbeddingCache(max_entries=2, persist=True, session_factory=factory)
+    assert restarted.get_or_compute("m", ["a"], encode) == [[1.0]]
+    assert restarted.stats()["persistent_hits_total"] == 1
+    assert encode.calls == [["a", "bb", "ccc"]]
+
+
+def test_expired_rows_are_ignored_and_pruned():
+    SessionLocal = setup_inmemory_db()
+    factory = _session_factory(SessionLocal)
+    db = SessionLocal()
+    old = datetime.now(UTC) - timedelta(days=90)
+    for i in range(3):
+        db.add(
+            EmbeddingCacheEntry(
+                key=cache_key("m", f"old{i}"), model="m", vector=[0.0], created_at=old
+            )
+        )
+    db.commit()
+
+    encode = _Encoder()
+    cache = EmbeddingCache(ttl_seconds=86400, persist=True, session_factory=factory)
+    assert cache.get_or_compute("m", ["old0"], encode) == [[4.0]]
+    assert encode.calls == [["old0"]]
+    cache.flush()
+
+    # old0 was rewritten fresh; only old1/old2 are past the TTL.
+    assert prune_embedding_cache(db, ttl_days=30, max_rows=10) == 2
+    assert db.query(EmbeddingCacheEntry).count() == 1
+    # The row cap evicts oldest-first.
+    assert prune_embedding_cache(db, ttl_days=30, max_rows=0) == 1
+
+
+def test_new_vectors_are_written_behind_in_one_session():
+    SessionLocal = setup_inmemory_db()
+    opened: list[str] = []
+    factory = _session_factory(SessionLocal)
+
+    def counting_factory():
+        opened.append("session")
+        return factory()
+
+    encode = _Encoder()
+    cache = EmbeddingCache(
+        max_entries=1,
+        persist=True,
+        session_factory=counting_factory,
+        flush_interval_ms=60_000,
+    )
+    cache.get_or_compute("m", ["a", "bb"], encode)
+    cache.get_or_compute("m", ["ccc"], encode)
+    # Only the miss lookups touched the DB; the writes are still buffered.
+    assert len(opened) == 2
+    assert cache.stats()["pending_writes"] == 3
+    # An LRU-evicted vector is served from the write buffer.
+    assert cache.get_or_compute("m", ["a"], encode) == [[1.0]]
+    assert len(encode.calls) == 2
+
+    cache.close()
+
+    assert len(opened) == 3
+    assert cache.stats()["flushes_total"] == 1
+    with SessionLocal() as db:
+        assert db.query(EmbeddingCacheEntry).count() == 3
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import sys
+import types
+
+import numpy as np
+import pytest
+
+import services.embeddings as embeddings
+from services.embedding_cache import EmbeddingCache
+from services.embeddings import EmbeddingProvider
+
+
+class _FakeOpenAI:
+    instances = 0
+
+    def __init__(self, api_key: str):
+        _FakeOpenAI.instances += 1
+        self.batches: list[list[str]] = []
+        self.embeddings = self
+
+    def create(self, model: str, input: list[str]):
+        self.batches.append(list(input))
+        # Return out of order to check that results are re-sorted by index.
+        data = [
+            types.SimpleNamespace(index=i, embedding=[float(len(text))])
+            for i, text in enumerate(input)
+        ]
+        return types.SimpleNamespace(data=list(reversed(data)))
+
+
+class _FakeSentenceTransformer:
+    loads = 0
+
+    def __init__(self, name: str):
+        _FakeSentenceTransformer.loads += 1
+        self.calls: list[list[str]] = []
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        return np.array([[float(len(t)), 1.0] for t in texts])
+
+
+def test_openai_client_is_reused_and_inputs_are_batched(monkeypatch):
+    _FakeOpenAI.instances = 0
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr("openai.OpenAI", _FakeOpenAI)
+    monkeypatch.setattr(embeddings, "EMBEDDING_BATCH_SIZE", 2)
+    provider = EmbeddingProvider(cache=EmbeddingCache(persist=False))
+
+    vectors = provider.embed_many(["a", "bb", "ccc", "dddd", "eeeee"])
+    assert vectors == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert provider.embed("xyz") == [3.0]
+    assert provider.embed("ccc") == [3.0]  # served from cache
+
+    assert _FakeOpenAI.instances == 1
+    client = provider._openai()
+    assert [len(b) for b in client.batches] == [2, 2, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_local_model_loads_once_and_async_wrapper_works(monkeypatch):
+    _FakeSentenceTransformer.loads = 0
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    fake_module = types.ModuleType("sentence_transformers")
+    fake_module.SentenceTransformer = _FakeSentenceTransformer
+    monkeypatch.setitem(sys.modules, "sentence_transformers", fake_module)
+    provider = EmbeddingProvider(cache=EmbeddingCache(persist=False))
+
+    assert provider.embed("hi") == [2.0, 1.0]
+    assert await provider.aembed_many(["a", "abc"]) == [[1.0, 1.0], [3.0, 1.0]]
+    assert await provider.aembed("four") == [4.0, 1.0]
+
+    assert _FakeSentenceTransformer.loads == 1
+    assert provider._st_model.calls == [["hi"], ["a", "abc"], ["four"]]
+
+
+def test_embed_many_raises_when_no_provider(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+    provider = EmbeddingProvider(cache=EmbeddingCache(persist=False))
+
+    assert provider.embed_many([]) == []
+    with pytest.raises(RuntimeError, match="No embedding provider available"):
+        provider.embed("hello")
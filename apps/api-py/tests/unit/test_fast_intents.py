@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import services.fast_intents as fast_intents
+from services.agent_service import run_agent_pipeline
+from services.fast_intents import match_intent, parse_fast_intent
+from storage.models import Base, PomodoroSession, Task, User
+
+
+@pytest.mark.parametrize(
+    ("utterance", "tool", "args"),
+    [
+        ("add task buy milk", "create_task", {"title": "buy milk"}),
+        ("Please add a task to call mom.", "create_task", {"title": "call mom"}),
+        ("add buy milk to my todo list", "create_task", {"title": "buy milk"}),
+        (
+            "log habit meditation",
+            "log_habit",
+            {"habit_name": "meditation", "status": True},
+        ),
+        (
+            "mark my reading habit as done",
+            "log_habit",
+            {"habit_name": "reading", "status": True},
+        ),
+        ("start a 25 minute focus", "start_focus", {"duration_minutes": 25}),
+        ("start a fifty minute focus", "start_focus", {"duration_minutes": 50}),
+        (
+            "start a focus session for 45 minutes",
+            "start_focus",
+            {"duration_minutes": 45},
+        ),
+        ("start pomodoro", "start_focus", {"duration_minutes": 25}),
+    ],
+)
+def test_common_commands_match_with_full_confidence(utterance, tool, args):
+    intent = parse_fast_intent(utterance)
+
+    assert intent is not None
+    assert (intent.tool, intent.args) == (tool, args)
+
+
+@pytest.mark.parametrize(
+    "utterance",
+    [
+        "what tasks do I have?",
+        "add task buy milk and then start a focus",
+        "start a 500 minute focus",
+        "start a 0 minute focus",
+        "mark habit reading as not done",
+        "log habit meditation for 20 minutes",
+        "log my habit of reading",
+        "don't log habit reading",
+        "make a task buy groceries tomorrow at 5pm",
+        "add task submit report by friday",
+        "add task call mom next week",
+        "I should probably add a task at some point",
+        "plan my week",
+    ],
+)
+def test_ambiguous_or_other_utterances_fall_back(utterance):
+    assert parse_fast_intent(utterance) is None
+
+
+def test_compound_request_is_matched_with_low_confidence():
+    intent = match_intent("add task write report and log habit reading")
+
+    assert intent is not None
+    assert intent.confidence < fast_intents.FAST_INTENT_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize(
+    "utterance",
+    [
+        "add task clean the house, then email bob",
+        "add task clean the house then email bob",
+        "add task clean the house and then email bob",
+        "add task clean the house also email bob",
+        "add task clean the house and also email bob",
+    ],
+)
+def test_chained_requests_fall_through_to_the_agent(utterance):
+    intent = match_intent(utterance)
+
+    assert intent is not None
+    assert intent.confidence < fast_intents.FAST_INTENT_MIN_CONFIDENCE
+    assert parse_fast_intent(utterance) is None
+
+
+class _AgentMustNotRun:
+    def astream_events(self, *_args, **_kwargs):
+        raise AssertionError("fast path should bypass the agent")
+
+
+def _session():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+async def _events(text: str, user_id: str, db) -> list[dict]:
+    fake_graph = SimpleNamespace(agent_app=_AgentMustNotRun())
+    with patch("services.agent_service.agent_graph", fake_graph):
+        return [json.loads(b) async for b in run_agent_pipeline(text, user_id, db)]
+
+
+@pytest.mark.asyncio
+async def test_agent_pipeline_runs_create_task_without_the_agent():
+    db = _session()
+    db.add(User(id="u1", email="u1@test.dev", password_hash="x"))
+    db.commit()
+    hits_before = fast_intents.get_fast_intent_stats().hits.get("create_task", 0)
+
+    events = await _events("add task buy milk", "u1", db)
+
+    assert [e["type"] for e in events] == [
+        "thought",
+        "tool_use",
+        "tool_result",
+        "response",
+        "end",
+    ]
+    assert events[1]["tool"] == "create_task"
+    assert events[3]["content"] == "Added task: buy milk."
+    assert db.query(Task).filter(Task.user_id == "u1").one().title == "buy milk"
+    stats = fast_intents.get_fast_intent_stats()
+    assert stats.hits["create_task"] == hits_before + 1
+
+
+@pytest.mark.asyncio
+async def test_agent_pipeline_starts_focus_session_directly():
+    db = _session()
+    db.add(User(id="u2", email="u2@test.dev", password_hash="x"))
+    db.commit()
+
+    events = await _events("start a 50 minute focus", "u2", db)
+
+    assert events[3] == {
+        "type": "response",
+        "content": "Started a 50-minute focus session.",
+    }
+    session = db.query(PomodoroSession).filter(PomodoroSession.user_id == "u2").one()
+    assert session.duration_minutes == 50
+
+
+class _RecordingAgentApp:
+    def __init__(self):
+        self.calls = 0
+
+    async def astream_events(self, *_args, **_kwargs):
+        self.calls += 1
+        yield {"event": "on_chat_model_stream", "data": {"chunk": {"content": "ok"}}}
+
+
+@pytest.mark.asyncio
+async def test_unknown_habit_falls_back_to_the_agent():
+    db = _session()
+    db.add(User(id="u3", email="u3@test.dev", password_hash="x"))
+    db.commit()
+    agent_app = _RecordingAgentApp()
+    fake_graph = SimpleNamespace(
+        agent_app=agent_app, build_agent_runnable_config=lambda user_id, db: {}
+    )
+
+    with patch("services.agent_service.agent_graph", fake_graph):
+        events = [
+            json.loads(b)
+            async for b in run_agent_pipeline("log habit flossing", "u3", db)
+        ]
+
+    assert agent_app.calls == 1
+    assert {"type": "response", "content": "ok"} in events
+    assert not any(e["type"] == "tool_result" for e in events)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import services.local_llm as local_llm
+from services.local_llm import LocalLLMLimiter
+from services.provider_router import ProviderBusyError, ProviderRouter
+
+
+async def _hold(limiter: LocalLLMLimiter, release: asyncio.Event, active: list[int]):
+    async with limiter.slot():
+        active.append(limiter.in_flight)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_and_extra_requests_queue():
+    limiter = LocalLLMLimiter(max_concurrency=2, max_queue=4)
+    release = asyncio.Event()
+    active: list[int] = []
+
+    tasks = [asyncio.create_task(_hold(limiter, release, active)) for _ in range(5)]
+    await asyncio.sleep(0.01)
+
+    assert limiter.in_flight == 2
+    assert limiter.stats()["queue_depth"] == 3
+    release.set()
+    await asyncio.gather(*tasks)
+    assert max(active) == 2
+    assert limiter.stats()["completed_total"] == 5
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_retry_after():
+    limiter = LocalLLMLimiter(max_concurrency=1, max_queue=1)
+    release = asyncio.Event()
+    tasks = [asyncio.create_task(_hold(limiter, release, [])) for _ in range(2)]
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(ProviderBusyError) as exc:
+        async with limiter.slot():
+            pass
+
+    assert exc.value.status_code == 503
+    assert int(exc.value.headers["Retry-After"]) >= 1
+    assert limiter.stats()["rejected_total"] == 1
+    release.set()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_busy_local_llm_does_not_trip_its_circuit(monkeypatch):
+    limiter = LocalLLMLimiter(max_concurrency=1, max_queue=0)
+    monkeypatch.setattr(local_llm, "_limiter", limiter)
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(limiter, release, []))
+    await asyncio.sleep(0.01)
+    router = ProviderRouter("llm", hedge=False)
+
+    async def busy_ollama():
+        return await local_llm.chat_completion([], model="m")
+
+    with pytest.raises(ProviderBusyError):
+        await router.call([("ollama", busy_ollama)])
+
+    assert router.health("ollama").snapshot()["samples"] == 0
+    release.set()
+    await holder
@@ -1,6 +1,12 @@
-from services.memory_service import create_memory, search_memories
+from sqlalchemy.dialects import postgresql
+
+from services.memory_service import (
+    _vector_search_stmt,
+    create_memory,
+    search_memories,
+)
 from storage.database import get_session_now
-from storage.models import User
+from storage.models import User, _memory_ann_index_options
 
 
 def ensure_user(db, uid: str):
@@ -45,3 +51,24 @@ def test_search_memories_uses_text_fallback_for_low_similarity():
 
         assert isinstance(results, list)
         assert any("meeting" in r["content"].lower() for r in results)
+
+
+def test_vector_search_orders_by_bare_distance_for_index_use():
+    stmt = _vector_search_stmt("u1", [0.1] * 1536, 5)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    order_by = sql.split("ORDER BY", 1)[1]
+
+    # Only an ascending distance ORDER BY lets pgvector use the ANN index.
+    assert order_by.strip().startswith("distance")
+    assert "created_at" not in order_by
+    assert "<=>" in sql
+    assert "memories.user_id = " in sql
+
+
+def test_ann_index_options_follow_the_migration_env(monkeypatch):
+    monkeypatch.delenv("MEMORY_VECTOR_INDEX", raising=False)
+    assert _memory_ann_index_options() == ("hnsw", {"m": 16, "ef_construction": 64})
+
+    monkeypatch.setenv("MEMORY_VECTOR_INDEX", "IVFFlat")
+    monkeypatch.setenv("MEMORY_IVFFLAT_LISTS", "250")
+    assert _memory_ann_index_options() == ("ivfflat", {"lists": 250})
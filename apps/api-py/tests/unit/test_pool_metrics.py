@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+
+from main import app
+from storage.pool_metrics import PoolMetrics, instrumented_pool_class
+from utils.metrics import Histogram
+
+
+def test_instrumented_pool_records_checkouts_and_timeouts(tmp_path):
+    metrics = PoolMetrics("test")
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=instrumented_pool_class(QueuePool, metrics),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+
+    with engine.connect() as held:
+        held.execute(text("SELECT 1"))
+        snap = metrics.snapshot(engine.pool)
+        assert snap["checked_out"] == 1
+        assert snap["overflow_in_use"] == 0
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    snap = metrics.snapshot(engine.pool)
+    assert snap["checkouts_total"] == 1
+    assert snap["checkout_timeouts_total"] == 1
+    assert snap["checked_out"] == 0
+    assert snap["checkout_wait_ms"]["count"] == 2
+    engine.dispose()
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram(buckets=(10, 100))
+    for value in (1, 50, 500):
+        hist.observe(value)
+
+    snap = hist.snapshot()
+    assert snap["count"] == 3
+    assert snap["buckets"] == {"le_10": 1, "le_100": 2, "le_inf": 3}
+
+
+def test_metrics_endpoint_reports_db_pool():
+    client = TestClient(app)
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    pool = resp.json()["db_pool"]
+    assert "checkouts_total" in pool["sync"]
+    assert pool["sync"]["pool_class"]
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from services.prompt_budget import PromptSection, assemble_prompt
+
+
+def _sections(state: str = "state " * 10, context: str = "") -> list[PromptSection]:
+    return [
+        PromptSection("daily_state", state, priority=20, min_tokens=4),
+        PromptSection("core", "core instructions", stable=True, trimmable=False),
+        PromptSection("context", context),
+    ]
+
+
+def test_stable_sections_come_first_and_counts_are_reported():
+    assembly = assemble_prompt(
+        _sections(context="summary"),
+        [{"role": "user", "content": "hi"}],
+        tool_tokens=100,
+        budget_tokens=1000,
+    )
+
+    assert assembly.system_text.startswith("core instructions\n")
+    assert assembly.system_text.endswith("summary")
+    assert assembly.trimmed == []
+    assert assembly.section_tokens["tools"] == 100
+    assert assembly.section_tokens["messages"] == 1
+    assert assembly.total_tokens == sum(assembly.section_tokens.values())
+
+
+def test_oldest_history_is_dropped_before_sections_are_clipped():
+    history = [{"role": "user", "content": "x" * 80} for _ in range(4)]
+    history.append({"role": "user", "content": "latest"})
+
+    assembly = assemble_prompt(_sections(), history, budget_tokens=60)
+
+    assert assembly.messages[-1]["content"] == "latest"
+    assert len(assembly.messages) < len(history)
+    assert assembly.trimmed[0].startswith("history:")
+    assert "state state" in assembly.system_text
+    assert assembly.total_tokens <= 60
+
+
+def test_sections_are_clipped_by_priority_down_to_their_minimum():
+    assembly = assemble_prompt(
+        _sections(state="s" * 400, context="c" * 400),
+        [{"role": "user", "content": "latest"}],
+        budget_tokens=40,
+    )
+
+    # Lowest priority (context) goes first, then daily_state to its floor.
+    assert assembly.trimmed == ["context", "daily_state"]
+    assert assembly.section_tokens["context"] == 0
+    assert assembly.section_tokens["daily_state"] >= 4
+    assert assembly.system_text.startswith("core instructions")
+    assert assembly.messages == [{"role": "user", "content": "latest"}]
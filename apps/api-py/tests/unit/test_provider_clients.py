@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import pytest
+
+from services.provider_clients import ProviderClientRegistry, ProviderClientSettings
+
+
+class _CountingClient:
+    instances: list[_CountingClient] = []
+
+    def __init__(self, *args, **kwargs):
+        self.kwargs = kwargs
+        self.closed = False
+        _CountingClient.instances.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+        return False
+
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_registry_reuses_pooled_client_between_calls(monkeypatch):
+    _CountingClient.instances = []
+    monkeypatch.setattr("httpx.AsyncClient", _CountingClient)
+    registry = ProviderClientRegistry()
+
+    await registry.start()
+    async with registry.client("deepgram") as first:
+        pass
+    async with registry.client("deepgram") as second:
+        pass
+
+    assert first is second
+    assert first.closed is False
+
+    await registry.aclose()
+    assert all(c.closed for c in _CountingClient.instances)
+    assert registry.started is False
+
+
+@pytest.mark.asyncio
+async def test_registry_falls_back_to_one_shot_client_when_not_started(monkeypatch):
+    _CountingClient.instances = []
+    monkeypatch.setattr("httpx.AsyncClient", _CountingClient)
+    registry = ProviderClientRegistry()
+
+    async with registry.client("groq") as client:
+        assert client.closed is False
+
+    assert client.closed is True
+    assert len(_CountingClient.instances) == 1
+
+
+def test_provider_settings_prefer_provider_specific_env(monkeypatch):
+    monkeypatch.setenv("PROVIDER_HTTP_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("GROQ_HTTP_MAX_CONNECTIONS", "3")
+    monkeypatch.setenv("GROQ_HTTP_TIMEOUT_SECONDS", "12.5")
+
+    groq = ProviderClientSettings("groq")
+    deepgram = ProviderClientSettings("deepgram")
+
+    assert groq.max_connections == 3
+    assert groq.timeout == 12.5
+    assert deepgram.max_connections == 7
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import services.provider_router as provider_router
+from services.provider_router import CLOSED, HALF_OPEN, OPEN, ProviderRouter
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _ok(value):
+    async def call():
+        return value
+
+    return call
+
+
+def _fail(counter: list[int] | None = None):
+    async def call():
+        if counter is not None:
+            counter.append(1)
+        raise RuntimeError("backend down")
+
+    return call
+
+
+@pytest.mark.asyncio
+async def test_failure_falls_through_to_next_provider():
+    router = ProviderRouter("stt", hedge=False)
+
+    result = await router.call([("a", _fail()), ("b", _ok("from-b"))])
+
+    assert result == "from-b"
+    decision = router.snapshot()["recent_decisions"][-1]
+    assert decision["attempted"] == ["a", "b"]
+    assert decision["chosen"] == "b"
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_consecutive_failures_and_skips_provider(
+    monkeypatch,
+):
+    monkeypatch.setattr(provider_router, "ROUTER_FAILURE_THRESHOLD", 2)
+    router = ProviderRouter("stt", hedge=False, clock=_Clock())
+    calls: list[int] = []
+
+    for _ in range(3):
+        await router.call([("a", _fail(calls)), ("b", _ok("b"))])
+
+    assert len(calls) == 2
+    assert router.health("a").state == OPEN
+    assert router.snapshot()["recent_decisions"][-1]["skipped"] == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_closes_circuit_on_success(monkeypatch):
+    monkeypatch.setattr(provider_router, "ROUTER_FAILURE_THRESHOLD", 1)
+    monkeypatch.setattr(provider_router, "ROUTER_OPEN_SECONDS", 30)
+    clock = _Clock()
+    router = ProviderRouter("llm", hedge=False, clock=clock)
+
+    await router.call([("a", _fail()), ("b", _ok("b"))])
+    assert router.health("a").state == OPEN
+
+    clock.now = 31
+    assert router.health("a").snapshot()["state"] == HALF_OPEN
+    result = await router.call([("a", _ok("a")), ("b", _ok("b"))])
+
+    assert result == "a"
+    assert router.health("a").state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_all_circuits_open_is_503(monkeypatch):
+    monkeypatch.setattr(provider_router, "ROUTER_FAILURE_THRESHOLD", 1)
+    router = ProviderRouter("llm", hedge=False, clock=_Clock())
+    with pytest.raises(RuntimeError):
+        await router.call([("a", _fail())])
+
+    with pytest.raises(HTTPException) as exc:
+        await router.call([("a", _ok("a"))])
+
+    assert exc.value.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_hedge_starts_backup_when_primary_is_slow(monkeypatch):
+    monkeypatch.setattr(provider_router, "ROUTER_HEDGE_DEFAULT_MS", 10)
+    monkeypatch.setattr(provider_router, "ROUTER_HEDGE_MIN_MS", 10)
+    router = ProviderRouter("stt", hedge=True)
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "slow"
+
+    result = await router.call([("a", slow), ("b", _ok("fast"))])
+    await asyncio.wait_for(cancelled.wait(), 1)
+
+    assert result == "fast"
+    decision = router.snapshot()["recent_decisions"][-1]
+    assert decision["hedged"] is True
+    assert decision["chosen"] == "b"
+    # The cancelled primary is not counted as a failure
+    assert router.health("a").snapshot()["samples"] == 0
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_when_primary_answers_within_delay(monkeypatch):
+    monkeypatch.setattr(provider_router, "ROUTER_HEDGE_DEFAULT_MS", 1000)
+    router = ProviderRouter("stt", hedge=True)
+    backup_calls: list[int] = []
+
+    async def backup():
+        backup_calls.append(1)
+        return "b"
+
+    result = await router.call([("a", _ok("a")), ("b", backup)])
+
+    assert result == "a"
+    assert backup_calls == []
+    assert router.snapshot()["recent_decisions"][-1]["hedged"] is False
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_does_not_retry_the_backup(monkeypatch):
+    monkeypatch.setattr(provider_router, "ROUTER_HEDGE_DEFAULT_MS", 10)
+    monkeypatch.setattr(provider_router, "ROUTER_HEDGE_MIN_MS", 10)
+    router = ProviderRouter("stt", hedge=True)
+    calls: list[str] = []
+
+    def failing(name: str, delay: float):
+        async def call():
+            calls.append(name)
+            await asyncio.sleep(delay)
+            raise RuntimeError(f"{name} down")
+
+        return call
+
+    async def last():
+        calls.append("c")
+        return "c"
+
+    result = await router.call(
+        [("a", failing("a", 0.05)), ("b", failing("b", 0)), ("c", last)]
+    )
+
+    assert result == "c"
+    assert calls == ["a", "b", "c"]
+    decision = router.snapshot()["recent_decisions"][-1]
+    assert decision["hedged"] is True
+    assert decision["attempted"] == ["a", "b", "c"]
+    assert decision["chosen"] == "c"
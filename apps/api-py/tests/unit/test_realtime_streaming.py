@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import routers.realtime as realtime
+from main import app
+from routers.realtime import _ChunkCoalescer
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_coalescer_flushes_on_byte_threshold():
+    clock = _FakeClock()
+    coalescer = _ChunkCoalescer(flush_interval_ms=1000, flush_bytes=5, clock=clock)
+
+    assert coalescer.add("ab") is None
+    assert coalescer.add("cd") is None
+    assert coalescer.add("e") == "abcde"
+    assert coalescer.flush() is None
+    assert coalescer.text == "abcde"
+
+
+def test_coalescer_flushes_on_interval():
+    clock = _FakeClock()
+    coalescer = _ChunkCoalescer(flush_interval_ms=50, flush_bytes=1024, clock=clock)
+
+    assert coalescer.add("Hel") is None
+    clock.now = 0.06
+    assert coalescer.add("lo") == "Hello"
+    assert coalescer.add("!") is None
+    assert coalescer.flush() == "!"
+
+
+def test_coalescer_reports_time_until_pending_text_is_due():
+    clock = _FakeClock()
+    coalescer = _ChunkCoalescer(flush_interval_ms=50, flush_bytes=1024, clock=clock)
+
+    assert coalescer.seconds_until_flush() is None
+    coalescer.add("Hi")
+    clock.now = 0.02
+    assert abs(coalescer.seconds_until_flush() - 0.03) < 1e-9
+    clock.now = 0.2
+    assert coalescer.seconds_until_flush() == 0.0
+
+
+class _FakeAgentApp:
+    async def astream_events(self, _payload, config=None, version: str = "v1"):
+        for token in ("Hi", " there", ", ", "how ", "can ", "I ", "help?"):
+            yield {
+                "event": "on_chat_model_stream",
+                "data": {"chunk": SimpleNamespace(content=token)},
+            }
+
+
+def test_chat_websocket_forwards_deltas_then_response_end(monkeypatch):
+    fake_graph = SimpleNamespace(
+        agent_app=_FakeAgentApp(),
+        build_agent_runnable_config=lambda user_id, db: {
+            "configurable": {"user_id": user_id, "db": db}
+        },
+    )
+    monkeypatch.setattr(realtime, "agent_graph", fake_graph)
+    monkeypatch.setattr(realtime, "WS_STREAM_FLUSH_BYTES", 6)
+    monkeypatch.setattr(realtime, "WS_STREAM_FLUSH_INTERVAL_MS", 60_000)
+
+    client = TestClient(app)
+    with client.websocket_connect("/ws/v1/chat?guest_id=guest_ws-stream-1") as ws:
+        assert ws.receive_json()["type"] == "thought"
+        ws.send_text("hello")
+
+        frames = []
+        while True:
+            frame = ws.receive_json()
+            frames.append(frame)
+            if frame["type"] == "response_end":
+                break
+
+    deltas = [f["content"] for f in frames if f["type"] == "response_delta"]
+    assert len(deltas) > 1
+    assert "".join(deltas) == "Hi there, how can I help?"
+    assert all(len(d) >= 6 for d in deltas[:-1])
+    final = [f for f in frames if f["type"] == "response"]
+    assert final == [{"type": "response", "content": "Hi there, how can I help?"}]
+
+
+def test_chat_websocket_streams_audio_chunks_with_partials(monkeypatch):
+    import numpy as np
+
+    import services.ai_clients as ai_clients
+    import services.streaming_stt as streaming_stt
+
+    fake_graph = SimpleNamespace(
+        agent_app=_FakeAgentApp(),
+        build_agent_runnable_config=lambda user_id, db: {
+            "configurable": {"user_id": user_id, "db": db}
+        },
+    )
+    monkeypatch.setattr(realtime, "agent_graph", fake_graph)
+    monkeypatch.setattr(ai_clients, "ENABLE_LOCAL_STT", True)
+    monkeypatch.setattr(streaming_stt, "STT_PARTIAL_INTERVAL_MS", 100)
+
+    async def fake_partial(waveform):
+        return f"heard {len(waveform)} samples"
+
+    async def fake_final(audio):
+        return "add a task"
+
+    monkeypatch.setattr(streaming_stt, "_local_transcribe", fake_partial)
+    monkeypatch.setattr(ai_clients, "_get_transcription", fake_final)
+    chunk = (np.ones(1600, dtype="<i2") * 1000).tobytes()  # 100 ms at 16 kHz
+
+    client = TestClient(app)
+    with client.websocket_connect("/ws/v1/chat?guest_id=guest_ws-audio-1") as ws:
+        assert ws.receive_json()["type"] == "thought"
+        ws.send_text('{"type": "audio_start", "encoding": "linear16"}')
+        ws.send_bytes(chunk)
+        partial = ws.receive_json()
+        ws.send_bytes(chunk)
+        ws.send_text('{"type": "audio_end"}')
+
+        frames = []
+        while True:
+            frame = ws.receive_json()
+            frames.append(frame)
+            if frame["type"] == "response_end":
+                break
+
+    assert partial == {"type": "partial_transcript", "content": "heard 1600 samples"}
+    types = [f["type"] for f in frames]
+    assert types.index("transcript") < types.index("response")
+    assert {"type": "transcript", "content": "add a task"} in frames
+
+
+def test_chat_websocket_rejects_audio_end_without_start():
+    client = TestClient(app)
+    with client.websocket_connect("/ws/v1/chat?guest_id=guest_ws-audio-2") as ws:
+        assert ws.receive_json()["type"] == "thought"
+        ws.send_text('{"type": "audio_end"}')
+
+        assert ws.receive_json() == {
+            "type": "error",
+            "content": "audio_end without audio_start",
+        }
+
+
+def test_chat_websocket_rejects_malformed_sample_rate_and_stays_open():
+    client = TestClient(app)
+    with client.websocket_connect("/ws/v1/chat?guest_id=guest_ws-audio-3") as ws:
+        assert ws.receive_json()["type"] == "thought"
+        ws.send_text('{"type": "audio_start", "sample_rate": "fast"}')
+        assert ws.receive_json() == {
+            "type": "error",
+            "content": "Invalid sample_rate in audio_start.",
+        }
+
+        # The socket is still usable
+        ws.send_text('{"type": "audio_end"}')
+        assert ws.receive_json()["content"] == "audio_end without audio_start"
+
+
+def test_chat_websocket_runs_fast_path_command_without_agent(monkeypatch):
+    class _AgentMustNotRun:
+        def astream_events(self, *_args, **_kwargs):
+            raise AssertionError("fast path should bypass the agent")
+
+    monkeypatch.setattr(
+        realtime, "agent_graph", SimpleNamespace(agent_app=_AgentMustNotRun())
+    )
+
+    client = TestClient(app)
+    with client.websocket_connect("/ws/v1/chat?guest_id=guest_ws-fast-1") as ws:
+        assert ws.receive_json()["type"] == "thought"
+        ws.send_text("start a 30 minute focus")
+
+        frames = []
+        while True:
+            frame = ws.receive_json()
+            frames.append(frame)
+            if frame["type"] == "response_end":
+                break
+
+    assert [f["type"] for f in frames] == [
+        "thought",
+        "tool_use",
+        "response_delta",
+        "response",
+        "response_end",
+    ]
+    assert frames[1]["tool"] == "start_focus"
+    assert frames[3]["content"] == "Started a 30-minute focus session."
+
+
+class _StallingAgentApp:
+    async def astream_events(self, _payload, config=None, version: str = "v1"):
+        for token in ("Hi", " there"):
+            yield {
+                "event": "on_chat_model_stream",
+                "data": {"chunk": SimpleNamespace(content=token)},
+            }
+            await asyncio.sleep(0.3)
+
+
+def test_chat_websocket_flushes_pending_text_while_the_model_stalls(monkeypatch):
+    fake_graph = SimpleNamespace(
+        agent_app=_StallingAgentApp(),
+        build_agent_runnable_config=lambda user_id, db: {
+            "configurable": {"user_id": user_id, "db": db}
+        },
+    )
+    monkeypatch.setattr(realtime, "agent_graph", fake_graph)
+    monkeypatch.setattr(realtime, "WS_STREAM_FLUSH_BYTES", 1024)
+    monkeypatch.setattr(realtime, "WS_STREAM_FLUSH_INTERVAL_MS", 50)
+
+    client = TestClient(app)
+    with client.websocket_connect("/ws/v1/chat?guest_id=guest_ws-stream-2") as ws:
+        assert ws.receive_json()["type"] == "thought"
+        ws.send_text("hello")
+
+        frames = []
+        while True:
+            frame = ws.receive_json()
+            frames.append(frame)
+            if frame["type"] == "response_end":
+                break
+
+    # Without a timed flush, "Hi" would wait for the next chunk and go out
+    # together with it.
+    deltas = [f["content"] for f in frames if f["type"] == "response_delta"]
+    assert deltas == ["Hi", " there"]
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from services.context import clear_context_cache, get_user_daily_context
+from services.habits import create_habit_service, update_habit_count_service
+from services.tasks import create_task_service
+from storage.models import Base, User
+
+
+def setup_inmemory_db():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _count_queries(db, fn):
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, params, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", _record)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", _record)
+    return result, len(statements)
+
+
+def test_daily_context_uses_two_queries_and_caches_until_write():
+    clear_context_cache()
+    SessionLocal = setup_inmemory_db()
+    db = SessionLocal()
+    db.add(User(id="user-ctx", email="ctx@test", password_hash="x", name="Ada"))
+    db.commit()
+
+    overdue = (datetime.now(UTC) - timedelta(days=1)).isoformat()
+    for title in ("Write report", "Call bank", "Pay rent", "Book flights"):
+        create_task_service({"title": title, "dueDate": overdue}, "user-ctx", db)
+    create_habit_service({"name": "Stretch"}, "user-ctx", db)
+    walk = create_habit_service({"name": "Walk"}, "user-ctx", db)
+
+    summary, queries = _count_queries(
+        db, lambda: get_user_daily_context(db, "user-ctx")
+    )
+    assert queries == 2
+    assert summary.startswith("[TODAY'S STATE] User:Ada. Pending Tasks:4 (")
+    assert "Unlogged Habits:Stretch,Walk." in summary
+
+    cached, queries = _count_queries(db, lambda: get_user_daily_context(db, "user-ctx"))
+    assert queries == 0
+    assert cached == summary
+
+    update_habit_count_service(walk["id"], {"delta": 1}, "user-ctx", db)
+    refreshed = get_user_daily_context(db, "user-ctx")
+    assert "Unlogged Habits:Stretch." in refreshed
+    clear_context_cache()
+
+
+def test_daily_context_clear_schedule_needs_one_query():
+    clear_context_cache()
+    SessionLocal = setup_inmemory_db()
+    db = SessionLocal()
+
+    summary, queries = _count_queries(
+        db, lambda: get_user_daily_context(db, "missing-user")
+    )
+    assert summary == "[TODAY'S STATE] Clear schedule."
+    assert queries == 1
+    clear_context_cache()
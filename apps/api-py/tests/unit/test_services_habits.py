@@ -1,16 +1,21 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from services.habits import (
+    _compute_streaks,
+    backfill_habit_streaks,
     create_habit_service,
     delete_habit_service,
     get_habit_service,
     list_habits_service,
+    update_habit_count_service,
     update_habit_service,
 )
-from storage.models import Base, User
+from storage.models import Base, Habit, HabitEntry, User
 
 
 def setup_inmemory_db():
@@ -50,3 +55,116 @@ def test_habit_crud_flow():
     assert ok is True
 
     assert get_habit_service(hid, "user-test-1", db) is None
+
+
+def test_list_habits_batches_entries_and_windows_history():
+    SessionLocal = setup_inmemory_db()
+    db = SessionLocal()
+    db.add(User(id="user-hist", email="hist@test", password_hash="x"))
+    today = date.today()
+    for i in range(5):
+        db.add(Habit(id=f"h{i}", user_id="user-hist", name=f"Habit {i}", target=1))
+        # 20-day unbroken streak ending today.
+        for back in range(20):
+            day = (today - timedelta(days=back)).isoformat()
+            db.add(HabitEntry(habit_id=f"h{i}", date=day, count=1, completed=True))
+    db.commit()
+    assert backfill_habit_streaks(db, "user-hist") == 5
+    db.expunge_all()
+
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, params, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", _record)
+    try:
+        habits = list_habits_service("user-hist", db, history_days=7)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", _record)
+
+    assert len(statements) == 2
+    assert len(habits) == 5
+    for habit in habits:
+        assert len(habit["history"]) == 7
+        assert habit["history"][-1]["date"] == today.isoformat()
+        assert habit["currentStreak"] == 20
+        assert habit["bestStreak"] == 20
+
+    full = list_habits_service("user-hist", db)
+    assert all(len(h["history"]) == 20 for h in full)
+
+
+def test_single_habit_reads_and_updates_load_only_the_history_window():
+    SessionLocal = setup_inmemory_db()
+    db = SessionLocal()
+    db.add(User(id="user-win", email="win@test", password_hash="x"))
+    db.add(Habit(id="hw", user_id="user-win", name="Walk", target=1))
+    today = date.today()
+    for back in range(1, 400):
+        day = (today - timedelta(days=back)).isoformat()
+        db.add(HabitEntry(habit_id="hw", date=day, count=1, completed=True))
+    db.commit()
+    backfill_habit_streaks(db, "user-win")
+    db.expunge_all()
+
+    rows_loaded: list[int] = []
+
+    @event.listens_for(db, "loaded_as_persistent")
+    def _count(session, instance):
+        if isinstance(instance, HabitEntry):
+            rows_loaded.append(1)
+
+    got = get_habit_service("hw", "user-win", db, history_days=7)
+    counted = update_habit_count_service(
+        "hw", {"count": 1}, "user-win", db, history_days=7
+    )
+
+    assert len(got["history"]) == 6
+    assert len(counted["history"]) == 7
+    assert counted["currentStreak"] == 400
+    # Today's entry plus two 7-day windows, never the 399-day history
+    assert len(rows_loaded) <= 7 + 7
+    event.remove(db, "loaded_as_persistent", _count)
+
+    # Without history_days the full history is returned, as for the list route
+    full = get_habit_service("hw", "user-win", db)
+    assert len(full["history"]) == 400
+
+
+def test_streak_counters_update_incrementally_and_match_full_recompute(monkeypatch):
+    SessionLocal = setup_inmemory_db()
+    db = SessionLocal()
+    db.add(User(id="user-inc", email="inc@test", password_hash="x"))
+    db.commit()
+    habit = create_habit_service({"name": "Run", "target": 1}, "user-inc", db)
+
+    start = date.today() - timedelta(days=10)
+    current_day = {"value": start}
+
+    class _FakeDate(date):
+        @classmethod
+        def today(cls):
+            return current_day["value"]
+
+    monkeypatch.setattr("services.habits.date_cls", _FakeDate)
+
+    # Days 0-2 done, day 3 missed, days 4-8 done, day 8 undone, day 9 done.
+    for offset in (0, 1, 2, 4, 5, 6, 7, 8):
+        current_day["value"] = start + timedelta(days=offset)
+        update_habit_count_service(habit["id"], {"delta": 1}, "user-inc", db)
+    update_habit_count_service(habit["id"], {"count": 0}, "user-inc", db)
+    current_day["value"] = start + timedelta(days=9)
+    result = update_habit_count_service(habit["id"], {"delta": 1}, "user-inc", db)
+
+    assert result["currentStreak"] == 1
+    assert result["bestStreak"] == 4
+    row = db.get(Habit, habit["id"])
+    assert row.last_completed_date == current_day["value"].isoformat()
+    assert _compute_streaks(row.entries) == {"currentStreak": 1, "bestStreak": 4}
+
+    # A later read after a missed day reports the streak as broken.
+    current_day["value"] = start + timedelta(days=11)
+    fetched = get_habit_service(habit["id"], "user-inc", db)
+    assert fetched["currentStreak"] == 0
+    assert fetched["bestStreak"] == 4
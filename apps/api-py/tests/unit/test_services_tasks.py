@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from services.tasks import (
@@ -11,7 +11,7 @@ from services.tasks import (
     toggle_task_service,
     update_task_service,
 )
-from storage.models import Base, User
+from storage.models import Base, Task, User
 
 
 def setup_inmemory_db():
@@ -106,3 +106,62 @@ def test_task_crud_toggle_and_nested_listing_flow():
     assert delete_task_service(parent["id"], "other-user", db) is False
     assert delete_task_service(parent["id"], "user-task-1", db) is True
     assert get_task_service(parent["id"], "user-task-1", db) is None
+
+
+def _count_queries(db, fn):
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, params, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    return result, len(statements)
+
+
+def _seed_forest(db, user_id: str, roots: int) -> None:
+    db.add(User(id=user_id, email=f"{user_id}@test", password_hash="x"))
+    for i in range(roots):
+        db.add(Task(id=f"{user_id}-r{i}", user_id=user_id, title=f"Root {i}"))
+        db.add(
+            Task(
+                id=f"{user_id}-r{i}-c",
+                user_id=user_id,
+                parent_id=f"{user_id}-r{i}",
+                title="Child",
+            )
+        )
+        db.add(
+            Task(
+                id=f"{user_id}-r{i}-g",
+                user_id=user_id,
+                parent_id=f"{user_id}-r{i}-c",
+                title="Grandchild",
+            )
+        )
+    db.commit()
+    db.expunge_all()
+
+
+def test_list_tasks_query_count_is_constant_in_task_count():
+    SessionLocal = setup_inmemory_db()
+    db = SessionLocal()
+    _seed_forest(db, "small", 2)
+    _seed_forest(db, "large", 50)
+
+    small, small_queries = _count_queries(db, lambda: list_tasks_service("small", db))
+    large, large_queries = _count_queries(db, lambda: list_tasks_service("large", db))
+
+    assert small_queries == large_queries == 2
+    assert len(large) == 50
+    for root in large:
+        assert len(root["subtasks"]) == 1
+        child = root["subtasks"][0]
+        assert child["parentId"] == root["id"]
+        assert [g["title"] for g in child["subtasks"]] == ["Grandchild"]
+        assert child["subtasks"][0]["subtasks"] == []
+    assert len(small) == 2
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import wave
+
+import numpy as np
+import pytest
+
+import services.ai_clients as ai_clients
+from services.streaming_stt import StreamingSTTSession
+
+
+def _pcm(ms: int, rate: int = 16000) -> bytes:
+    return (np.ones(rate * ms // 1000, dtype="<i2") * 2000).tobytes()
+
+
+@pytest.mark.asyncio
+async def test_partials_are_paced_by_audio_duration():
+    partials: list[str] = []
+    seen_lengths: list[int] = []
+
+    async def on_partial(text: str) -> None:
+        partials.append(text)
+
+    async def transcribe(waveform: np.ndarray) -> str:
+        seen_lengths.append(len(waveform))
+        return f"partial {len(seen_lengths)}"
+
+    session = StreamingSTTSession(
+        on_partial,
+        encoding="linear16",
+        transcribe_partial=transcribe,
+        partial_interval_ms=200,
+    )
+    for _ in range(3):
+        await session.feed(_pcm(100))
+        await asyncio.sleep(0.05)
+    await session.aclose()
+
+    # One partial after 200 ms of audio; the third 100 ms chunk is below the
+    # interval since the last partial.
+    assert seen_lengths == [3200]
+    assert partials == ["partial 1"]
+
+
+@pytest.mark.asyncio
+async def test_partials_transcribe_only_the_trailing_window():
+    partials: list[str] = []
+    seen_lengths: list[int] = []
+
+    async def on_partial(text: str) -> None:
+        partials.append(text)
+
+    async def transcribe(waveform: np.ndarray) -> str:
+        seen_lengths.append(len(waveform))
+        return f"partial {len(seen_lengths)}"
+
+    session = StreamingSTTSession(
+        on_partial,
+        encoding="linear16",
+        transcribe_partial=transcribe,
+        partial_interval_ms=500,
+        partial_window_s=1.0,
+    )
+    for _ in range(6):
+        await session.feed(_pcm(500))
+        await asyncio.sleep(0.05)
+    await session.aclose()
+
+    assert seen_lengths == [8000, 16000, 16000, 16000, 16000, 16000]
+    assert partials[:2] == ["partial 1", "partial 2"]
+    assert partials[2] == "… partial 3"
+
+
+@pytest.mark.asyncio
+async def test_partials_are_skipped_while_the_stt_backend_is_busy():
+    busy = {"value": True}
+    seen_lengths: list[int] = []
+
+    async def on_partial(_text: str) -> None:
+        return None
+
+    async def transcribe(waveform: np.ndarray) -> str:
+        seen_lengths.append(len(waveform))
+        return "text"
+
+    session = StreamingSTTSession(
+        on_partial,
+        encoding="linear16",
+        transcribe_partial=transcribe,
+        partial_interval_ms=200,
+        is_busy=lambda: busy["value"],
+    )
+    await session.feed(_pcm(200))
+    await asyncio.sleep(0.05)
+    busy["value"] = False
+    await session.feed(_pcm(200))
+    await asyncio.sleep(0.05)
+    await session.aclose()
+
+    assert seen_lengths == [6400]
+
+
+@pytest.mark.asyncio
+async def test_finish_sends_full_pcm_stream_as_wav(monkeypatch):
+    captured: dict[str, bytes] = {}
+
+    async def fake_transcription(audio):
+        captured["audio"] = audio
+        return "final text"
+
+    async def on_partial(_text: str) -> None:
+        return None
+
+    monkeypatch.setattr(ai_clients, "_get_transcription", fake_transcription)
+    session = StreamingSTTSession(
+        on_partial, encoding="linear16", sample_rate=8000, partial_interval_ms=50
+    )
+    await session.feed(_pcm(250, rate=8000))
+    await session.feed(_pcm(250, rate=8000))
+
+    assert await session.finish() == "final text"
+    with wave.open(io.BytesIO(captured["audio"])) as wav:
+        assert wav.getframerate() == 16000
+        assert wav.getnchannels() == 1
+        assert wav.getnframes() == 8000
+
+
+@pytest.mark.asyncio
+async def test_stream_over_size_limit_is_rejected(monkeypatch):
+    from fastapi import HTTPException
+
+    import services.streaming_stt as streaming_stt
+
+    monkeypatch.setattr(streaming_stt, "AUDIO_MAX_UPLOAD_BYTES", 1000)
+
+    async def on_partial(_text: str) -> None:
+        return None
+
+    session = StreamingSTTSession(on_partial, encoding="linear16")
+    with pytest.raises(HTTPException) as exc:
+        await session.feed(b"\0" * 1200)
+    assert exc.value.status_code == 413
+
+
+def _webm_opus(seconds: float) -> bytes:
+    av = pytest.importorskip("av")
+    buf = io.BytesIO()
+    with av.open(buf, mode="w", format="webm") as container:
+        stream = container.add_stream("libopus", rate=48000)
+        stream.layout = "mono"
+        t = np.arange(int(seconds * 48000)) / 48000
+        wave_ = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+        for i in range(0, len(wave_), 960):
+            frame = av.AudioFrame.from_ndarray(
+                np.ascontiguousarray(wave_[i : i + 960]).reshape(1, -1),
+                format="flt",
+                layout="mono",
+            )
+            frame.sample_rate = 48000
+            frame.pts = i
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buf.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_webm_partials_read_the_incremental_decoder(monkeypatch):
+    import services.streaming_stt as streaming_stt
+
+    data = _webm_opus(3.0)
+
+    def no_full_decode(_data):
+        raise AssertionError("partial re-decoded the whole buffer")
+
+    monkeypatch.setattr(streaming_stt, "decode_audio", no_full_decode)
+    seen_lengths: list[int] = []
+
+    async def on_partial(_text: str) -> None:
+        return None
+
+    async def transcribe(waveform: np.ndarray) -> str:
+        seen_lengths.append(len(waveform))
+        return "text"
+
+    session = StreamingSTTSession(
+        on_partial,
+        encoding="webm",
+        transcribe_partial=transcribe,
+        partial_interval_ms=500,
+        partial_window_s=1.0,
+    )
+    for i in range(0, len(data), 2000):
+        await session.feed(data[i : i + 2000])
+        await asyncio.sleep(0.05)
+    await session.aclose()
+
+    assert seen_lengths
+    assert max(seen_lengths) <= 16000
+    assert seen_lengths[-1] == 16000
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from services.stt_batcher import STTBatcher
+
+
+class _FakeBatchModel:
+    def __init__(self):
+        self.batches: list[list[str]] = []
+
+    def __call__(self, waveforms: list[str]) -> list[str]:
+        self.batches.append(list(waveforms))
+        return [f"text:{w}" for w in waveforms]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_batch_and_keep_their_results():
+    model = _FakeBatchModel()
+    batcher = STTBatcher(model, max_batch_size=8, max_wait_ms=50)
+    try:
+        results = await asyncio.gather(
+            *(batcher.transcribe(f"clip-{i}") for i in range(5))
+        )
+    finally:
+        await batcher.aclose()
+
+    assert results == [f"text:clip-{i}" for i in range(5)]
+    assert len(model.batches) == 1
+    assert sorted(model.batches[0]) == [f"clip-{i}" for i in range(5)]
+    assert batcher.stats()["requests_total"] == 5
+    assert batcher.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_batches_are_capped_at_max_batch_size():
+    model = _FakeBatchModel()
+    batcher = STTBatcher(model, max_batch_size=2, max_wait_ms=50)
+    try:
+        results = await asyncio.gather(
+            *(batcher.transcribe(f"clip-{i}") for i in range(5))
+        )
+    finally:
+        await batcher.aclose()
+
+    assert results == [f"text:clip-{i}" for i in range(5)]
+    assert [len(b) for b in model.batches] == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_is_raised_to_every_caller_and_worker_survives():
+    calls = 0
+
+    def flaky(waveforms):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("model crashed")
+        return [f"ok:{w}" for w in waveforms]
+
+    batcher = STTBatcher(flaky, max_batch_size=4, max_wait_ms=20)
+    try:
+        outcomes = await asyncio.gather(
+            batcher.transcribe("a"), batcher.transcribe("b"), return_exceptions=True
+        )
+        assert all(isinstance(o, RuntimeError) for o in outcomes)
+        assert await batcher.transcribe("c") == "ok:c"
+    finally:
+        await batcher.aclose()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from utils.request_context import request_id_ctx
+from utils.timing import (
+    TimingStats,
+    ToolSpans,
+    TurnTimer,
+    activate,
+    current_timer,
+    timed,
+    timing_requested,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_spans_accumulate_and_mark_records_once():
+    clock = _Clock()
+    timer = TurnTimer(request_id="r", clock=clock)
+    for _ in range(2):
+        with timer.span("tools"):
+            clock.now += 0.1
+    timer.mark("llm_first_token")
+    clock.now += 1.0
+    timer.mark("llm_first_token")
+
+    event = timer.event()
+    assert event["spans"] == {"tools": 200.0, "llm_first_token": 200.0}
+    assert event["total_ms"] == 1200.0
+
+
+def test_timed_uses_active_timer_only():
+    clock = _Clock()
+    timer = TurnTimer(clock=clock)
+    with timed("serialize"):
+        clock.now += 1.0
+    assert timer.spans == {}
+
+    with activate(timer):
+        assert current_timer() is timer
+        with timed("serialize"):
+            clock.now += 0.005
+    assert current_timer() is None
+    assert round(timer.spans["serialize"], 3) == 5.0
+
+
+def test_finish_records_histograms_once(monkeypatch):
+    stats = TimingStats()
+    monkeypatch.setattr("utils.timing.get_timing_stats", lambda: stats)
+    timer = TurnTimer(clock=_Clock())
+    timer.add("stt", 40.0)
+
+    first = timer.finish()
+    assert timer.finish() is first
+
+    snapshot = stats.stats()
+    assert snapshot["turns"] == 1
+    assert snapshot["stages_ms"]["stt"]["count"] == 1
+    assert snapshot["stages_ms"]["total"]["count"] == 1
+
+
+def test_timer_takes_request_id_from_context():
+    token = request_id_ctx.set("abc123")
+    try:
+        assert TurnTimer().request_id == "abc123"
+    finally:
+        request_id_ctx.reset(token)
+
+
+def test_timing_requested_parses_opt_in_values():
+    assert timing_requested("1") and timing_requested("true") and timing_requested(True)
+    assert not timing_requested(None) and not timing_requested("0")
+
+
+def test_tool_spans_count_overlapping_calls_once():
+    clock = _Clock()
+    spans = ToolSpans(clock=clock)
+
+    spans.start("a")
+    clock.now = 0.5
+    spans.start("b")
+    clock.now = 1.0
+    assert spans.end("a") == 0.0
+    clock.now = 1.5
+    assert spans.end("b") == 1500.0
+    clock.now = 3.0
+    spans.start("c")
+    clock.now = 3.25
+    assert spans.end("c") == 250.0
+    assert spans.end("unknown") == 0.0
+    assert spans.ms == 1750.0
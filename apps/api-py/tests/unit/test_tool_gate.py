@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from agent.tool_gate import ToolGate
+
+
+async def _run(gate: ToolGate, log: list[str], name: str, read_only: bool, delay=0.02):
+    async with gate.slot(read_only):
+        log.append(f"start:{name}")
+        await asyncio.sleep(delay)
+        log.append(f"end:{name}")
+
+
+async def test_reads_run_concurrently_within_the_limit():
+    gate = ToolGate(max_concurrency=2)
+    active = 0
+    peak = 0
+
+    async def read():
+        nonlocal active, peak
+        async with gate.slot(read_only=True):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(read() for _ in range(4)))
+    elapsed = time.perf_counter() - started
+
+    assert peak == 2
+    assert elapsed < 0.07  # two waves, not four sequential reads
+
+
+async def test_write_waits_for_earlier_calls_and_blocks_later_ones():
+    gate = ToolGate(max_concurrency=4)
+    log: list[str] = []
+
+    await asyncio.gather(
+        _run(gate, log, "r1", True),
+        _run(gate, log, "r2", True),
+        _run(gate, log, "w1", False),
+        _run(gate, log, "r3", True),
+        _run(gate, log, "w2", False),
+    )
+
+    assert set(log[:2]) == {"start:r1", "start:r2"}
+    w1 = log.index("start:w1")
+    assert log.index("end:r1") < w1 and log.index("end:r2") < w1
+    assert log[w1 : w1 + 4] == ["start:w1", "end:w1", "start:r3", "end:r3"]
+    assert log[-2:] == ["start:w2", "end:w2"]
+
+
+async def test_cancelled_waiter_does_not_block_the_queue():
+    gate = ToolGate(max_concurrency=1)
+    log: list[str] = []
+
+    writer = asyncio.create_task(_run(gate, log, "w", False, delay=0.05))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(_run(gate, log, "cancelled", True))
+    await asyncio.sleep(0)
+    later = asyncio.create_task(_run(gate, log, "r", True))
+    await asyncio.sleep(0)
+    waiter.cancel()
+
+    await asyncio.gather(writer, later)
+    assert "start:cancelled" not in log
+    assert log[-2:] == ["start:r", "end:r"]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from services.audio_decode import encode_wav_pcm16
+from services.vad import (
+    NoSpeechError,
+    prepare_stt_audio,
+    speech_bounds,
+    warn_if_vad_cannot_decode,
+)
+
+RATE = 16000
+
+
+def _clip(lead_s: float, speech_s: float, tail_s: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    parts = [
+        0.001 * rng.normal(size=int(lead_s * RATE)),
+        0.3 * np.sin(2 * np.pi * 220 * np.arange(int(speech_s * RATE)) / RATE),
+        0.001 * rng.normal(size=int(tail_s * RATE)),
+    ]
+    return np.concatenate(parts).astype(np.float32)
+
+
+def test_speech_bounds_trims_leading_and_trailing_silence():
+    waveform = _clip(1.0, 0.5, 1.5)
+
+    start, end = speech_bounds(waveform)
+
+    # Speech spans [1.0s, 1.5s); 200 ms of padding is kept on each side.
+    assert 0.75 * RATE <= start <= 0.85 * RATE
+    assert 1.65 * RATE <= end <= 1.75 * RATE
+
+
+def test_speech_bounds_is_none_for_silence_and_clicks():
+    assert speech_bounds(_clip(2.0, 0.0, 0.0)) is None
+    assert speech_bounds(_clip(1.0, 0.02, 1.0)) is None
+    assert speech_bounds(np.zeros(10, dtype=np.float32)) is None
+
+
+def test_speech_bounds_keeps_a_fully_voiced_clip():
+    t = np.arange(RATE) / RATE
+    # 1 s of voiced audio with no quiet frames, +-20% amplitude modulation
+    envelope = 1 + 0.2 * np.sin(2 * np.pi * 3 * t)
+    waveform = (0.3 * envelope * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+    assert speech_bounds(waveform) == (0, RATE)
+
+
+def test_prepare_stt_audio_sends_trimmed_wav_and_reports_savings():
+    original = encode_wav_pcm16(_clip(1.0, 0.5, 1.5))
+
+    prepared = prepare_stt_audio(original)
+
+    assert prepared.content_type == "audio/wav"
+    assert len(prepared.payload) < len(original) / 2
+    assert prepared.bytes_saved == len(original) - len(prepared.payload)
+    assert 1500 < prepared.ms_saved < 2200
+    assert prepared.waveform is not None
+    assert len(prepared.waveform) == round(prepared.kept_ms * RATE / 1000)
+
+
+def test_prepare_stt_audio_rejects_silent_clip():
+    with pytest.raises(NoSpeechError):
+        prepare_stt_audio(encode_wav_pcm16(_clip(1.5, 0.0, 0.0)))
+
+
+def test_prepare_stt_audio_passes_through_undecodable_input(monkeypatch):
+    monkeypatch.setattr("services.vad.can_decode_in_process", lambda _b: False)
+
+    prepared = prepare_stt_audio(b"\x1aE\xdf\xa3webm-bytes")
+
+    assert prepared.payload == b"\x1aE\xdf\xa3webm-bytes"
+    assert prepared.content_type == "audio/webm"
+    assert prepared.bytes_saved == 0
+
+
+def test_startup_warns_when_vad_cannot_decode_compressed_audio(monkeypatch, caplog):
+    monkeypatch.setattr("services.vad.has_pyav", lambda: False)
+
+    with caplog.at_level("WARNING"):
+        warn_if_vad_cannot_decode()
+
+    assert "PyAV is not installed" in caplog.text
@@ -0,0 +1,81 @@
+"""Minimal in-process metrics: histograms plus a registry of named collectors.
+
+Subsystems register a zero-argument callable that returns a JSON-serializable
+snapshot; ``GET /metrics`` (routers/system.py) renders all of them.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Sequence
+from typing import Any
+
+DEFAULT_BUCKETS_MS: tuple[float, ...] = (
+    1,
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+)
+
+
+class Histogram:
+    """Thread-safe cumulative histogram (Prometheus-style ``le`` buckets)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self._bounds = tuple(sorted(buckets))
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._sum += value
+            self._count += 1
+            for i, bound in enumerate(self._bounds):
+                if value <= bound:
+                    self._counts[i] += 1
+                    return
+            self._counts[-1] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            cumulative = 0
+            buckets: dict[str, int] = {}
+            for bound, count in zip(self._bounds, self._counts, strict=False):
+                cumulative += count
+                buckets[f"le_{bound:g}"] = cumulative
+            buckets["le_inf"] = cumulative + self._counts[-1]
+            return {
+                "count": self._count,
+                "sum": round(self._sum, 3),
+                "buckets": buckets,
+            }
+
+
+_collectors: dict[str, Callable[[], Any]] = {}
+_collectors_lock = threading.Lock()
+
+
+def register_collector(name: str, collector: Callable[[], Any]) -> None:
+    with _collectors_lock:
+        _collectors[name] = collector
+
+
+def collect_metrics() -> dict[str, Any]:
+    with _collectors_lock:
+        collectors = dict(_collectors)
+    snapshot: dict[str, Any] = {}
+    for name, collector in sorted(collectors.items()):
+        try:
+            snapshot[name] = collector()
+        except Exception as exc:
+            snapshot[name] = {"error": str(exc)}
+    return snapshot
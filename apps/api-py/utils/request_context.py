@@ -0,0 +1,9 @@
+"""Per-request context shared by the middleware, logging and services."""
+
+from __future__ import annotations
+
+from contextvars import ContextVar
+
+# Set by CorrelationIdMiddleware (app_factory) from the x-request-id header or
+# a websocket frame's request_id; "-" outside a request.
+request_id_ctx: ContextVar[str] = ContextVar("request_id", default="-")
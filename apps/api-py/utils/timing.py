@@ -0,0 +1,209 @@
+"""Per-turn timing spans.
+
+A ``TurnTimer`` is created for each voice/chat turn (``process_audio_pipeline``,
+``run_agent_pipeline``, ``chat_websocket``) and tagged with the current
+``request_id_ctx``. Stages add their wall time to named spans:
+
+- ``stt``: transcription, including VAD;
+- ``daily_context``: the daily-state DB lookup for the system prompt;
+- ``llm_first_token``: turn start to the first model output;
+- ``llm``: the agent/LLM stream, excluding ``tools`` and ``daily_context``;
+- ``tools``: wall time with at least one tool running (``ToolSpans``), so
+  tools that run concurrently are counted once;
+- ``serialize``: NDJSON encoding and websocket sends, summed.
+
+While a timer is active (``activate``), code deeper in the stack records
+spans with ``timed(name)`` without the timer being passed around. Without
+an active timer it does nothing.
+
+``finish`` folds the spans into per-stage histograms, reported under
+``turn_timing`` on ``GET /metrics``. When the client opts in
+(``?timing=1``, or ``TURN_TIMING_EVENTS=1`` for everyone), the turn's
+stream ends with a ``{"type": "timing", ...}`` event carrying the same spans.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from typing import Any
+
+from utils.metrics import Histogram, register_collector
+from utils.request_context import request_id_ctx
+
+TURN_TIMING_EVENTS = os.getenv("TURN_TIMING_EVENTS", "0") == "1"
+
+STAGE_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_current_timer: ContextVar[TurnTimer | None] = ContextVar(
+    "_current_timer", default=None
+)
+
+
+def timing_requested(flag: Any) -> bool:
+    """Whether a client opt-in value ("1", "true", True...) asks for events."""
+    if TURN_TIMING_EVENTS:
+        return True
+    if isinstance(flag, bool):
+        return flag
+    return str(flag or "").strip().lower() in {"1", "true", "yes"}
+
+
+class TurnTimer:
+    def __init__(
+        self,
+        *,
+        emit: bool = False,
+        request_id: str | None = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.emit = emit
+        self.request_id = request_id or request_id_ctx.get()
+        self._clock = clock
+        self._started = clock()
+        self.spans: dict[str, float] = {}
+        self._finished: dict[str, Any] | None = None
+
+    def elapsed_ms(self) -> float:
+        return (self._clock() - self._started) * 1000
+
+    def add(self, name: str, ms: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + ms
+
+    def mark(self, name: str) -> None:
+        """Record time since turn start under ``name``, once."""
+        if name not in self.spans:
+            self.spans[name] = self.elapsed_ms()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.add(name, (self._clock() - started) * 1000)
+
+    def event(self) -> dict[str, Any]:
+        return {
+            "type": "timing",
+            "request_id": self.request_id,
+            "total_ms": round(self.elapsed_ms(), 1),
+            "spans": {name: round(ms, 1) for name, ms in self.spans.items()},
+        }
+
+    def finish(self) -> dict[str, Any]:
+        """Record the turn in the stage histograms (once) and return its event."""
+        if self._finished is None:
+            self._finished = self.event()
+            get_timing_stats().observe(self._finished)
+        return self._finished
+
+
+class ToolSpans:
+    """Wall-clock union of in-flight tool calls, keyed by run id."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self._in_flight: set[str] = set()
+        self._since = 0.0
+        self.ms = 0.0
+
+    def start(self, run_id: str) -> None:
+        if not self._in_flight:
+            self._since = self._clock()
+        self._in_flight.add(run_id)
+
+    def end(self, run_id: str) -> float:
+        """Finish a call; return the ms it closes (nonzero for the last one)."""
+        if run_id not in self._in_flight:
+            return 0.0
+        self._in_flight.discard(run_id)
+        if self._in_flight:
+            return 0.0
+        elapsed = (self._clock() - self._since) * 1000
+        self.ms += elapsed
+        return elapsed
+
+
+@contextmanager
+def activate(timer: TurnTimer) -> Iterator[TurnTimer]:
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        # An async generator may be finalized from another context.
+        with suppress(ValueError):
+            _current_timer.reset(token)
+
+
+def begin_turn(*, emit: bool = False) -> TurnTimer:
+    """Start a timer and make it current for the rest of the task.
+
+    For loops that handle one turn per iteration (``chat_websocket``), where
+    a ``with activate(...)`` block around the turn would not fit.
+    """
+    timer = TurnTimer(emit=emit)
+    _current_timer.set(timer)
+    return timer
+
+
+def current_timer() -> TurnTimer | None:
+    return _current_timer.get()
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.span(name):
+        yield
+
+
+class TimingStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: dict[str, Histogram] = {}
+        self.turns = 0
+
+    def _histogram(self, name: str) -> Histogram:
+        with self._lock:
+            if name not in self._stages:
+                self._stages[name] = Histogram(buckets=STAGE_BUCKETS_MS)
+            return self._stages[name]
+
+    def observe(self, event: dict[str, Any]) -> None:
+        with self._lock:
+            self.turns += 1
+        self._histogram("total").observe(event["total_ms"])
+        for name, ms in event["spans"].items():
+            self._histogram(name).observe(ms)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stages = dict(self._stages)
+            turns = self.turns
+        return {
+            "turns": turns,
+            "stages_ms": {name: h.snapshot() for name, h in sorted(stages.items())},
+        }
+
+
+# Global instance
+_stats: TimingStats | None = None
+_stats_lock = threading.Lock()
+
+
+def get_timing_stats() -> TimingStats:
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = TimingStats()
+                register_collector("turn_timing", _stats.stats)
+    return _stats